@@ -175,8 +175,8 @@ class ContextualPredictor(
     private fun prepareInputSequence(context: List<String>): IntArray {
         val tokens = mutableListOf<Int>()
 
-        // Add context words
-        for (word in context.take(maxSequenceLength - 2)) { // Reserve space for CLS and SEP
+        // Add the most recent context words, as the model was trained (build_contextual_predictor.py)
+        for (word in context.takeLast(maxSequenceLength - 2)) { // Reserve space for CLS and SEP
             val tokenId = vocabMap.getOrDefault(word.lowercase(locale), unkToken)
             tokens.add(tokenId)
         }
@@ -13,11 +13,37 @@ data class DictionaryIndex(
     val prefixCache: Map<String, List<SerializableDictionaryEntry>>,
     val symDeletes: Map<String, List<String>>? = null,
     val symMeta: SymSpellMeta? = null,
+    // Precomputed SymSpell lookups for common typos: typo -> "<distance><term>" ranked corrections
+    val corrections: Map<String, List<String>>? = null,
+    val correctionMeta: CorrectionMeta? = null,
     // N-gram data for next-word prediction
     val bigrams: Map<String, Map<String, Int>>? = null,  // word1 -> word2 -> frequency
     val trigrams: Map<String, Map<String, Map<String, Int>>>? = null,  // word1 -> word2 -> word3 -> frequency
     val domainWords: Map<String, List<String>>? = null,  // domain -> word list
-    val commonPhrases: List<PhraseEntry>? = null  // common multi-word phrases
+    val commonPhrases: List<PhraseEntry>? = null,  // common multi-word phrases
+    val nextWordCache: NextWordCache? = null,  // precomputed predictions for frequent contexts
+    // Merged multilingual index (tools/dictionaries/build_merged_dict.py): bit i of an entry's mask is languages[i]
+    val languages: List<String>? = null
+)
+
+/**
+ * Ranked next-word predictions for the most frequent contexts
+ * (tools/dictionaries/extract_ngrams.py --dict).
+ */
+@Serializable
+data class NextWordCache(
+    val depth: Int,  // predictions stored per context
+    val coverage: Double,  // share of context occurrences covered
+    val contexts: Map<String, NextWordEntry>  // "word1" (bigram) or "word1 word2" (trigram) -> predictions
+)
+
+/**
+ * Predictions for one context, best first, with their NgramLanguageModel scores.
+ */
+@Serializable
+data class NextWordEntry(
+    val words: List<String>,
+    val scores: List<Double>
 )
 
 /**
@@ -33,18 +59,36 @@ data class PhraseEntry(
 /**
  * Serializable version of DictionaryEntry.
  * Uses Int for source instead of enum for serialization compatibility.
+ * In a merged multilingual index, languages is the entry's language bitmask and
+ * frequencies its frequency per language (only when they differ); frequency is their maximum.
  */
 @Serializable
 data class SerializableDictionaryEntry(
     val word: String,
     val frequency: Int,
-    val source: Int // 0 = MAIN, 1 = USER
+    val source: Int, // 0 = MAIN, 1 = USER
+    val languages: Int? = null,
+    val frequencies: List<Int>? = null
 )
 
 @Serializable
 data class SymSpellMeta(
     val maxEditDistance: Int,
-    val prefixLength: Int
+    val prefixLength: Int,
+    val bucketOrder: String? = null,  // "frequency": bucket entries sorted by descending frequency
+    val maxBucketSize: Int? = null,   // per-bucket cap applied by the build script, if any
+    val keyStrategy: String? = null   // "term" or "prefix": what the delete buckets hold
+)
+
+/**
+ * Parameters of the precomputed correction table (tools/dictionaries/build_correction_cache.py).
+ */
+@Serializable
+data class CorrectionMeta(
+    val depth: Int,  // corrections stored per typo
+    val maxEditDistance: Int,
+    val prefixLength: Int,
+    val layout: String? = null  // keyboard layout the typos were generated for
 )
 
 /**
@@ -60,11 +104,16 @@ fun DictionaryEntry.toSerializable(): SerializableDictionaryEntry {
 
 /**
  * Converts SerializableDictionaryEntry to DictionaryEntry.
+ * languageBit selects the per-language frequency of a merged index entry, when the entry has one.
  */
-fun SerializableDictionaryEntry.toDictionaryEntry(): DictionaryEntry {
+fun SerializableDictionaryEntry.toDictionaryEntry(languageBit: Int = -1): DictionaryEntry {
+    val mask = this.languages ?: 0
+    val languageFrequency = this.frequencies
+        ?.takeIf { languageBit >= 0 && (mask shr languageBit) and 1 == 1 }
+        ?.getOrNull(languageBit)
     return DictionaryEntry(
         word = this.word,
-        frequency = this.frequency,
+        frequency = languageFrequency ?: this.frequency,
         source = SuggestionSource.values()[this.source]
     )
 }
@@ -100,6 +100,7 @@ class DictionaryRepository(
     // N-gram data for next-word prediction
     @Volatile private var bigrams: Map<String, Map<String, Int>> = emptyMap()
     @Volatile private var trigrams: Map<String, Map<String, Map<String, Int>>> = emptyMap()
+    @Volatile private var nextWordCache: NextWordCache? = null
     
     val isLoadStarted: Boolean
         get() = loadStarted
@@ -409,12 +410,28 @@ class DictionaryRepository(
         normalizedIndex.clear()
         prefixCache.clear()
 
+        // A merged multilingual index ranks by this keyboard's language where the entry has it
+        val languageBit = index.languages?.indexOf(baseLocale.language) ?: -1
+        if (index.languages != null) {
+            Log.i(tag, "Merged dictionary: languages=${index.languages}, ranking by ${baseLocale.language} (bit $languageBit)")
+        }
+
         index.normalizedIndex.forEach { (normalized, entries) ->
-            normalizedIndex[normalized] = entries.map { it.toDictionaryEntry() }.toMutableList()
+            normalizedIndex[normalized] = entries.map { it.toDictionaryEntry(languageBit) }.toMutableList()
         }
 
-        index.prefixCache.forEach { (prefix, entries) ->
-            prefixCache[prefix] = entries.map { it.toDictionaryEntry() }.toMutableList()
+        if (index.prefixCache.isEmpty()) {
+            // Not shipped (merged indexes): derive it, sharing the normalizedIndex entries
+            normalizedIndex.forEach { (normalized, list) ->
+                val maxPrefixLength = normalized.length.coerceAtMost(cachePrefixLength)
+                for (length in 1..maxPrefixLength) {
+                    prefixCache.getOrPut(normalized.take(length)) { mutableListOf() }.addAll(list)
+                }
+            }
+        } else {
+            index.prefixCache.forEach { (prefix, entries) ->
+                prefixCache[prefix] = entries.map { it.toDictionaryEntry(languageBit) }.toMutableList()
+            }
         }
 
         if (index.symDeletes != null && index.symMeta != null) {
@@ -423,7 +440,7 @@ class DictionaryRepository(
                 prefixLength = index.symMeta.prefixLength
             )
             val termFrequencies = index.normalizedIndex.mapValues { (_, entries) ->
-                entries.maxOfOrNull { effectiveFrequency(it.toDictionaryEntry()) } ?: 0
+                entries.maxOfOrNull { effectiveFrequency(it.toDictionaryEntry(languageBit)) } ?: 0
             }
             val prefixToTerms = mutableMapOf<String, MutableList<String>>()
             termFrequencies.keys.forEach { term ->
@@ -446,6 +463,14 @@ class DictionaryRepository(
                 }
             }
             engine.loadSerialized(termFrequencies, expandedDeletes)
+            val correctionMeta = index.correctionMeta
+            if (index.corrections != null && correctionMeta != null &&
+                correctionMeta.maxEditDistance == index.symMeta.maxEditDistance &&
+                correctionMeta.prefixLength == index.symMeta.prefixLength
+            ) {
+                engine.loadCorrections(index.corrections, correctionMeta.depth)
+                Log.i(tag, "Loaded precomputed corrections: ${index.corrections.size} typos")
+            }
             symSpell = engine
             symSpellBuilt = true
             Log.i(tag, "Loaded precomputed SymSpell deletes: ${expandedDeletes.size} keys")
@@ -460,6 +485,10 @@ class DictionaryRepository(
             trigrams = index.trigrams
             Log.i(tag, "Loaded trigrams: ${trigrams.size} entries")
         }
+        if (index.nextWordCache != null) {
+            nextWordCache = index.nextWordCache
+            Log.i(tag, "Loaded next-word cache: ${index.nextWordCache.contexts.size} contexts")
+        }
 
         // Re-sort caches using the runtime effective frequency scaling.
         sortCachesByEffectiveFrequency()
@@ -638,4 +667,9 @@ class DictionaryRepository(
      * Gets the trigram data for next-word prediction.
      */
     fun getTrigrams(): Map<String, Map<String, Map<String, Int>>> = trigrams
+
+    /**
+     * Gets the precomputed next-word predictions, if the dictionary has them.
+     */
+    fun getNextWordCache(): NextWordCache? = nextWordCache
 }
@@ -34,6 +34,8 @@ class NgramLanguageModel(
     // N-gram data loaded from dictionary
     private var bigrams: Map<String, Map<String, Int>> = emptyMap()
     private var trigrams: Map<String, Map<String, Map<String, Int>>> = emptyMap()
+    // Ranked predictions precomputed for frequent contexts (built from the same n-grams)
+    private var nextWordCache: NextWordCache? = null
     
     // Cache for normalized words
     private val normalizeCache = mutableMapOf<String, String>()
@@ -42,12 +44,18 @@ class NgramLanguageModel(
      * Loads n-gram data from the dictionary repository.
      * Should be called after dictionary is loaded.
      */
-    fun loadNgrams(bigrams: Map<String, Map<String, Int>>?, trigrams: Map<String, Map<String, Map<String, Int>>>?) {
+    fun loadNgrams(
+        bigrams: Map<String, Map<String, Int>>?,
+        trigrams: Map<String, Map<String, Map<String, Int>>>?,
+        nextWordCache: NextWordCache? = null
+    ) {
         this.bigrams = bigrams ?: emptyMap()
         this.trigrams = trigrams ?: emptyMap()
+        this.nextWordCache = nextWordCache
         
         if (debugLogging) {
-            Log.d(tag, "Loaded n-grams: bigrams=${this.bigrams.size}, trigrams=${this.trigrams.size}")
+            Log.d(tag, "Loaded n-grams: bigrams=${this.bigrams.size}, trigrams=${this.trigrams.size}, " +
+                "cached contexts=${nextWordCache?.contexts?.size ?: 0}")
         }
     }
     
@@ -100,6 +108,7 @@ class NgramLanguageModel(
     private fun predictFromTrigram(word1: String, word2: String, limit: Int): List<PredictionResult> {
         val word1Norm = normalize(word1)
         val word2Norm = normalize(word2)
+        cachedPredictions("$word1Norm $word2Norm", limit, PredictionSource.TRIGRAM)?.let { return it }
         
         val trigramMap = trigrams[word1Norm]?.get(word2Norm) ?: return emptyList()
         
@@ -129,6 +138,7 @@ class NgramLanguageModel(
      */
     private fun predictFromBigram(word1: String, limit: Int): List<PredictionResult> {
         val word1Norm = normalize(word1)
+        cachedPredictions(word1Norm, limit, PredictionSource.BIGRAM)?.let { return it }
         val bigramMap = bigrams[word1Norm] ?: return emptyList()
         
         val results = mutableListOf<PredictionResult>()
@@ -152,6 +162,20 @@ class NgramLanguageModel(
         return results.sortedByDescending { it.score }.take(limit)
     }
     
+    /**
+     * Returns the precomputed ranking for a frequent context, or null when the context is
+     * not cached or more predictions are requested than were stored for it.
+     * Scores use the bundled dictionary frequencies (words added by the user are not reflected).
+     */
+    private fun cachedPredictions(context: String, limit: Int, source: PredictionSource): List<PredictionResult>? {
+        val cache = nextWordCache ?: return null
+        val entry = cache.contexts[context] ?: return null
+        if (limit > cache.depth && entry.words.size >= cache.depth) return null
+        return entry.words.take(limit).mapIndexed { i, word ->
+            PredictionResult(word = word, score = entry.scores[i], source = source)
+        }
+    }
+    
     /**
      * Predicts next word using unigram model (most frequent words).
      */
@@ -195,7 +195,8 @@ class SuggestionController(
             if (dictionaryRepository.isReady) {
                 ngramLanguageModel.loadNgrams(
                     dictionaryRepository.getBigrams(),
-                    dictionaryRepository.getTrigrams()
+                    dictionaryRepository.getTrigrams(),
+                    dictionaryRepository.getNextWordCache()
                 )
             }
         }
@@ -690,7 +691,8 @@ class SuggestionController(
                 if (dictionaryRepository.isReady) {
                     ngramLanguageModel.loadNgrams(
                         dictionaryRepository.getBigrams(),
-                        dictionaryRepository.getTrigrams()
+                        dictionaryRepository.getTrigrams(),
+                        dictionaryRepository.getNextWordCache()
                     )
                 }
 
@@ -712,7 +714,8 @@ class SuggestionController(
                     if (dictionaryRepository.isReady) {
                         ngramLanguageModel.loadNgrams(
                             dictionaryRepository.getBigrams(),
-                            dictionaryRepository.getTrigrams()
+                            dictionaryRepository.getTrigrams(),
+                            dictionaryRepository.getNextWordCache()
                         )
                     }
                 }
@@ -723,7 +726,8 @@ class SuggestionController(
             if (repoBigrams.isNotEmpty()) {
                 ngramLanguageModel.loadNgrams(
                     repoBigrams,
-                    dictionaryRepository.getTrigrams()
+                    dictionaryRepository.getTrigrams(),
+                    dictionaryRepository.getNextWordCache()
                 )
             }
         }
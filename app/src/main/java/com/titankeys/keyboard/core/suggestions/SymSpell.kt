@@ -19,6 +19,9 @@ class SymSpell(
     private val dictionary: MutableMap<String, Int> = mutableMapOf()
     // delete -> list of terms that produced this delete
     private val deletes: MutableMap<String, MutableList<String>> = mutableMapOf()
+    // typo -> precomputed lookup result holding up to correctionDepth suggestions
+    private val corrections: MutableMap<String, List<SuggestItem>> = HashMap()
+    private var correctionDepth: Int = 0
 
     fun addWord(term: String, frequency: Int) {
         if (term.isEmpty()) return
@@ -33,6 +36,11 @@ class SymSpell(
                 if (!bucket.contains(term)) bucket.add(term)
             }
         }
+
+        if (corrections.isNotEmpty()) {
+            // Only typos within reach of the term can get a different result
+            corrections.keys.removeAll { damerauDistanceLimited(it, term, maxEditDistance) >= 0 }
+        }
     }
 
     /**
@@ -49,10 +57,32 @@ class SymSpell(
         deletesMap.forEach { (delete, list) ->
             deletes[delete] = list.toMutableList()
         }
+        corrections.clear()
+    }
+
+    /**
+     * Populate the precomputed lookups for common typos (call after loadSerialized).
+     * Entries are "<distance><term>", ranked like lookup() with maxSuggestions = depth.
+     */
+    fun loadCorrections(table: Map<String, List<String>>, depth: Int) {
+        corrections.clear()
+        table.forEach { (typo, entries) ->
+            corrections[typo] = entries.map { entry ->
+                val term = entry.substring(1)
+                SuggestItem(term, entry[0] - '0', dictionary[term] ?: 0)
+            }
+        }
+        correctionDepth = depth
     }
 
     fun lookup(input: String, maxSuggestions: Int = 8): List<SuggestItem> {
         if (input.isEmpty()) return emptyList()
+        corrections[input]?.let { cached ->
+            // A shorter list is the complete result; a full one only covers depth suggestions
+            if (maxSuggestions <= correctionDepth || cached.size < correctionDepth) {
+                return cached.take(maxSuggestions)
+            }
+        }
         val suggestions = mutableListOf<SuggestItem>()
         val suggestionSet = HashSet<String>()
         val consideredDeletes = HashSet<String>()
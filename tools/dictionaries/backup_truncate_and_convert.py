@@ -8,6 +8,12 @@ This script:
 2. Truncates dictionaries to top N most frequent words
 3. Converts truncated dictionaries to SymSpell .dict format
 
+Word count, edit distance, prefix length, key strategy and bucket cap
+default to each language's entry in symspell_config.json (see
+tune_symspell.py); command line values apply to every language. Unlike
+build_symspell_dict.py, delete buckets hold prefix keys unless the config
+or --key_strategy asks for full terms, as this script always wrote them.
+
 Usage:
     python scripts/backup_truncate_and_convert.py --max_words 20000
 """
@@ -17,34 +23,10 @@ import json
 import os
 import shutil
 from pathlib import Path
-from collections import defaultdict
-import unicodedata
-
-
-def normalize(word: str, locale: str = "it") -> str:
-    """Normalize word (matches Kotlin implementation)."""
-    word = word.lower()
-    word = unicodedata.normalize("NFD", word)
-    word = "".join(ch for ch in word if unicodedata.category(ch) != "Mn")
-    word = "".join(ch for ch in word if unicodedata.category(ch).startswith("L"))
-    return word
-
 
-def generate_deletes(term: str, max_distance: int):
-    """Generate all delete variants for SymSpell."""
-    deletes = set()
+from build_symspell_dict import build_index, build_sym_deletes, canonical_index, load_build_config
 
-    def recurse(current: str, d: int):
-        if d == 0:
-            return
-        for i in range(len(current)):
-            deleted = current[:i] + current[i + 1 :]
-            if deleted not in deletes:
-                deletes.add(deleted)
-                recurse(deleted, d - 1)
-
-    recurse(term, max_distance)
-    return deletes
+DEFAULT_KEY_STRATEGY = "prefix"  # the layout this script has always written
 
 
 def backup_dictionaries(project_root: Path, backup_dir: Path):
@@ -95,48 +77,37 @@ def truncate_dictionary(input_path: Path, max_words: int):
     return truncated, original_count
 
 
-def convert_to_symspell(data: list, max_edit_distance: int = 2, prefix_length: int = 4):
+def convert_to_symspell(data: list, max_edit_distance: int = 2, prefix_length: int = 4,
+                        key_strategy: str = DEFAULT_KEY_STRATEGY, max_bucket_size: int = None):
     """Convert dictionary data to SymSpell format."""
-    normalized_index = {}
-    prefix_cache = {}
-    
-    for entry in data:
-        # IMPORTANT: Preserve original case (uppercase/lowercase) from JSON
-        # e.g., {"w": "Mario", "f": 100} -> word="Mario" (not "mario")
-        # normalize() only converts to lowercase for indexing purposes
-        w = entry["w"]  # Original case preserved
-        f = int(entry.get("f", 1))
-        norm = normalize(w)  # lowercase for indexing only
-        # Save original word with case preserved for dictionary entry
-        normalized_index.setdefault(norm, []).append({"word": w, "frequency": f, "source": 0})
-        # prefix cache up to prefix_length chars
-        for l in range(1, min(len(norm), prefix_length) + 1):
-            prefix_cache.setdefault(norm[:l], []).append({"word": w, "frequency": f, "source": 0})
-    
-    # Generate deletes
-    deletes = defaultdict(set)
-    for norm, entries in normalized_index.items():
-        freq = max(e["frequency"] for e in entries)
-        key = norm[:prefix_length]
-        for d in generate_deletes(key, max_edit_distance):
-            deletes[d].add(key)
-    
-    sym_deletes = {k: sorted(v) for k, v in deletes.items()}
+    # The prefix cache keeps the app's cachePrefixLength (4), independent of the SymSpell prefix
+    index = build_index(data)
+    normalized_index = index["normalizedIndex"]
+    prefix_cache = index["prefixCache"]
+
+    # Same delete buckets as build_symspell_dict.py
+    sym_deletes = build_sym_deletes(normalized_index, max_edit_distance, prefix_length, key_strategy,
+                                    max_bucket_size=max_bucket_size)
     sym_meta = {
         "maxEditDistance": max_edit_distance,
         "prefixLength": prefix_length,
+        "bucketOrder": "frequency",
+        "keyStrategy": key_strategy,
     }
+    if max_bucket_size:
+        sym_meta["maxBucketSize"] = max_bucket_size
     
-    return {
+    return canonical_index({
         "normalizedIndex": normalized_index,
         "prefixCache": prefix_cache,
         "symDeletes": sym_deletes,
         "symMeta": sym_meta,
-    }
+    })
 
 
-def process_dictionaries(project_root: Path, max_words: int, max_edit_distance: int, prefix_length: int):
-    """Process all dictionaries: truncate and convert."""
+def process_dictionaries(project_root: Path, max_words: int = None, max_edit_distance: int = None,
+                         prefix_length: int = None, key_strategy: str = None):
+    """Process all dictionaries: truncate and convert (None = per-language config)."""
     dictionaries_dir = project_root / "app" / "src" / "main" / "assets" / "common" / "dictionaries"
     output_dir = project_root / "app" / "src" / "main" / "assets" / "common" / "dictionaries_serialized"
     
@@ -153,10 +124,16 @@ def process_dictionaries(project_root: Path, max_words: int, max_edit_distance:
     for json_file in json_files:
         language = json_file.stem.replace("_base", "")
         print(f"Processing {language}...")
+
+        config = load_build_config(language, defaults={"keyStrategy": DEFAULT_KEY_STRATEGY})
+        language_max_words = max_words if max_words is not None else config["maxWords"]
+        language_edit_distance = max_edit_distance if max_edit_distance is not None else config["maxEditDistance"]
+        language_prefix_length = prefix_length if prefix_length is not None else config["prefixLength"]
+        language_key_strategy = key_strategy if key_strategy is not None else config["keyStrategy"]
         
         try:
             # Truncate
-            truncated, original_count = truncate_dictionary(json_file, max_words)
+            truncated, original_count = truncate_dictionary(json_file, language_max_words)
             print(f"  Truncated from {original_count} to {len(truncated)} words")
             
             # Write truncated JSON back
@@ -165,14 +142,17 @@ def process_dictionaries(project_root: Path, max_words: int, max_edit_distance:
             print(f"  Updated {json_file.name}")
             
             # Convert to SymSpell
-            symspell_dict = convert_to_symspell(truncated, max_edit_distance, prefix_length)
+            symspell_dict = convert_to_symspell(truncated, language_edit_distance, language_prefix_length,
+                                                language_key_strategy, config["maxBucketSize"])
             
             # Write .dict file
             dict_file = output_dir / f"{language}_base.dict"
             with open(dict_file, "w", encoding="utf-8") as f:
                 json.dump(symspell_dict, f, ensure_ascii=False)
             
-            print(f"  Created {dict_file.name} with {len(symspell_dict['symDeletes'])} delete buckets")
+            print(f"  Created {dict_file.name} with {len(symspell_dict['symDeletes'])} delete buckets "
+                  f"(maxEditDistance={language_edit_distance}, prefixLength={language_prefix_length}, "
+                  f"keys={language_key_strategy})")
             print()
             
         except Exception as e:
@@ -190,20 +170,26 @@ def main():
     parser.add_argument(
         "--max_words",
         type=int,
-        default=20000,
-        help="Maximum number of words to keep (default: 20000)"
+        default=None,
+        help="Maximum number of words to keep (default: per-language config, else 20000)"
     )
     parser.add_argument(
         "--max_edit_distance",
         type=int,
-        default=2,
-        help="SymSpell max edit distance (default: 2)"
+        default=None,
+        help="SymSpell max edit distance (default: per-language config, else 2)"
     )
     parser.add_argument(
         "--prefix_length",
         type=int,
-        default=4,
-        help="SymSpell prefix length (default: 4)"
+        default=None,
+        help="SymSpell prefix length (default: per-language config, else 4)"
+    )
+    parser.add_argument(
+        "--key_strategy",
+        choices=["term", "prefix"],
+        default=None,
+        help="Delete bucket contents: full terms or prefix keys (default: per-language config, else prefix)"
     )
     parser.add_argument(
         "--project_root",
@@ -225,7 +211,7 @@ def main():
     
     print(f"Project root: {project_root}")
     print(f"Backup directory: {backup_dir}")
-    print(f"Max words: {args.max_words}")
+    print(f"Max words: {args.max_words if args.max_words is not None else 'per-language config'}")
     print()
     
     # Step 1: Backup
@@ -233,7 +219,8 @@ def main():
         return 1
     
     # Step 2: Truncate and convert
-    if not process_dictionaries(project_root, args.max_words, args.max_edit_distance, args.prefix_length):
+    if not process_dictionaries(project_root, args.max_words, args.max_edit_distance, args.prefix_length,
+                                args.key_strategy):
         return 1
     
     print("\nDone! Original dictionaries backed up to dict_backup/")
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Measure SymSpell typo recall and lookup speed for a dictionary.
+
+A synthetic typo set is built from the dictionary itself: words are drawn
+from its most frequent normalized terms and corrupted with 1..N random
+edits (deletion, insertion, substitution, adjacent transposition; inserted
+letters follow the dictionary's letter distribution). Every typo is looked
+up with the reference engine (symspell.py, identical to SymSpell.kt), and
+the report gives, per edit count:
+
+    recall@k      - the original word is among the first k suggestions
+    typoIsWord    - the typo is itself a dictionary word (a direct hit wins)
+    noSuggestions - nothing within maxEditDistance was found
+
+plus lookups/sec, per-lookup latency percentiles and the number of
+distance verifications per lookup (a machine-independent cost measure)
+over the whole set.
+Absolute speed is that of CPython, not the phone; use it to compare index
+parameters (bucket sizes drive the verification cost in both).
+The typo set depends only on the dictionary, --seed and the sampling
+flags, so runs with different index parameters are directly comparable.
+
+Usage:
+    python benchmark_symspell.py it_base.dict en_base.dict --output symspell_benchmark.json
+    python benchmark_symspell.py it_base.json --max_edit_distance 2 --prefix_length 5 --edits 1 2
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from build_symspell_dict import load_input
+from symspell import SymSpell
+
+DEFAULT_K = [1, 3, 8]
+
+
+def ranked_terms(index: Dict) -> List[str]:
+    """Normalized terms, most frequent (raw dictionary frequency) first."""
+    best = {norm: max((int(e.get("frequency", 0)) for e in entries), default=0)
+            for norm, entries in index["normalizedIndex"].items()}
+    return sorted(best, key=lambda norm: (-best[norm], norm))
+
+
+def make_typo(word: str, edits: int, letters: List[str], weights: List[int], rng: random.Random) -> str:
+    """Apply `edits` random deletions/insertions/substitutions/transpositions."""
+    typo = word
+    for _ in range(edits):
+        operations = ["insert", "substitute"]
+        if len(typo) > 1:
+            operations += ["delete", "transpose"]
+        operation = rng.choice(operations)
+        if operation == "delete":
+            i = rng.randrange(len(typo))
+            typo = typo[:i] + typo[i + 1:]
+        elif operation == "insert":
+            i = rng.randrange(len(typo) + 1)
+            typo = typo[:i] + rng.choices(letters, weights)[0] + typo[i:]
+        elif operation == "substitute":
+            i = rng.randrange(len(typo))
+            replacement = typo[i]
+            while replacement == typo[i]:
+                replacement = rng.choices(letters, weights)[0]
+            typo = typo[:i] + replacement + typo[i + 1:]
+        else:
+            i = rng.randrange(len(typo) - 1)
+            typo = typo[:i] + typo[i + 1] + typo[i] + typo[i + 2:]
+    return typo
+
+
+def build_typo_set(index: Dict, samples: int, edits: List[int], top_words: int = 20000,
+                   min_length: int = 3, seed: int = 0) -> List[Tuple[str, str, int]]:
+    """(typo, original word, edit count) triples; `samples` per edit count."""
+    rng = random.Random(seed)
+    words = [w for w in ranked_terms(index)[:top_words] if len(w) >= min_length]
+    if not words:
+        return []
+    letter_counts = Counter("".join(words))
+    letters = sorted(letter_counts)
+    weights = [letter_counts[c] for c in letters]
+
+    typo_set = []
+    for edit_count in edits:
+        for _ in range(samples):
+            word = rng.choice(words)
+            typo = word
+            while typo == word:
+                typo = make_typo(word, edit_count, letters, weights, rng)
+            typo_set.append((typo, word, edit_count))
+    return typo_set
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def evaluate(engine: SymSpell, typo_set: List[Tuple[str, str, int]], ks: List[int] = DEFAULT_K) -> Dict:
+    """Recall@k per edit count, lookups/sec and latency of engine over the typo set."""
+    max_suggestions = max(ks)
+    by_edits: Dict[int, Dict] = {}
+    timings = []
+    verifications = []
+
+    start = time.perf_counter()
+    for typo, word, edit_count in typo_set:
+        verified_before = engine.verifications
+        lookup_start = time.perf_counter()
+        suggestions = engine.lookup(typo, max_suggestions)
+        timings.append(time.perf_counter() - lookup_start)
+        verifications.append(engine.verifications - verified_before)
+
+        stats = by_edits.setdefault(edit_count, {"samples": 0, "hits": Counter(),
+                                                 "typoIsWord": 0, "noSuggestions": 0})
+        stats["samples"] += 1
+        terms = [s.term for s in suggestions]
+        if word in terms:
+            rank = terms.index(word)
+            for k in ks:
+                if rank < k:
+                    stats["hits"][k] += 1
+        stats["typoIsWord"] += typo in engine.dictionary
+        stats["noSuggestions"] += not suggestions
+    elapsed = time.perf_counter() - start
+
+    recall = {}
+    for edit_count, stats in sorted(by_edits.items()):
+        n = stats["samples"]
+        recall[str(edit_count)] = {
+            "samples": n,
+            **{f"recall@{k}": round(stats["hits"][k] / n, 4) for k in ks},
+            "typoIsWord": round(stats["typoIsWord"] / n, 4),
+            "noSuggestions": round(stats["noSuggestions"] / n, 4),
+        }
+    total = sum(stats["samples"] for stats in by_edits.values())
+    overall = {f"recall@{k}": round(sum(s["hits"][k] for s in by_edits.values()) / total, 4)
+               for k in ks} if total else {}
+
+    timings.sort()
+    verifications.sort()
+    return {
+        "lookups": len(typo_set),
+        "recall": recall,
+        "overall": overall,
+        "lookupsPerSec": round(len(typo_set) / elapsed, 1) if elapsed else None,
+        "latencyUs": {
+            "mean": round(statistics.mean(timings) * 1e6, 1),
+            "p50": round(percentile(timings, 0.50) * 1e6, 1),
+            "p95": round(percentile(timings, 0.95) * 1e6, 1),
+            "p99": round(percentile(timings, 0.99) * 1e6, 1),
+        } if timings else {},
+        "verificationsPerLookup": {
+            "mean": round(statistics.mean(verifications), 1),
+            "p95": percentile(verifications, 0.95),
+        } if verifications else {},
+    }
+
+
+def index_stats(engine: SymSpell) -> Dict:
+    sizes = [len(bucket) for bucket in engine.deletes.values()]
+    return {
+        "maxEditDistance": engine.max_edit_distance,
+        "prefixLength": engine.prefix_length,
+        "terms": len(engine.dictionary),
+        "deleteBuckets": len(sizes),
+        "bucketEntries": sum(sizes),
+        "meanBucketSize": round(statistics.mean(sizes), 2) if sizes else 0,
+        "maxBucketSize": max(sizes, default=0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SymSpell recall@k and lookup speed on synthetic typos")
+    parser.add_argument("inputs", nargs="+", help=".dict or base JSON dictionaries")
+    parser.add_argument("--max_edit_distance", type=int, default=None,
+                        help="Override symMeta (deletes are regenerated)")
+    parser.add_argument("--prefix_length", type=int, default=None,
+                        help="Override symMeta (deletes are regenerated)")
+    parser.add_argument("--samples", type=int, default=500, help="Typos per edit count (default: 500)")
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 2], help="Edit counts (default: 1 2)")
+    parser.add_argument("--top_words", type=int, default=20000,
+                        help="Draw words from the N most frequent terms (default: 20000)")
+    parser.add_argument("--min_length", type=int, default=3, help="Minimum word length (default: 3)")
+    parser.add_argument("--k", type=int, nargs="+", default=DEFAULT_K, help="Recall cut-offs (default: 1 3 8)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    reports = {}
+    for path in args.inputs:
+        print(f"{path}:")
+        index = load_input(path)
+
+        build_start = time.perf_counter()
+        engine = SymSpell.from_index(index, args.max_edit_distance, args.prefix_length)
+        build_seconds = time.perf_counter() - build_start
+        stats = index_stats(engine)
+        print(f"  {stats['terms']} terms, {stats['deleteBuckets']} delete buckets "
+              f"(maxEditDistance={stats['maxEditDistance']}, prefixLength={stats['prefixLength']}, "
+              f"loaded in {build_seconds:.1f} s)")
+
+        typo_set = build_typo_set(index, args.samples, args.edits, args.top_words, args.min_length, args.seed)
+        if not typo_set:
+            print(f"  [WARN] No words of length >= {args.min_length}; skipped")
+            continue
+        result = evaluate(engine, typo_set, args.k)
+        for edit_count, recall in result["recall"].items():
+            cutoffs = "  ".join(f"@{k} {recall[f'recall@{k}']:.1%}" for k in args.k)
+            print(f"  {edit_count} edit(s): recall {cutoffs}  "
+                  f"(typo is a word {recall['typoIsWord']:.1%}, none found {recall['noSuggestions']:.1%})")
+        print(f"  {result['lookupsPerSec']:.0f} lookups/s, p50 {result['latencyUs']['p50']} us, "
+              f"p95 {result['latencyUs']['p95']} us, "
+              f"{result['verificationsPerLookup']['mean']:.0f} verifications/lookup")
+
+        reports[path] = {"index": stats, "loadSeconds": round(build_seconds, 2), **result}
+
+    if args.output:
+        report = {
+            "settings": {"samples": args.samples, "edits": args.edits, "topWords": args.top_words,
+                         "minLength": args.min_length, "seed": args.seed},
+            "dictionaries": reports,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
+    return 0 if reports else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
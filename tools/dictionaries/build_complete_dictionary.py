@@ -111,7 +111,8 @@ def build_dictionary(
                 sys.executable, "tools/dictionaries/merge_dictionaries.py"
             ] + [str(f) for f in input_files] + [
                 "--output", str(merged_output),
-                "--strategy", "weighted"
+                "--strategy", "weighted",
+                "--normalize"
             ]
             if not run_command(cmd, "Merge dictionaries"):
                 print("Warning: Merge failed, using base dictionary...")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Precompute SymSpell corrections for the most likely typos and store them in a .dict.
+
+Most autocorrect lookups come from a small set of typos of frequent words, so
+their results can be computed once at build time. For the --top_words most
+frequent terms of a .dict (built by build_symspell_dict.py), the script
+generates the single-edit typos a physical keyboard produces:
+
+    adjacent   a letter replaced by a neighbouring key
+    transpose  two adjacent letters swapped
+    omit       a letter left out
+    insert     a neighbouring key pressed next to the intended one
+    double     a letter typed twice
+
+Neighbours come from the key grid of the TitanKeys keyboard and the
+language's layout in assets/common/layouts (--layout; de uses qwertz, fr
+azerty, others qwerty). Each typo is weighted by its word's frequency and
+the TYPO_WEIGHTS of its edit type, spread evenly over that type's edits of
+the word. The --max_typos heaviest typos that are not dictionary words are
+looked up with the reference engine (symspell.py), built from the .dict's
+own symDeletes/symMeta, so the results are exactly what SymSpell.lookup
+returns on the device.
+
+The .dict gains two fields:
+
+    corrections     typo -> up to --depth ranked corrections, each encoded as
+                    "<distance><term>" (terms are letters only)
+    correctionMeta  depth, maxEditDistance, prefixLength and layout
+
+SymSpell.kt answers a lookup for a typo in the table with a single hash
+probe when at most `depth` suggestions are requested (or the typo has fewer
+than `depth` corrections), and drops entries that a user word added at
+runtime could change. The report gives the table's coverage of the typo
+model's probability mass, its CBOR size and the verifications it saves.
+
+Rebuilding the deletes with build_symspell_dict.py drops the table; run this
+script again afterwards.
+
+Usage:
+    python build_correction_cache.py --input it_base.dict
+    python build_correction_cache.py --input de_base.dict --output de_base.dict --max_typos 10000 --report de_corrections.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+from benchmark_symspell import ranked_terms
+from build_symspell_dict import import_cbor2, language_from_path, load_input, normalize
+from symspell import SymSpell
+
+LAYOUTS_DIR = Path(__file__).resolve().parent.parent.parent / "app" / "src" / "main" / "assets" / "common" / "layouts"
+LANGUAGE_LAYOUTS = {"de": "qwertz", "fr": "azerty"}
+DEFAULT_LAYOUT = "qwerty"
+
+# (row, column) of each key on the physical keyboard (SuggestionEngine.buildKeyboardPositions)
+PHYSICAL_KEYS = {
+    "KEYCODE_Q": (0, 0), "KEYCODE_W": (0, 1), "KEYCODE_E": (0, 2), "KEYCODE_R": (0, 3), "KEYCODE_T": (0, 4),
+    "KEYCODE_Y": (0, 5), "KEYCODE_U": (0, 6), "KEYCODE_I": (0, 7), "KEYCODE_O": (0, 8), "KEYCODE_P": (0, 9),
+    "KEYCODE_A": (1, 0), "KEYCODE_S": (1, 1), "KEYCODE_D": (1, 2), "KEYCODE_F": (1, 3), "KEYCODE_G": (1, 4),
+    "KEYCODE_H": (1, 5), "KEYCODE_J": (1, 6), "KEYCODE_K": (1, 7), "KEYCODE_L": (1, 8),
+    "KEYCODE_Z": (2, 0), "KEYCODE_X": (2, 1), "KEYCODE_C": (2, 2), "KEYCODE_V": (2, 3),
+    "KEYCODE_B": (2, 6), "KEYCODE_N": (2, 7), "KEYCODE_M": (2, 8),
+}
+
+# Share of a word's typo mass per edit type
+TYPO_WEIGHTS = {"adjacent": 0.4, "transpose": 0.2, "omit": 0.2, "insert": 0.1, "double": 0.1}
+
+
+def load_adjacency(layout: str) -> Dict[str, Set[str]]:
+    """Normalized letter -> letters on the surrounding keys (8-neighbourhood) for a layout file."""
+    with open(LAYOUTS_DIR / f"{layout}.json", "r", encoding="utf-8") as f:
+        mappings = json.load(f)["mappings"]
+
+    keys: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+    for keycode, mapping in mappings.items():
+        position = PHYSICAL_KEYS.get(keycode)
+        if position is None:
+            continue
+        for tap in [mapping] + mapping.get("taps", []):
+            letter = normalize(tap.get("lowercase", ""))
+            if len(letter) == 1:
+                keys[position].add(letter)
+
+    adjacency: Dict[str, Set[str]] = defaultdict(set)
+    for (row, column), letters in keys.items():
+        neighbours = set()
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if (dr or dc) and (row + dr, column + dc) in keys:
+                    neighbours |= keys[(row + dr, column + dc)]
+        for letter in letters:
+            adjacency[letter] |= neighbours - {letter}
+    return dict(adjacency)
+
+
+def keyboard_typos(word: str, adjacency: Dict[str, Set[str]]) -> Iterator[Tuple[str, str]]:
+    """(edit type, typo) for every single keyboard edit of word."""
+    for i, letter in enumerate(word):
+        for neighbour in sorted(adjacency.get(letter, ())):
+            yield "adjacent", word[:i] + neighbour + word[i + 1:]
+            yield "insert", word[:i] + neighbour + word[i:]
+            yield "insert", word[:i + 1] + neighbour + word[i + 1:]
+        yield "omit", word[:i] + word[i + 1:]
+        yield "double", word[:i] + letter + word[i:]
+        if i + 1 < len(word) and word[i + 1] != letter:
+            yield "transpose", word[:i] + word[i + 1] + letter + word[i + 2:]
+
+
+def typo_weights(words: List[Tuple[str, int]], adjacency: Dict[str, Set[str]], dictionary: Set[str],
+                 min_length: int = 3) -> Dict[str, float]:
+    """Typo -> probability mass over (word, frequency) pairs; typos that are words are left out."""
+    mass: Dict[str, float] = defaultdict(float)
+    for word, frequency in words:
+        by_type: Dict[str, Set[str]] = defaultdict(set)
+        for edit_type, typo in keyboard_typos(word, adjacency):
+            if typo != word:
+                by_type[edit_type].add(typo)
+        for edit_type, typos in by_type.items():
+            share = frequency * TYPO_WEIGHTS[edit_type] / len(typos)
+            for typo in typos:
+                if len(typo) >= min_length and typo not in dictionary:
+                    mass[typo] += share
+    return mass
+
+
+def encode_corrections(suggestions) -> List[str]:
+    return [f"{s.distance}{s.term}" for s in suggestions]
+
+
+def build_corrections(engine: SymSpell, typos: List[str], depth: int) -> Tuple[Dict[str, List[str]], List[int]]:
+    """Table of encoded lookups and the verifications each typo costs without it."""
+    table = {}
+    verifications = []
+    for typo in typos:
+        before = engine.verifications
+        suggestions = engine.lookup(typo, depth)
+        verifications.append(engine.verifications - before)
+        if suggestions:
+            table[typo] = encode_corrections(suggestions)
+    return table, verifications
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add a precomputed typo -> corrections table to a .dict")
+    parser.add_argument("--input", required=True, help="Path to a .dict with symDeletes (build_symspell_dict.py)")
+    parser.add_argument("--output", default=None, help="Path to write the .dict (default: overwrite --input)")
+    parser.add_argument("--language", default=None, help="Language code (default: from the input name)")
+    parser.add_argument("--layout", default=None,
+                        help="Layout in assets/common/layouts (default: qwertz for de, azerty for fr, else qwerty)")
+    parser.add_argument("--top_words", type=int, default=3000,
+                        help="Generate typos for the N most frequent terms (default: 3000)")
+    parser.add_argument("--max_typos", type=int, default=5000, help="Table size in typos (default: 5000)")
+    parser.add_argument("--depth", type=int, default=12,
+                        help="Corrections stored per typo; larger requests fall back to the lookup (default: 12)")
+    parser.add_argument("--min_length", type=int, default=3, help="Minimum typo length (default: 3)")
+    parser.add_argument("--report", default=None, help="Write coverage and size statistics (JSON)")
+    args = parser.parse_args()
+    cbor2 = import_cbor2()
+
+    language = args.language or language_from_path(args.input)
+    layout = args.layout or LANGUAGE_LAYOUTS.get(language, DEFAULT_LAYOUT)
+    output = args.output or args.input
+
+    print("=" * 50)
+    print(f"Correction cache: {args.input} (layout {layout})")
+    print("=" * 50)
+
+    data = load_input(args.input)
+    if not data.get("symDeletes") or not data.get("symMeta"):
+        print("ERROR: No precomputed deletes; run build_symspell_dict.py first")
+        return 1
+    data.pop("corrections", None)
+    data.pop("correctionMeta", None)
+
+    print("\n[1/3] Generating keyboard typos...")
+    adjacency = load_adjacency(layout)
+    best_frequency = {norm: max((int(e.get("frequency", 0)) for e in entries), default=0)
+                      for norm, entries in data["normalizedIndex"].items()}
+    words = [(word, best_frequency[word]) for word in ranked_terms(data)[:args.top_words]
+             if len(word) >= args.min_length]
+    mass = typo_weights(words, adjacency, set(data["normalizedIndex"]), args.min_length)
+    ranked = sorted(mass, key=lambda typo: (-mass[typo], typo))
+    selected = ranked[:args.max_typos]
+    total_mass = sum(mass.values())
+    covered_mass = sum(mass[typo] for typo in selected)
+    print(f"  {len(mass)} distinct typos from {len(words)} words; "
+          f"top {len(selected)} cover {covered_mass / total_mass:.1%} of the typo mass")
+
+    print("\n[2/3] Running the reference lookup...")
+    engine = SymSpell.from_index(data)
+    start = time.perf_counter()
+    corrections, verifications = build_corrections(engine, selected, args.depth)
+    print(f"  {len(corrections)} typos with corrections in {time.perf_counter() - start:.0f} s "
+          f"({sum(verifications) / max(len(selected), 1):.0f} verifications/lookup avoided)")
+
+    print("\n[3/3] Writing .dict...")
+    data["corrections"] = corrections
+    data["correctionMeta"] = {
+        "depth": args.depth,
+        "maxEditDistance": engine.max_edit_distance,
+        "prefixLength": engine.prefix_length,
+        "layout": layout,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "wb") as f:
+        cbor2.dump(data, f)
+    table_bytes = len(cbor2.dumps(corrections))
+    print(f"  [OK] {output}: table {table_bytes / 1024:.0f} KB, .dict {os.path.getsize(output) / (1024 * 1024):.2f} MB")
+
+    if args.report:
+        report = {
+            "dictionary": args.input,
+            "layout": layout,
+            "settings": {"topWords": args.top_words, "maxTypos": args.max_typos, "depth": args.depth,
+                         "minLength": args.min_length, "typoWeights": TYPO_WEIGHTS},
+            "typosGenerated": len(mass),
+            "typosStored": len(corrections),
+            "massCoverage": round(covered_mass / total_mass, 4) if total_mass else 0,
+            "tableBytes": table_bytes,
+            "verificationsAvoided": {
+                "mean": round(sum(verifications) / max(len(selected), 1), 1),
+                "total": sum(verifications),
+            },
+            "sample": {typo: corrections.get(typo, []) for typo in selected[:50]},
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"  Report written to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Diff two .dict builds into a compact patch, and apply it to reproduce the
+new file byte for byte.
+
+A refreshed dictionary usually changes a few hundred terms, yet users
+download the whole multi-megabyte .dict. The patch holds only what changed,
+at the level the file is organised in:
+
+    fields    top-level maps (normalizedIndex, prefixCache, symDeletes,
+              corrections, ...) are diffed key by key
+    buckets   a bucket (entry list) that changed is stored as the
+              insert/replace/delete runs that turn the old list into the
+              new one, or whole when that is smaller
+    values    anything else (symMeta, scalars) is replaced
+
+Map key order is part of the bytes: the patch records whether the new map
+is sorted (build_symspell_dict.py and update_symspell_dict.py write sorted
+keys) or lists the order when it is neither sorted nor the old order with
+new keys appended. The patch is CBOR, compressed with LZMA, and carries the
+SHA-256 of both files; applying checks the input against the first and the
+result against the second, so a patch never produces a wrong .dict.
+
+Only CBOR .dict files can be diffed; legacy JSON .dict files (still written
+by backup_truncate_and_convert.py and preprocess_dictionaries.py) are
+rejected, convert them with convert_dict_to_cbor.py first.
+
+Both directory arguments may be directories: every *.dict present in both
+is diffed, and the report lists, per language, the old and new sizes, the
+LZMA-compressed new file (what a full download costs) and the patch size.
+
+Usage:
+    python build_dict_patch.py --old old/it_base.dict --new it_base.dict --output it_base.patch
+    python build_dict_patch.py --old old_dicts/ --new dictionaries_serialized/ --output patches/ --report patches.json
+    python build_dict_patch.py --apply it_base.patch --input old/it_base.dict --output it_base.dict
+"""
+
+import argparse
+import hashlib
+import json
+import lzma
+import os
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from build_symspell_dict import import_cbor2, language_from_path
+
+PATCH_FORMAT = "titankeys-dict-patch"
+PATCH_VERSION = 1
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def encoded_size(value: Any) -> int:
+    return len(import_cbor2().dumps(value))
+
+
+def diff_list(old: List, new: List) -> Optional[Dict]:
+    """Runs [start, end, items] replacing old[start:end], or the whole list if that is smaller."""
+    cbor2 = import_cbor2()
+    matcher = SequenceMatcher(None, [cbor2.dumps(v) for v in old], [cbor2.dumps(v) for v in new], autojunk=False)
+    runs = [[i1, i2, new[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+    if encoded_size(runs) < encoded_size(new):
+        return {"l": runs}
+    return {"v": new}
+
+
+def diff_value(old: Any, new: Any) -> Optional[Dict]:
+    """Patch node turning old into new (None when equal)."""
+    if type(old) is type(new) and old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        return diff_map(old, new)
+    if isinstance(old, list) and isinstance(new, list):
+        return diff_list(old, new)
+    return {"v": new}
+
+
+def diff_map(old: Dict, new: Dict) -> Dict:
+    changed = {}
+    for key, value in new.items():
+        node = diff_value(old[key], value) if key in old else {"v": value}
+        if node is not None:
+            changed[key] = node
+    node: Dict[str, Any] = {"d": changed}
+    removed = [key for key in old if key not in new]
+    if removed:
+        node["x"] = removed
+    new_keys = list(new)
+    if new_keys == sorted(new_keys, key=str):
+        node["s"] = True
+    elif new_keys != default_order(old, new.keys()):
+        node["o"] = new_keys
+    return node
+
+
+def default_order(old: Dict, keys) -> List:
+    """Old keys that remain, in old order, then the new ones in the given order."""
+    keys = list(keys)
+    present = set(keys)
+    return [key for key in old if key in present] + [key for key in keys if key not in old]
+
+
+def apply_value(old: Any, node: Dict) -> Any:
+    if "v" in node:
+        return node["v"]
+    if "l" in node:
+        result = list(old)
+        # Runs are in ascending old positions; apply from the end so earlier offsets stay valid
+        for start, end, items in reversed(node["l"]):
+            result[start:end] = items
+        return result
+    return apply_map(old, node)
+
+
+def apply_map(old: Dict, node: Dict) -> Dict:
+    removed = set(node.get("x", ()))
+    changed = node["d"]
+    merged = {key: value for key, value in old.items() if key not in removed}
+    for key, child in changed.items():
+        merged[key] = apply_value(merged.get(key), child)
+    if "o" in node:
+        order = node["o"]
+    elif node.get("s"):
+        order = sorted(merged, key=str)
+    else:
+        order = default_order(old, [key for key in old if key not in removed] + list(changed))
+    return {key: merged[key] for key in order}
+
+
+def decode_dict(data: bytes, name: str) -> Any:
+    """Decoded CBOR .dict; raises ValueError for a legacy JSON .dict or undecodable bytes."""
+    if data[:1] in (b"{", b"["):  # the app's and load_input()'s format check
+        raise ValueError(f"{name} is a legacy JSON .dict; convert it with convert_dict_to_cbor.py first")
+    cbor2 = import_cbor2()
+    try:
+        return cbor2.loads(data)
+    except cbor2.CBORDecodeError as e:
+        raise ValueError(f"{name} is not a CBOR .dict ({e})") from e
+
+
+def make_patch(old_bytes: bytes, new_bytes: bytes) -> bytes:
+    """LZMA-compressed patch; raises ValueError unless both inputs are CBOR .dict files."""
+    cbor2 = import_cbor2()
+    patch = {
+        "format": PATCH_FORMAT,
+        "version": PATCH_VERSION,
+        "from": sha256(old_bytes),
+        "to": sha256(new_bytes),
+        "patch": diff_value(decode_dict(old_bytes, "old .dict"), decode_dict(new_bytes, "new .dict")),
+    }
+    return lzma.compress(cbor2.dumps(patch), preset=9 | lzma.PRESET_EXTREME)
+
+
+def apply_patch(old_bytes: bytes, patch_bytes: bytes) -> bytes:
+    """New .dict bytes; raises ValueError if the input or the result does not match the patch."""
+    cbor2 = import_cbor2()
+    try:
+        patch = cbor2.loads(lzma.decompress(patch_bytes))
+    except (lzma.LZMAError, cbor2.CBORDecodeError):
+        patch = None
+    if not isinstance(patch, dict) or patch.get("format") != PATCH_FORMAT or patch.get("version") != PATCH_VERSION:
+        raise ValueError("not a TitanKeys dictionary patch (or an unsupported version)")
+    if sha256(old_bytes) != patch["from"]:
+        raise ValueError("input .dict is not the version this patch was made from")
+    node = patch["patch"]
+    new_bytes = old_bytes if node is None else cbor2.dumps(apply_value(cbor2.loads(old_bytes), node))
+    if sha256(new_bytes) != patch["to"]:
+        raise ValueError("patched .dict does not match the target checksum")
+    return new_bytes
+
+
+def patch_file(old_path: Path, new_path: Path, output: Path) -> Dict:
+    """Write the patch for one .dict and return its report row."""
+    old_bytes = old_path.read_bytes()
+    new_bytes = new_path.read_bytes()
+    start = time.perf_counter()
+    try:
+        patch = make_patch(old_bytes, new_bytes)
+    except ValueError as e:
+        raise ValueError(f"{old_path} -> {new_path}: {e}") from e
+    elapsed = time.perf_counter() - start
+    if apply_patch(old_bytes, patch) != new_bytes:
+        raise ValueError(f"{output}: patch does not reproduce {new_path}")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(patch)
+    compressed = len(lzma.compress(new_bytes, preset=9 | lzma.PRESET_EXTREME))
+    return {
+        "language": language_from_path(str(new_path)) or new_path.stem,
+        "oldBytes": len(old_bytes),
+        "newBytes": len(new_bytes),
+        "compressedBytes": compressed,
+        "patchBytes": len(patch),
+        "patchRatio": round(len(patch) / compressed, 4) if compressed else 0,
+        "seconds": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Make or apply binary delta patches between .dict versions")
+    parser.add_argument("--old", default=None, help="Previous .dict (or directory of .dict files)")
+    parser.add_argument("--new", default=None, help="Refreshed .dict (or directory of .dict files)")
+    parser.add_argument("--output", default=None,
+                        help="Patch file (or directory; default: NEW with .patch), or the .dict written by --apply")
+    parser.add_argument("--apply", default=None, metavar="PATCH", help="Apply a patch to --input instead of diffing")
+    parser.add_argument("--input", default=None, help=".dict the patch was made from (with --apply)")
+    parser.add_argument("--report", default=None, help="Write the per-language size report (JSON)")
+    args = parser.parse_args()
+    cbor2 = import_cbor2()
+
+    if args.apply:
+        if not args.input or not args.output:
+            parser.error("--apply needs --input and --output")
+        try:
+            data = apply_patch(Path(args.input).read_bytes(), Path(args.apply).read_bytes())
+        except (ValueError, cbor2.CBORDecodeError) as e:
+            print(f"ERROR: {e}")
+            return 1
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "wb") as f:
+            f.write(data)
+        print(f"[OK] {args.output} ({len(data)} bytes, checksum verified)")
+        return 0
+    if not args.old or not args.new:
+        parser.error("--old and --new are required unless --apply is given")
+
+    old, new = Path(args.old), Path(args.new)
+    if old.is_dir() != new.is_dir():
+        parser.error("--old and --new must both be files or both be directories")
+    if new.is_dir():
+        output_dir = Path(args.output) if args.output else new
+        pairs = [(old / path.name, path, output_dir / f"{path.stem}.patch")
+                 for path in sorted(new.glob("*.dict")) if (old / path.name).is_file()]
+    else:
+        pairs = [(old, new, Path(args.output) if args.output else new.with_suffix(".patch"))]
+
+    print("=" * 50)
+    print(f"Dictionary patches: {args.old} -> {args.new}")
+    print("=" * 50)
+
+    rows = []
+    for old_path, new_path, output in pairs:
+        try:
+            row = patch_file(old_path, new_path, output)
+        except (ValueError, cbor2.CBORDecodeError) as e:
+            print(f"[WARN] {e}")
+            continue
+        rows.append(row)
+        print(f"  [OK] {row['language']}: {row['newBytes'] / 1024:.0f} KB .dict, "
+              f"{row['compressedBytes'] / 1024:.0f} KB compressed, patch {row['patchBytes'] / 1024:.1f} KB "
+              f"({row['patchRatio']:.1%} of the download) -> {output}")
+    if not rows:
+        print("[WARN] No patches written")
+        return 1
+
+    total_compressed = sum(row["compressedBytes"] for row in rows)
+    total_patch = sum(row["patchBytes"] for row in rows)
+    print(f"\nTotal: {total_patch / 1024:.1f} KB of patches vs {total_compressed / 1024:.0f} KB of full downloads")
+
+    if args.report:
+        report = {
+            "old": args.old,
+            "new": args.new,
+            "languages": rows,
+            "total": {"compressedBytes": total_compressed, "patchBytes": total_patch,
+                      "patchRatio": round(total_patch / total_compressed, 4) if total_compressed else 0},
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.report}")
+    return 0 if len(rows) == len(pairs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Build a compact known-word index (.words) for a dictionary: a Bloom filter
+and a minimal perfect hash with packed frequencies.
+
+The file answers the two per-keystroke questions of DictionaryRepository
+without the normalizedIndex HashMap:
+
+    isKnownWord        Bloom filter, tuned for --fp_rate; a miss is a definite
+                       "no" after a few bit probes
+    frequency lookup   minimal perfect hash (CHD, hash-and-displace) over the
+                       normalized terms; each slot holds a 16-bit fingerprint,
+                       which rejects most non-words that pass the filter, and
+                       the term's best raw frequency, unclamped, as
+                       getExactWordFrequency returns it
+
+Queries hash the normalized word once (FNV-1a 64 over UTF-8, then
+splitmix64) and read fixed-size arrays, so they allocate nothing and work on
+a memory-mapped file. Layout (little-endian, sections 8-byte aligned):
+
+    header        magic "TKWI", version, keys, bloomBits, bloomHashes,
+                  buckets (8 x uint32)
+    bloom         ceil(bloomBits / 64) x uint64
+    displacement  buckets x uint32   (d0 * keys + d1)
+    fingerprints  keys x uint16
+    frequencies   keys x uint32
+
+For a key with hash h = fnv1a64(word), z = splitmix64(h):
+    bloom bit i   (z_lo + i * z_hi) mod bloomBits, i < bloomHashes
+    bucket        h mod buckets
+    slot          (z_lo + d0 * (z_hi | 1) + d1) mod keys
+    fingerprint   h >> 48
+
+The report gives the section sizes, bits per key, and the false-positive
+rates of the filter and of filter + fingerprint, measured on generated
+non-words, next to the size of the normalizedIndex they replace.
+
+Usage:
+    python build_known_words.py --input it_base.dict --output it_base.words --report it_words.json
+    python build_known_words.py --input en_base.json --output en_base.words --fp_rate 0.005
+    python build_known_words.py --query it_base.words ciao cioa
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from build_symspell_dict import import_cbor2, load_input, normalize
+
+MAGIC = b"TKWI"
+VERSION = 2  # 1 stored frequencies clamped to uint8
+HEADER = struct.Struct("<4sIIIIIII")
+MASK64 = (1 << 64) - 1
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+BUCKET_LOAD = 4.0  # average keys per CHD bucket
+
+
+def fnv1a64(word: str) -> int:
+    h = FNV_OFFSET
+    for byte in word.encode("utf-8"):
+        h = ((h ^ byte) * FNV_PRIME) & MASK64
+    return h
+
+
+def splitmix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def key_hashes(word: str):
+    """(h, z_lo, z_hi) for a normalized word."""
+    h = fnv1a64(word)
+    z = splitmix64(h)
+    return h, z & 0xFFFFFFFF, z >> 32
+
+
+def bloom_parameters(keys: int, fp_rate: float):
+    """Optimal (bits, hashes) for `keys` entries at `fp_rate`."""
+    bits = max(64, math.ceil(-keys * math.log(fp_rate) / (math.log(2) ** 2)))
+    hashes = max(1, round(bits / max(keys, 1) * math.log(2)))
+    return bits, hashes
+
+
+def build_chd(hashes: List[tuple]) -> List[int]:
+    """Displacement per bucket so every key gets its own slot in [0, keys)."""
+    keys = len(hashes)
+    buckets = max(1, math.ceil(keys / BUCKET_LOAD))
+    members: Dict[int, List[tuple]] = defaultdict(list)
+    for h, lo, hi in hashes:
+        members[h % buckets].append((lo, hi | 1))
+
+    taken = bytearray(keys)
+    displacement = [0] * buckets
+    free = list(range(keys - 1, -1, -1))
+    # Largest buckets first, while most slots are still free
+    for bucket in sorted(members, key=lambda b: (-len(members[b]), b)):
+        entries = members[bucket]
+        if len(entries) == 1:
+            while taken[free[-1]]:
+                free.pop()
+            lo, _ = entries[0]
+            slot = free.pop()
+            taken[slot] = 1
+            displacement[bucket] = (slot - lo) % keys
+            continue
+        d0 = 0
+        while True:
+            bases = [(lo + d0 * hi) % keys for lo, hi in entries]
+            for d1 in range(keys):
+                slots = {(base + d1) % keys for base in bases}
+                if len(slots) == len(entries) and not any(taken[s] for s in slots):
+                    break
+            else:
+                d0 += 1
+                continue
+            for s in slots:
+                taken[s] = 1
+            displacement[bucket] = d0 * keys + d1
+            break
+    return displacement
+
+
+def pad8(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+def build_known_words(frequencies: Dict[str, int], fp_rate: float = 0.01) -> bytes:
+    """Serialize the Bloom filter and minimal perfect hash for term -> raw frequency."""
+    terms = sorted(frequencies)
+    keys = len(terms)
+    hashes = [key_hashes(term) for term in terms]
+    bloom_bits, bloom_hashes = bloom_parameters(keys, fp_rate)
+
+    bloom = bytearray(math.ceil(bloom_bits / 64) * 8)
+    for _, lo, hi in hashes:
+        for i in range(bloom_hashes):
+            bit = (lo + i * hi) % bloom_bits
+            bloom[bit >> 3] |= 1 << (bit & 7)
+
+    displacement = build_chd(hashes) if keys else []
+    buckets = len(displacement)
+    fingerprints = [0] * keys
+    packed = [0] * keys
+    for term, (h, lo, hi) in zip(terms, hashes):
+        d = displacement[h % buckets]
+        slot = (lo + (d // keys) * (hi | 1) + d % keys) % keys
+        fingerprints[slot] = h >> 48
+        packed[slot] = frequencies[term]
+
+    header = HEADER.pack(MAGIC, VERSION, keys, bloom_bits, bloom_hashes, buckets, 0, 0)
+    return b"".join([
+        header,
+        bytes(bloom),
+        pad8(struct.pack(f"<{buckets}I", *displacement)),
+        pad8(struct.pack(f"<{keys}H", *fingerprints)),
+        pad8(struct.pack(f"<{keys}I", *packed)),
+    ])
+
+
+class KnownWords:
+    """Read-only view of a .words file (memory-mapped when given a path)."""
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            self._buffer = memoryview(bytes(source))
+        else:
+            with open(source, "rb") as f:
+                self._buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, version, self.keys, self.bloom_bits, self.bloom_hashes, self.buckets, _, _ = \
+            HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a known-word index (magic={magic!r}, version={version})")
+
+        offset = HEADER.size
+        self._bloom = self._buffer[offset:offset + math.ceil(self.bloom_bits / 64) * 8]
+        offset += len(self._bloom)
+        self._displacement = self._buffer[offset:offset + self.buckets * 4].cast("I")
+        offset += self.buckets * 4 + (-self.buckets * 4 % 8)
+        self._fingerprints = self._buffer[offset:offset + self.keys * 2].cast("H")
+        offset += self.keys * 2 + (-self.keys * 2 % 8)
+        self._frequencies = self._buffer[offset:offset + self.keys * 4].cast("I")
+
+    def might_contain_normalized(self, term: str) -> bool:
+        _, lo, hi = key_hashes(term)
+        return self._bloom_hit(lo, hi)
+
+    def _bloom_hit(self, lo: int, hi: int) -> bool:
+        bloom = self._bloom
+        for i in range(self.bloom_hashes):
+            bit = (lo + i * hi) % self.bloom_bits
+            if not bloom[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def frequency_normalized(self, term: str) -> Optional[int]:
+        """Raw frequency of a normalized term, or None when it is not a known word."""
+        if not self.keys:
+            return None
+        h, lo, hi = key_hashes(term)
+        if not self._bloom_hit(lo, hi):
+            return None
+        d = self._displacement[h % self.buckets]
+        slot = (lo + (d // self.keys) * (hi | 1) + d % self.keys) % self.keys
+        if self._fingerprints[slot] != h >> 48:
+            return None
+        return self._frequencies[slot]
+
+    def is_known_word(self, word: str) -> bool:
+        return self.frequency_normalized(normalize(word)) is not None
+
+    def frequency(self, word: str) -> Optional[int]:
+        return self.frequency_normalized(normalize(word))
+
+
+def term_frequencies(index: Dict) -> Dict[str, int]:
+    """Normalized term -> best raw frequency of its entries."""
+    return {norm: max((int(e.get("frequency", 0)) for e in entries), default=0)
+            for norm, entries in index["normalizedIndex"].items() if norm}
+
+
+def non_words(terms: Dict[str, int], samples: int, seed: int = 0) -> List[str]:
+    """Single-edit variants of dictionary terms that are not terms themselves."""
+    rng = random.Random(seed)
+    words = sorted(terms)
+    letters = sorted(set("".join(words)))
+    result = set()
+    attempts = 0
+    while len(result) < samples and attempts < samples * 20:
+        attempts += 1
+        word = rng.choice(words)
+        i = rng.randrange(len(word) + 1)
+        candidate = word[:i] + rng.choice(letters) + word[i:]
+        if candidate not in terms:
+            result.add(candidate)
+    return sorted(result)
+
+
+def size_report(index: Dict, data: bytes, reader: KnownWords, terms: Dict[str, int], samples: int) -> Dict:
+    cbor2 = import_cbor2()
+    negatives = non_words(terms, samples)
+    bloom_passes = sum(reader.might_contain_normalized(word) for word in negatives)
+    false_positives = sum(reader.frequency_normalized(word) is not None for word in negatives)
+
+    start = time.perf_counter()
+    for word in negatives:
+        reader.frequency_normalized(word)
+    lookup_us = (time.perf_counter() - start) / max(len(negatives), 1) * 1e6
+
+    bloom_bytes = math.ceil(reader.bloom_bits / 64) * 8
+    return {
+        "keys": reader.keys,
+        "bytes": {
+            "total": len(data),
+            "bloom": bloom_bytes,
+            "displacement": reader.buckets * 4,
+            "fingerprints": reader.keys * 2,
+            "frequencies": reader.keys * 4,
+            "normalizedIndexCbor": len(cbor2.dumps(index["normalizedIndex"])),
+        },
+        "bitsPerKey": round(len(data) * 8 / max(reader.keys, 1), 2),
+        "bloom": {"bits": reader.bloom_bits, "hashes": reader.bloom_hashes},
+        "nonWordsTested": len(negatives),
+        "falsePositiveRate": {
+            "bloom": round(bloom_passes / max(len(negatives), 1), 5),
+            "bloomAndFingerprint": round(false_positives / max(len(negatives), 1), 6),
+        },
+        "pythonLookupUs": round(lookup_us, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Bloom filter + minimal perfect hash known-word index")
+    parser.add_argument("--input", help="Path to a .dict or base JSON dictionary")
+    parser.add_argument("--output", help="Path to write the .words file")
+    parser.add_argument("--fp_rate", type=float, default=0.01, help="Bloom filter false-positive rate (default: 0.01)")
+    parser.add_argument("--samples", type=int, default=20000,
+                        help="Non-words used to measure false positives (default: 20000)")
+    parser.add_argument("--report", default=None, help="Write the size/false-positive report (JSON)")
+    parser.add_argument("--query", default=None, metavar="WORDS_FILE",
+                        help="Look up the given words in an existing .words file instead of building")
+    parser.add_argument("words", nargs="*", help="Words to look up with --query")
+    args = parser.parse_args()
+
+    if args.query:
+        reader = KnownWords(args.query)
+        for word in args.words:
+            print(f"  {word}: {reader.frequency(word) if reader.is_known_word(word) else '-'}")
+        return 0
+    if not args.input or not args.output:
+        parser.error("--input and --output are required unless --query is given")
+
+    print("=" * 50)
+    print(f"Known-word index: {args.input}")
+    print("=" * 50)
+
+    print("\n[1/3] Loading dictionary...")
+    index = load_input(args.input)
+    terms = term_frequencies(index)
+    print(f"  {len(terms)} normalized terms")
+
+    print("\n[2/3] Building Bloom filter and perfect hash...")
+    start = time.perf_counter()
+    data = build_known_words(terms, args.fp_rate)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print(f"  [OK] {args.output}: {len(data) / 1024:.0f} KB in {time.perf_counter() - start:.1f} s")
+
+    print("\n[3/3] Verifying...")
+    reader = KnownWords(args.output)
+    wrong = [term for term, frequency in terms.items()
+             if reader.frequency_normalized(term) != frequency]
+    if wrong:
+        print(f"  [WARN] {len(wrong)} terms read back wrong (e.g. {wrong[:5]})")
+    else:
+        print(f"  [OK] All {len(terms)} terms read back with their frequency")
+    report = size_report(index, data, reader, terms, args.samples)
+    rates = report["falsePositiveRate"]
+    print(f"  {report['bitsPerKey']} bits/key; false positives: Bloom {rates['bloom']:.2%}, "
+          f"with fingerprint {rates['bloomAndFingerprint']:.4%} ({report['nonWordsTested']} non-words)")
+
+    if args.report:
+        report["dictionary"] = args.input
+        report["fpRateTarget"] = args.fp_rate
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"  Report written to {args.report}")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Merge several base JSON dictionaries into one multilingual index.
+
+A bilingual typist currently loads two DictionaryIndex instances and two
+SymSpell indexes, although names, loanwords and many short words appear in
+both. The merged .dict stores every normalized key and delete bucket
+once; each entry records which languages it belongs to:
+
+    languages        ["it", "en", ...]; bit i of a mask is languages[i]
+    normalizedIndex  norm -> entries {word, frequency, source, languages,
+                     frequencies}: languages is the bitmask, frequencies the
+                     raw frequency per language (0 where absent; only on
+                     entries whose languages disagree), frequency their
+                     maximum
+    prefixCache      empty: DictionaryRepository.decodeSerializedDictionary
+                     derives it from normalizedIndex when the file has none,
+                     sharing the entries instead of decoding four more
+                     copies of each
+    symDeletes       built once over the union of the normalized terms
+    symMeta          as written by build_symspell_dict.py (with keyStrategy)
+
+These fields are optional in DictionaryIndex and SerializableDictionaryEntry.
+The app loads every language of the file and ranks an entry by its
+frequency in the keyboard's language when it has one, by frequency
+otherwise; a merged file is installed under any of its languages'
+<language>_base.dict names.
+
+A word spelled the same in two languages becomes one entry; its n-th
+occurrence in one list merges with its n-th occurrence in the other.
+Delete buckets are never capped: a cap would keep the terms most frequent
+in any language, not in each.
+
+language_view() turns the merged index back into one language's
+DictionaryIndex. --verify checks that every view is identical to a
+separate build of that language with the same parameters. The report
+measures CBOR bytes, load time and loaded memory (tracemalloc) with the
+key, entry and bucket counts behind them, for three setups:
+
+    shipped   separate .dict files as build_symspell_dict.py writes them
+              (full prefixCache)
+    separate  the same files without prefixCache, derived at load time
+    merged    this index, prefixCache derived at load time
+
+and keeps the two savings apart: shipped -> separate is what deriving the
+prefix cache saves (it works for single-language files just as well),
+separate -> merged is what merging itself saves. The latter depends on
+how many entries and delete buckets the languages share.
+
+Usage:
+    python build_merged_dict.py --inputs it_base.json en_base.json --output it_en_merged.dict
+    python build_merged_dict.py --inputs it_base.json en_base.json --output it_en_merged.dict --verify --report it_en.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List
+
+from build_symspell_dict import (
+    KEY_STRATEGIES, bucket_value_frequencies, build_index, build_sym_deletes, canonical_index, import_cbor2,
+    language_from_path, load_build_config, order_buckets, term_frequencies
+)
+
+MAX_LANGUAGES = 31  # masks are non-negative 32-bit Ints on the device
+PREFIX_CACHE_LENGTH = 4  # build_index() default, the app's cachePrefixLength
+
+
+def merge_indexes(indexes: List[Dict]) -> Dict[str, List[Dict]]:
+    """Merged normalizedIndex for per-language build_index() results."""
+    count = len(indexes)
+    normalized_index: Dict[str, List[Dict]] = {}
+    merged: Dict[tuple, Dict] = {}
+    for i, index in enumerate(indexes):
+        for norm, entries in index["normalizedIndex"].items():
+            seen: Dict[tuple, int] = defaultdict(int)
+            for entry in entries:
+                source = entry.get("source", 0)
+                occurrence = seen[(entry["word"], source)]
+                seen[(entry["word"], source)] += 1
+                key = (norm, entry["word"], source, occurrence)
+                target = merged.get(key)
+                if target is None:
+                    target = {"word": entry["word"], "frequency": 0, "source": source,
+                              "languages": 0, "frequencies": [0] * count}
+                    merged[key] = target
+                    normalized_index.setdefault(norm, []).append(target)
+                target["languages"] |= 1 << i
+                target["frequencies"][i] = int(entry.get("frequency", 0))
+                target["frequency"] = max(target["frequencies"])
+    for entry in merged.values():
+        if len({entry["frequencies"][i] for i in range(count) if entry["languages"] >> i & 1}) == 1:
+            del entry["frequencies"]
+    return normalized_index
+
+
+def derive_prefix_cache(normalized_index: Dict[str, List[Dict]],
+                        prefix_cache_length: int = PREFIX_CACHE_LENGTH) -> Dict[str, List[Dict]]:
+    """prefixCache as build_index() builds it, holding the normalizedIndex entries themselves."""
+    prefix_cache: Dict[str, List[Dict]] = {}
+    for norm, entries in normalized_index.items():
+        for length in range(1, min(len(norm), prefix_cache_length) + 1):
+            prefix_cache.setdefault(norm[:length], []).extend(entries)
+    return prefix_cache
+
+
+def build_merged(language_entries: Dict[str, List[Dict]], max_edit_distance: int, prefix_length: int,
+                 key_strategy: str) -> Dict:
+    languages = list(language_entries)
+    normalized_index = merge_indexes([build_index(entries) for entries in language_entries.values()])
+    return canonical_index({
+        "languages": languages,
+        "normalizedIndex": normalized_index,
+        "prefixCache": {},
+        "symDeletes": build_sym_deletes(normalized_index, max_edit_distance, prefix_length, key_strategy),
+        "symMeta": {"maxEditDistance": max_edit_distance, "prefixLength": prefix_length, "bucketOrder": "frequency",
+                    "keyStrategy": key_strategy},
+    })
+
+
+def language_view(merged: Dict, language: str) -> Dict:
+    """One language's DictionaryIndex, as build_symspell_dict.py would write it uncapped."""
+    i = merged["languages"].index(language)
+    bit = 1 << i
+    key_strategy = merged["symMeta"]["keyStrategy"]
+
+    def select(buckets: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        view = {}
+        for key, entries in buckets.items():
+            kept = [{"word": e["word"], "frequency": e["frequencies"][i] if "frequencies" in e else e["frequency"],
+                     "source": e.get("source", 0)}
+                    for e in entries if e["languages"] & bit]
+            if kept:
+                view[key] = kept
+        return view
+
+    normalized_index = select(merged["normalizedIndex"])
+    meta = merged["symMeta"]
+    values = set(normalized_index)
+    if key_strategy == "prefix":
+        values = {norm[:meta["prefixLength"]] for norm in normalized_index}
+    deletes = {}
+    for delete, bucket in merged["symDeletes"].items():
+        kept = [value for value in bucket if value in values]
+        if kept:
+            deletes[delete] = kept
+    value_frequencies = bucket_value_frequencies(term_frequencies(normalized_index), meta["prefixLength"],
+                                                 key_strategy)
+    return canonical_index({
+        "normalizedIndex": normalized_index,
+        "prefixCache": derive_prefix_cache(normalized_index),
+        "symDeletes": order_buckets(deletes, value_frequencies, meta["bucketOrder"]),
+        "symMeta": dict(meta),
+    })
+
+
+def load_index(data: bytes) -> Dict:
+    """Decode a .dict, deriving prefixCache when the file does not ship one."""
+    index = import_cbor2().loads(data)
+    if not index["prefixCache"]:
+        index["prefixCache"] = derive_prefix_cache(index["normalizedIndex"])
+    return index
+
+
+def load_cost(data: bytes) -> Dict:
+    """CBOR size, load time (best of 3) and loaded memory of a .dict."""
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        load_index(data)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    decoded = load_index(data)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "cborBytes": len(data),
+        "loadSeconds": round(min(timings), 3),
+        "loadedBytes": memory,
+        "normalizedKeys": len(decoded["normalizedIndex"]),
+        "entries": sum(len(v) for v in decoded["normalizedIndex"].values()),
+        "prefixEntries": sum(len(v) for v in decoded["prefixCache"].values()),
+        "deleteBuckets": len(decoded["symDeletes"]),
+        "bucketValues": sum(len(v) for v in decoded["symDeletes"].values()),
+    }
+
+
+def savings(before: Dict, after: Dict) -> Dict:
+    return {field: round(1 - after[field] / before[field], 4) if before[field] else 0 for field in before}
+
+
+def total_cost(costs: List[Dict]) -> Dict:
+    return {field: sum(cost[field] for cost in costs) for field in costs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge several base JSON dictionaries into one multilingual .dict")
+    parser.add_argument("--inputs", nargs="+", required=True, help="Base JSON files (it_base.json en_base.json ...)")
+    parser.add_argument("--output", required=True, help="Path to write the merged .dict (CBOR)")
+    parser.add_argument("--languages", nargs="+", default=None,
+                        help="Language codes for the inputs (default: from the input names)")
+    parser.add_argument("--max_edit_distance", type=int, default=None,
+                        help="Default: the first language's symspell_config.json entry")
+    parser.add_argument("--prefix_length", type=int, default=None,
+                        help="Default: the first language's symspell_config.json entry")
+    parser.add_argument("--key_strategy", choices=KEY_STRATEGIES, default=None,
+                        help="Delete bucket contents (default: the first language's symspell_config.json entry)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check every language view against a separate build")
+    parser.add_argument("--report", default=None, help="Write the memory/load-time comparison (JSON)")
+    args = parser.parse_args()
+    cbor2 = import_cbor2()
+
+    languages = args.languages or [language_from_path(path) for path in args.inputs]
+    if len(languages) != len(args.inputs) or None in languages:
+        parser.error("give --languages for inputs not named <language>_base.json")
+    if len(set(languages)) != len(languages) or len(languages) > MAX_LANGUAGES:
+        parser.error(f"languages must be distinct and at most {MAX_LANGUAGES}")
+    config = load_build_config(languages[0])
+    max_edit_distance = args.max_edit_distance if args.max_edit_distance is not None else config["maxEditDistance"]
+    prefix_length = args.prefix_length if args.prefix_length is not None else config["prefixLength"]
+    key_strategy = args.key_strategy or config["keyStrategy"]
+
+    print("=" * 50)
+    print(f"Merged dictionary: {' + '.join(languages)}")
+    print("=" * 50)
+
+    print("\n[1/3] Building merged index...")
+    language_entries = {}
+    for language, path in zip(languages, args.inputs):
+        with open(path, "r", encoding="utf-8") as f:
+            language_entries[language] = json.load(f)
+    start = time.perf_counter()
+    merged = build_merged(language_entries, max_edit_distance, prefix_length, key_strategy)
+    data = cbor2.dumps(merged)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    masks = defaultdict(int)
+    for entries in merged["normalizedIndex"].values():
+        for entry in entries:
+            masks[entry["languages"]] += 1
+    shared = sum(count for mask, count in masks.items() if mask & (mask - 1))
+    print(f"  [OK] {args.output}: {len(data) / (1024 * 1024):.2f} MB, {len(merged['normalizedIndex'])} keys, "
+          f"{shared} entries in several languages ({time.perf_counter() - start:.1f} s)")
+
+    print("\n[2/3] Building separate indexes...")
+    shipped = {}
+    separate = {}
+    for language, entries in language_entries.items():
+        index = build_index(entries)
+        index = canonical_index({
+            "normalizedIndex": index["normalizedIndex"],
+            "prefixCache": index["prefixCache"],
+            "symDeletes": build_sym_deletes(index["normalizedIndex"], max_edit_distance, prefix_length,
+                                            key_strategy),
+            "symMeta": dict(merged["symMeta"]),
+        })
+        shipped[language] = cbor2.dumps(index)
+        separate[language] = cbor2.dumps({**index, "prefixCache": {}})
+        print(f"  {language}: {len(shipped[language]) / (1024 * 1024):.2f} MB, "
+              f"{len(separate[language]) / (1024 * 1024):.2f} MB without prefixCache")
+
+    failures = 0
+    if args.verify:
+        for language, expected in shipped.items():
+            if cbor2.dumps(language_view(merged, language)) != expected:
+                print(f"  [WARN] {language} view differs from the separate build")
+                failures += 1
+            else:
+                print(f"  [OK] {language} view identical to the separate build")
+
+    print("\n[3/3] Measuring load cost...")
+    shipped_costs = {language: load_cost(blob) for language, blob in shipped.items()}
+    separate_costs = {language: load_cost(blob) for language, blob in separate.items()}
+    shipped_total = total_cost(list(shipped_costs.values()))
+    separate_total = total_cost(list(separate_costs.values()))
+    merged_cost = load_cost(data)
+    saved = {
+        "prefixCache": savings(shipped_total, separate_total),
+        "merge": savings(separate_total, merged_cost),
+        "total": savings(shipped_total, merged_cost),
+    }
+    print(f"  {'':<8} {'shipped':>9} {'separate':>9} {'merged':>9}   {'prefix':>6} {'merge':>6}")
+    for label, field, unit, scale in (("CBOR", "cborBytes", "MB", 1024 * 1024),
+                                      ("Loaded", "loadedBytes", "MB", 1024 * 1024),
+                                      ("Load", "loadSeconds", "s", 1)):
+        values = [cost[field] / scale for cost in (shipped_total, separate_total, merged_cost)]
+        print(f"  {label:<8} " + " ".join(f"{value:>7.2f}{unit:<2}" for value in values) +
+              f"   {saved['prefixCache'][field]:>6.0%} {saved['merge'][field]:>6.0%}")
+    print("  (prefix: shipped -> separate, deriving the prefix cache; merge: separate -> merged)")
+
+    if args.report:
+        report = {
+            "languages": languages,
+            "inputs": args.inputs,
+            "symMeta": merged["symMeta"],
+            "keyStrategy": key_strategy,
+            "entriesByMask": {"+".join(lang for i, lang in enumerate(languages) if mask >> i & 1): count
+                              for mask, count in sorted(masks.items())},
+            "shipped": shipped_costs,
+            "shippedTotal": shipped_total,
+            "separate": separate_costs,
+            "separateTotal": separate_total,
+            "merged": merged_cost,
+            "savings": saved,
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"  Report written to {args.report}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Split a dictionary into lazily loadable shards with a manifest.
+
+Writes PREFIX.shards (the shards back to back) and PREFIX.manifest.json.
+Every shard is a CBOR DictionaryIndex of its own (normalizedIndex,
+prefixCache and, if the input has symMeta, symDeletes of its terms), so the
+app decodes a shard exactly like a whole .dict and merges it into the
+indices already loaded.
+
+Strategies:
+
+    tier     a hot shard with the --hot_words most frequent terms, then cold
+             shards of --tier_words terms in descending frequency. The hot
+             shard alone gives the first suggestions: its prefix buckets
+             are the head of the full, frequency-sorted buckets.
+    initial  --shards shards of contiguous leading characters, balanced by
+             term count. A word or prefix routes to exactly one shard;
+             terms with an empty normalized key (e.g. "½") have the
+             initial "" and live in the first shard.
+
+The manifest lists, per shard, its byte offset and length in the .shards
+file, a SHA-256, the number of terms and its key range (leading characters
+for initial, [lowest, highest] raw frequency for tier), along with symMeta
+and the strategy. Delete buckets are regenerated per shard and never
+capped; loading every shard gives back the uncapped buckets.
+
+ShardedDictionary is the reader. It loads shards on demand, routes lookups
+by the manifest and can merge all shards. --verify checks that every term
+routes to the shard that holds it and that the merged shards equal the
+source dictionary.
+
+Usage:
+    python build_sharded_dict.py --input it_base.dict --output it_base --strategy tier --hot_words 5000
+    python build_sharded_dict.py --input en_base.json --output en_base --strategy initial --shards 8
+    python build_sharded_dict.py --verify it_base.manifest.json --input it_base.dict
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from build_symspell_dict import build_sym_deletes, import_cbor2, language_from_path, load_input
+
+MANIFEST_VERSION = 1
+STRATEGIES = ("tier", "initial")
+
+
+def best_frequencies(index: Dict) -> Dict[str, int]:
+    return {norm: max((int(e.get("frequency", 0)) for e in entries), default=0)
+            for norm, entries in index["normalizedIndex"].items()}
+
+
+def tier_groups(frequencies: Dict[str, int], hot_words: int, tier_words: int) -> List[List[str]]:
+    ranked = sorted(frequencies, key=lambda norm: (-frequencies[norm], norm))
+    groups = [ranked[:hot_words]]
+    for start in range(hot_words, len(ranked), tier_words):
+        groups.append(ranked[start:start + tier_words])
+    return [group for group in groups if group]
+
+
+def initial_groups(terms: List[str], shards: int) -> List[List[str]]:
+    """
+    Contiguous runs of leading characters with about len(terms) / shards terms each.
+    A term whose normalized key is empty (e.g. "½") has the initial "", which
+    sorts first, so it goes to the first shard.
+    """
+    by_initial = Counter(term[:1] for term in terms)
+    target = len(terms) / max(shards, 1)
+    runs: List[List[str]] = [[]]
+    filled = 0
+    for initial in sorted(by_initial):
+        if runs[-1] and filled >= target * len(runs) and len(runs) < shards:
+            runs.append([])
+        runs[-1].append(initial)
+        filled += by_initial[initial]
+    members = {initial: i for i, run in enumerate(runs) for initial in run}
+    groups: List[List[str]] = [[] for _ in runs]
+    for term in sorted(terms):
+        groups[members[term[:1]]].append(term)
+    return groups
+
+
+def shard_index(index: Dict, terms: List[str], owner: Dict[tuple, str]) -> Dict:
+    """DictionaryIndex restricted to `terms` (prefix buckets keep their order)."""
+    members = set(terms)
+    prefix_cache = {}
+    for prefix, entries in index.get("prefixCache", {}).items():
+        kept = [e for e in entries if owner.get((e["word"], e.get("source", 0))) in members]
+        if kept:
+            prefix_cache[prefix] = kept
+    shard = {
+        "normalizedIndex": {norm: index["normalizedIndex"][norm] for norm in terms},
+        "prefixCache": prefix_cache,
+    }
+    meta = index.get("symMeta")
+    if meta:
+        shard["symDeletes"] = build_sym_deletes(shard["normalizedIndex"], meta["maxEditDistance"],
+                                                meta["prefixLength"], "term", meta.get("bucketOrder", "frequency"))
+        shard["symMeta"] = {"maxEditDistance": meta["maxEditDistance"], "prefixLength": meta["prefixLength"],
+                            "bucketOrder": meta.get("bucketOrder", "frequency"), "keyStrategy": "term"}
+    return shard
+
+
+def build_shards(index: Dict, strategy: str, hot_words: int = 5000, tier_words: int = 20000,
+                 shards: int = 8):
+    """[(shard DictionaryIndex, manifest key-range fields)] in load order."""
+    frequencies = best_frequencies(index)
+    owner = {(e["word"], e.get("source", 0)): norm
+             for norm, entries in index["normalizedIndex"].items() for e in entries}
+    if strategy == "tier":
+        groups = tier_groups(frequencies, hot_words, tier_words)
+    else:
+        groups = initial_groups(list(frequencies), shards)
+
+    result = []
+    for terms in groups:
+        if strategy == "tier":
+            key_range = {"frequencyRange": [min(frequencies[t] for t in terms), max(frequencies[t] for t in terms)]}
+        else:
+            key_range = {"keyRange": [terms[0][:1], terms[-1][:1]]}
+        result.append((shard_index(index, terms, owner), key_range))
+    return result
+
+
+def write_sharded(prefix: str, index: Dict, strategy: str, language: Optional[str] = None, **options) -> Dict:
+    """Write PREFIX.shards and PREFIX.manifest.json; returns the manifest."""
+    cbor2 = import_cbor2()
+    data_path = Path(f"{prefix}.shards")
+    os.makedirs(data_path.parent, exist_ok=True)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "language": language,
+        "strategy": strategy,
+        "dataFile": data_path.name,
+        "symMeta": index.get("symMeta"),
+        "shards": [],
+    }
+    offset = 0
+    with open(data_path, "wb") as f:
+        for i, (shard, key_range) in enumerate(build_shards(index, strategy, **options)):
+            blob = cbor2.dumps(shard)
+            f.write(blob)
+            manifest["shards"].append({
+                "id": i,
+                "offset": offset,
+                "length": len(blob),
+                "sha256": hashlib.sha256(blob).hexdigest(),
+                "terms": len(shard["normalizedIndex"]),
+                **key_range,
+            })
+            offset += len(blob)
+    with open(f"{prefix}.manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+class ShardedDictionary:
+    """Loads the shards of a manifest on demand and routes lookups to them."""
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = Path(manifest_path)
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version {self.manifest.get('version')}")
+        self.data_path = self.manifest_path.parent / self.manifest["dataFile"]
+        self.shards: Dict[int, Dict] = {}
+
+    @property
+    def strategy(self) -> str:
+        return self.manifest["strategy"]
+
+    def load_shard(self, shard_id: int, verify: bool = False) -> Dict:
+        if shard_id not in self.shards:
+            entry = self.manifest["shards"][shard_id]
+            with open(self.data_path, "rb") as f:
+                f.seek(entry["offset"])
+                blob = f.read(entry["length"])
+            if verify and hashlib.sha256(blob).hexdigest() != entry["sha256"]:
+                raise ValueError(f"Shard {shard_id} does not match its checksum")
+            self.shards[shard_id] = import_cbor2().loads(blob)
+        return self.shards[shard_id]
+
+    def route(self, normalized: str) -> List[int]:
+        """Shards to consult for a normalized word or prefix, in order."""
+        if self.strategy == "tier":
+            return [entry["id"] for entry in self.manifest["shards"]]
+        # The empty key has initial "", inside the first shard's range when it holds one
+        return [entry["id"] for entry in self.manifest["shards"]
+                if entry["keyRange"][0] <= normalized[:1] <= entry["keyRange"][1]]
+
+    def lookup(self, normalized: str) -> List[Dict]:
+        """normalizedIndex entries of a term, loading only the shards needed to find it."""
+        for shard_id in self.route(normalized):
+            entries = self.load_shard(shard_id)["normalizedIndex"].get(normalized)
+            if entries:
+                return entries
+        return []
+
+    def prefix(self, prefix: str, loaded_only: bool = False) -> List[Dict]:
+        """prefixCache bucket across the routed shards (hot shard first for tier)."""
+        bucket = []
+        for shard_id in self.route(prefix):
+            if loaded_only and shard_id not in self.shards:
+                continue
+            bucket.extend(self.load_shard(shard_id)["prefixCache"].get(prefix, []))
+        return bucket
+
+    def merged(self) -> Dict:
+        """All shards merged into one DictionaryIndex (prefix buckets concatenated in shard order)."""
+        merged = {"normalizedIndex": {}, "prefixCache": {}}
+        sym_deletes: Dict[str, List[str]] = {}
+        for entry in self.manifest["shards"]:
+            shard = self.load_shard(entry["id"], verify=True)
+            merged["normalizedIndex"].update(shard["normalizedIndex"])
+            for prefix, bucket in shard["prefixCache"].items():
+                merged["prefixCache"].setdefault(prefix, []).extend(bucket)
+            for delete, bucket in shard.get("symDeletes", {}).items():
+                sym_deletes.setdefault(delete, []).extend(bucket)
+        if self.manifest.get("symMeta"):
+            merged["symDeletes"] = sym_deletes
+            # Shards always hold term-valued buckets, whatever the source used
+            merged["symMeta"] = {**self.manifest["symMeta"], "keyStrategy": "term"}
+        return merged
+
+
+def verify(manifest_path: str, index: Dict) -> List[str]:
+    """Routing and round-trip problems of a sharded dictionary against its source."""
+    reader = ShardedDictionary(manifest_path)
+    problems = []
+
+    for norm in index["normalizedIndex"]:
+        routed = reader.route(norm)
+        holders = [i for i in routed if norm in reader.load_shard(i)["normalizedIndex"]]
+        if len(holders) != 1:
+            problems.append(f"term {norm!r} found in shards {holders} of routed {routed}")
+        if reader.strategy == "initial" and len(routed) != 1:
+            problems.append(f"term {norm!r} routes to {len(routed)} shards")
+
+    merged = reader.merged()
+    if merged["normalizedIndex"] != index["normalizedIndex"]:
+        problems.append("merged normalizedIndex differs from the source")
+
+    def entry_key(e):
+        return e["word"], e["frequency"], e.get("source", 0)
+
+    frequencies = best_frequencies(index)
+    owner = {(e["word"], e.get("source", 0)): norm
+             for norm, entries in index["normalizedIndex"].items() for e in entries}
+    hot_terms = set(reader.load_shard(0)["normalizedIndex"]) if reader.strategy == "tier" else set()
+
+    source_prefixes = index.get("prefixCache", {})
+    if set(merged["prefixCache"]) != set(source_prefixes):
+        problems.append("merged prefixCache has different prefixes")
+    for prefix, bucket in source_prefixes.items():
+        if sorted(map(entry_key, merged["prefixCache"].get(prefix, []))) != sorted(map(entry_key, bucket)):
+            problems.append(f"prefix bucket {prefix!r} differs")
+        if hot_terms:
+            # The hot shard must hold the bucket's most frequent terms
+            terms = {owner[(e["word"], e.get("source", 0))] for e in bucket}
+            hot = [frequencies[t] for t in terms if t in hot_terms]
+            cold = [frequencies[t] for t in terms if t not in hot_terms]
+            if hot and cold and min(hot) < max(cold):
+                problems.append(f"hot shard bucket {prefix!r} is not the head of the full bucket")
+
+    meta = index.get("symMeta")
+    if meta:
+        expected = build_sym_deletes(index["normalizedIndex"], meta["maxEditDistance"], meta["prefixLength"])
+        actual = merged["symDeletes"]
+        if set(expected) != set(actual) or any(set(expected[d]) != set(actual[d]) for d in expected):
+            problems.append("merged symDeletes differ from the uncapped full-term buckets")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a dictionary into lazily loadable shards with a manifest")
+    parser.add_argument("--input", required=True, help="Path to a .dict or base JSON dictionary")
+    parser.add_argument("--output", help="Output prefix: writes PREFIX.shards and PREFIX.manifest.json")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="tier",
+                        help="tier: hot core + cold tails by frequency; initial: by leading character")
+    parser.add_argument("--hot_words", type=int, default=5000, help="Terms in the hot shard (default: 5000)")
+    parser.add_argument("--tier_words", type=int, default=20000, help="Terms per cold shard (default: 20000)")
+    parser.add_argument("--shards", type=int, default=8, help="Shards for --strategy initial (default: 8)")
+    parser.add_argument("--verify", default=None, metavar="MANIFEST",
+                        help="Check routing and round trip of an existing manifest against --input")
+    args = parser.parse_args()
+
+    index = load_input(args.input)
+    if args.verify:
+        problems = verify(args.verify, index)
+        for problem in problems[:20]:
+            print(f"  [WARN] {problem}")
+        if problems:
+            print(f"{len(problems)} problem(s) found")
+            return 1
+        print(f"[OK] {len(index['normalizedIndex'])} terms route to their shard; merged shards match {args.input}")
+        return 0
+    if not args.output:
+        parser.error("--output is required unless --verify is given")
+
+    print("=" * 50)
+    print(f"Sharding {args.input} ({args.strategy})")
+    print("=" * 50)
+    start = time.perf_counter()
+    manifest = write_sharded(args.output, index, args.strategy, language_from_path(args.input),
+                             hot_words=args.hot_words, tier_words=args.tier_words, shards=args.shards)
+    for entry in manifest["shards"]:
+        key_range = entry.get("keyRange") or entry.get("frequencyRange")
+        print(f"  shard {entry['id']}: {entry['terms']} terms, {entry['length'] / 1024:.0f} KB, range {key_range}")
+    print(f"[OK] {args.output}.shards and {args.output}.manifest.json in {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
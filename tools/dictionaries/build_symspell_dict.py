@@ -6,6 +6,20 @@ Precompute SymSpell deletes and write an extended .dict file (CBOR format).
 Input: an existing serialized dictionary (CBOR or JSON) or a base JSON (w/f list).
 Output: CBOR with fields: normalizedIndex, prefixCache, symDeletes, symMeta.
 
+Delete buckets are keyed by the first prefix_length characters of each term.
+With --key_strategy term (default) a bucket lists the full terms; with
+prefix it lists the prefix keys, which the app expands to every term with
+that prefix when loading (same lookups, smaller file). Buckets are ordered
+by descending term frequency (a prefix key counts as its most frequent
+term), so the terms verified first are the likely ones; --max_bucket_size
+keeps only the first N entries of each bucket, which bounds the
+verifications per lookup. --report lists the terms that lose buckets to
+the cap and the bucket-size histograms before and after it. Map keys and
+entries are written in a canonical order, so the same word list always
+gives the same bytes. Parameters not given
+on the command line come from symspell_config.json for --language (derived
+from "{lang}_base.*" input names), written by tune_symspell.py.
+
 Usage examples:
     python scripts/build_symspell_dict.py --input app/src/main/assets/common/dictionaries_serialized/it_base.dict \
         --output app/src/main/assets/common/dictionaries_serialized/it_base.dict
@@ -23,12 +37,23 @@ import os
 import sys
 import unicodedata
 from collections import defaultdict
+from pathlib import Path
+
+CONFIG_FILE = Path(__file__).parent / "symspell_config.json"
+DEFAULT_CONFIG = {"maxEditDistance": 2, "prefixLength": 4, "keyStrategy": "term", "maxWords": 20000,
+                  "maxBucketSize": None}
+KEY_STRATEGIES = ("term", "prefix")
+BUCKET_ORDERS = ("frequency", "alpha")
+
 
-try:
-    import cbor2
-except ImportError:
-    print("ERROR: cbor2 not installed. Run: pip install cbor2")
-    sys.exit(1)
+def import_cbor2():
+    """Import cbor2 on first use, so --help and JSON-only paths work without it."""
+    try:
+        import cbor2
+    except ImportError:
+        print("ERROR: cbor2 not installed. Run: pip install cbor2")
+        sys.exit(1)
+    return cbor2
 
 
 def normalize(word: str, locale: str = "it") -> str:
@@ -58,6 +83,189 @@ def generate_deletes(term: str, max_distance: int):
     return deletes
 
 
+def load_build_config(language: str = None, config_file: Path = CONFIG_FILE, defaults: dict = None) -> dict:
+    """SymSpell build parameters for a language: defaults, overridden by symspell_config.json.
+
+    defaults replaces DEFAULT_CONFIG values for a script whose own defaults differ.
+    """
+    config = dict(DEFAULT_CONFIG)
+    config.update(defaults or {})
+    if config_file.exists():
+        with open(config_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        config.update({k: v for k, v in data.get("default", {}).items() if k in DEFAULT_CONFIG})
+        if language:
+            config.update({k: v for k, v in data.get("languages", {}).get(language, {}).items()
+                           if k in DEFAULT_CONFIG})
+    return config
+
+
+def language_from_path(path: str):
+    """'it' for .../it_base.json or it_base.dict, else None."""
+    stem = Path(path).stem
+    return stem[:-len("_base")] if stem.endswith("_base") else None
+
+
+def build_index(entries, prefix_cache_length: int = 4):
+    """normalizedIndex/prefixCache for a base JSON [{w, f}] list."""
+    normalized_index = {}
+    prefix_cache = {}
+    for entry in entries:
+        # IMPORTANT: Preserve original case (uppercase/lowercase) from JSON
+        # e.g., {"w": "Mario", "f": 100} -> word="Mario" (not "mario")
+        # normalize() only converts to lowercase for indexing purposes
+        w = entry["w"]
+        f = int(entry.get("f", 1))
+        norm = normalize(w)  # lowercase for indexing only
+        # Save original word with case preserved for dictionary entry
+        normalized_index.setdefault(norm, []).append({"word": w, "frequency": f, "source": 0})
+        # prefix cache up to 4 chars (matches cachePrefixLength default)
+        for l in range(1, min(len(norm), prefix_cache_length) + 1):
+            prefix_cache.setdefault(norm[:l], []).append({"word": w, "frequency": f, "source": 0})
+    return {"normalizedIndex": normalized_index, "prefixCache": prefix_cache}
+
+
+def entry_order(entry: dict):
+    return -int(entry.get("frequency", 0)), entry["word"], entry.get("source", 0)
+
+
+def canonical_index(index: dict) -> dict:
+    """
+    The same index with sorted map keys and entries sorted by descending
+    frequency, so equal word lists give byte-identical .dict files whatever
+    their order (update_symspell_dict.py relies on this).
+    """
+    out = dict(index)
+    for field in ("normalizedIndex", "prefixCache"):
+        if field in index:
+            out[field] = {key: sorted(entries, key=entry_order) for key, entries in sorted(index[field].items())}
+    if index.get("symDeletes") is not None:
+        out["symDeletes"] = {delete: index["symDeletes"][delete] for delete in sorted(index["symDeletes"])}
+    return out
+
+
+def term_frequencies(normalized_index: dict) -> dict:
+    """Normalized term -> highest raw frequency among its entries."""
+    return {norm: max((int(e.get("frequency", 0)) for e in entries), default=0)
+            for norm, entries in normalized_index.items()}
+
+
+def collect_sym_deletes(normalized_index: dict, max_edit_distance: int, prefix_length: int,
+                        key_strategy: str = "term") -> dict:
+    """delete -> set of full terms ("term") or of prefix keys ("prefix"), unordered and uncapped."""
+    if key_strategy not in KEY_STRATEGIES:
+        raise ValueError(f"Unknown key strategy: {key_strategy}")
+    deletes = defaultdict(set)
+    for norm in normalized_index:
+        key = norm[:prefix_length]
+        # "term" matches SymSpell.addWord; "prefix" keys are expanded by DictionaryRepository
+        value = norm if key_strategy == "term" else key
+        for d in generate_deletes(key, max_edit_distance):
+            deletes[d].add(value)
+    return deletes
+
+
+def bucket_value_frequencies(frequencies: dict, prefix_length: int, key_strategy: str) -> dict:
+    """Ranking frequency of each bucket value: the term's, or a prefix key's best term."""
+    if key_strategy == "term":
+        return frequencies
+    best = {}
+    for norm, frequency in frequencies.items():
+        key = norm[:prefix_length]
+        if frequency > best.get(key, -1):
+            best[key] = frequency
+    return best
+
+
+def order_buckets(deletes: dict, value_frequencies: dict, bucket_order: str = "frequency") -> dict:
+    """Sort bucket values by descending frequency (ties alphabetically) or alphabetically."""
+    if bucket_order not in BUCKET_ORDERS:
+        raise ValueError(f"Unknown bucket order: {bucket_order}")
+    if bucket_order == "alpha":
+        return {k: sorted(v) for k, v in deletes.items()}
+    return {k: sorted(v, key=lambda value: (-value_frequencies.get(value, 0), value))
+            for k, v in deletes.items()}
+
+
+def cap_buckets(buckets: dict, max_bucket_size: int = None):
+    """(capped buckets, delete -> values dropped from it); None or 0 keeps everything."""
+    if not max_bucket_size:
+        return buckets, {}
+    capped = {}
+    dropped = {}
+    for delete, values in buckets.items():
+        capped[delete] = values[:max_bucket_size]
+        if len(values) > max_bucket_size:
+            dropped[delete] = values[max_bucket_size:]
+    return capped, dropped
+
+
+def build_sym_deletes(normalized_index: dict, max_edit_distance: int, prefix_length: int,
+                      key_strategy: str = "term", bucket_order: str = "frequency",
+                      max_bucket_size: int = None) -> dict:
+    """symDeletes: delete -> ordered (and optionally capped) bucket of terms or prefix keys."""
+    deletes = collect_sym_deletes(normalized_index, max_edit_distance, prefix_length, key_strategy)
+    value_frequencies = bucket_value_frequencies(term_frequencies(normalized_index), prefix_length, key_strategy)
+    capped, _ = cap_buckets(order_buckets(deletes, value_frequencies, bucket_order), max_bucket_size)
+    return capped
+
+
+def size_histogram(sizes) -> dict:
+    """Counts per power-of-two size range: "1", "2-3", "4-7", ..."""
+    histogram = {}
+    for size in sorted(sizes):
+        low = 1 << (max(size, 1).bit_length() - 1)
+        label = str(low) if low == 1 else f"{low}-{2 * low - 1}"
+        histogram[label] = histogram.get(label, 0) + 1
+    return histogram
+
+
+def reachability_report(buckets: dict, dropped: dict, frequencies: dict, prefix_length: int,
+                        key_strategy: str, top: int = 50) -> dict:
+    """
+    Which terms lose delete buckets to the cap. A term is reachable through
+    every bucket holding it (or its prefix key); terms that lose all of them
+    can only be found by an exact match.
+    """
+    def terms_of(value):
+        if key_strategy == "term":
+            return [value]
+        return [norm for norm in prefix_terms.get(value, ())]
+
+    prefix_terms = defaultdict(list)
+    if key_strategy == "prefix":
+        for norm in frequencies:
+            prefix_terms[norm[:prefix_length]].append(norm)
+
+    kept_count = defaultdict(int)
+    lost_count = defaultdict(int)
+    for values in buckets.values():
+        for value in values:
+            for norm in terms_of(value):
+                kept_count[norm] += 1
+    for values in dropped.values():
+        for value in values:
+            for norm in terms_of(value):
+                lost_count[norm] += 1
+
+    affected = sorted(lost_count, key=lambda norm: (-frequencies.get(norm, 0), norm))
+    unreachable = [norm for norm in affected if kept_count[norm] == 0]
+    return {
+        "cappedBuckets": len(dropped),
+        "droppedEntries": sum(len(values) for values in dropped.values()),
+        "termsAffected": len(affected),
+        "termsUnreachable": len(unreachable),
+        "histogramBefore": size_histogram(len(buckets[k]) + len(dropped.get(k, ())) for k in buckets),
+        "histogramAfter": size_histogram(len(values) for values in buckets.values()),
+        "mostFrequentAffected": [
+            {"term": norm, "frequency": frequencies.get(norm, 0),
+             "bucketsLost": lost_count[norm], "bucketsKept": kept_count[norm]}
+            for norm in affected[:top]
+        ],
+        "mostFrequentUnreachable": unreachable[:top],
+    }
+
+
 def load_input(path: str):
     """Load dictionary from JSON or CBOR format (auto-detect)."""
     with open(path, "rb") as f:
@@ -70,25 +278,11 @@ def load_input(path: str):
             data = json.loads(text)
         else:
             # CBOR format
-            data = cbor2.load(f)
+            data = import_cbor2().load(f)
     
     if isinstance(data, list):
         # base JSON format [{w,f}]
-        normalized_index = {}
-        prefix_cache = {}
-        for entry in data:
-            # IMPORTANT: Preserve original case (uppercase/lowercase) from JSON
-            # e.g., {"w": "Mario", "f": 100} -> word="Mario" (not "mario")
-            # normalize() only converts to lowercase for indexing purposes
-            w = entry["w"]
-            f = int(entry.get("f", 1))
-            norm = normalize(w)  # lowercase for indexing only
-            # Save original word with case preserved for dictionary entry
-            normalized_index.setdefault(norm, []).append({"word": w, "frequency": f, "source": 0})
-            # prefix cache up to 4 chars (matches cachePrefixLength default)
-            for l in range(1, min(len(norm), 4) + 1):
-                prefix_cache.setdefault(norm[:l], []).append({"word": w, "frequency": f, "source": 0})
-        return {"normalizedIndex": normalized_index, "prefixCache": prefix_cache}
+        return build_index(data)
     else:
         # assume already in DictionaryIndex shape (case should already be preserved)
         return data
@@ -98,32 +292,58 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", required=True, help="Path to base json or existing .dict")
     parser.add_argument("--output", required=True, help="Path to write the extended .dict (CBOR)")
-    parser.add_argument("--max_edit_distance", type=int, default=2)
-    parser.add_argument("--prefix_length", type=int, default=4)
+    parser.add_argument("--language", default=None,
+                        help="Language whose symspell_config.json entry to use (default: from the input name)")
+    parser.add_argument("--max_edit_distance", type=int, default=None,
+                        help=f"Default: from symspell_config.json, else {DEFAULT_CONFIG['maxEditDistance']}")
+    parser.add_argument("--prefix_length", type=int, default=None,
+                        help=f"Default: from symspell_config.json, else {DEFAULT_CONFIG['prefixLength']}")
+    parser.add_argument("--key_strategy", choices=KEY_STRATEGIES, default=None,
+                        help=f"Delete bucket contents (default: from symspell_config.json, "
+                             f"else {DEFAULT_CONFIG['keyStrategy']})")
+    parser.add_argument("--bucket_order", choices=BUCKET_ORDERS, default="frequency",
+                        help="Order of bucket entries (default: frequency, most frequent first)")
+    parser.add_argument("--max_bucket_size", type=int, default=None,
+                        help="Keep at most N entries per bucket (default: from symspell_config.json, else no cap)")
+    parser.add_argument("--report", default=None,
+                        help="Write bucket-size histograms and the terms that lose reachability (JSON)")
     args = parser.parse_args()
+    cbor2 = import_cbor2()
+
+    config = load_build_config(args.language or language_from_path(args.input))
+    if args.max_edit_distance is None:
+        args.max_edit_distance = config["maxEditDistance"]
+    if args.prefix_length is None:
+        args.prefix_length = config["prefixLength"]
+    if args.key_strategy is None:
+        args.key_strategy = config["keyStrategy"]
+    if args.max_bucket_size is None:
+        args.max_bucket_size = config["maxBucketSize"]
 
     data = load_input(args.input)
     normalized_index = data["normalizedIndex"]
 
-    deletes = defaultdict(set)
-    for norm, entries in normalized_index.items():
-        key = norm[: args.prefix_length]
-        for d in generate_deletes(key, args.max_edit_distance):
-            # Store full normalized term (matches SymSpell.addWord behavior)
-            deletes[d].add(norm)
-
-    sym_deletes = {k: sorted(v) for k, v in deletes.items()}
+    frequencies = term_frequencies(normalized_index)
+    deletes = collect_sym_deletes(normalized_index, args.max_edit_distance, args.prefix_length, args.key_strategy)
+    buckets = order_buckets(
+        deletes, bucket_value_frequencies(frequencies, args.prefix_length, args.key_strategy), args.bucket_order
+    )
+    sym_deletes, dropped = cap_buckets(buckets, args.max_bucket_size)
     sym_meta = {
         "maxEditDistance": args.max_edit_distance,
         "prefixLength": args.prefix_length,
+        "bucketOrder": args.bucket_order,
+        "keyStrategy": args.key_strategy,
     }
+    if args.max_bucket_size:
+        sym_meta["maxBucketSize"] = args.max_bucket_size
 
-    out = {
+    out = canonical_index({
         "normalizedIndex": normalized_index,
         "prefixCache": data.get("prefixCache", {}),
         "symDeletes": sym_deletes,
         "symMeta": sym_meta,
-    }
+    })
 
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
     
@@ -133,7 +353,21 @@ def main():
     
     # Get file size for logging
     size_mb = os.path.getsize(args.output) / (1024 * 1024)
-    print(f"Written {args.output} ({size_mb:.2f} MB CBOR) with {len(sym_deletes)} delete buckets")
+    print(f"Written {args.output} ({size_mb:.2f} MB CBOR) with {len(sym_deletes)} delete buckets "
+          f"(maxEditDistance={args.max_edit_distance}, prefixLength={args.prefix_length}, "
+          f"keys={args.key_strategy})")
+
+    if args.max_bucket_size or args.report:
+        report = reachability_report(sym_deletes, dropped, frequencies, args.prefix_length, args.key_strategy)
+        print(f"Bucket cap {args.max_bucket_size or 'none'}: {report['cappedBuckets']} buckets capped, "
+              f"{report['termsAffected']} terms lose buckets, {report['termsUnreachable']} only reachable "
+              f"by exact match")
+        print("Bucket sizes: " + ", ".join(f"{label}: {count}" for label, count in report["histogramAfter"].items()))
+        if args.report:
+            report.update({"dictionary": args.input, "symMeta": sym_meta})
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Report written to {args.report}")
 
 
 if __name__ == "__main__":
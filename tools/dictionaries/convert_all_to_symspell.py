@@ -4,12 +4,16 @@
 Convert all dictionary JSON base files to SymSpell .dict format.
 
 This script processes all *_base.json files and converts them to .dict format
-using build_symspell_dict.py.
+using build_symspell_dict.py, with each language's parameters from
+symspell_config.json. With --corrections, build_correction_cache.py then
+adds the precomputed typo corrections to each .dict.
 
 Usage:
     python scripts/convert_all_to_symspell.py
+    python scripts/convert_all_to_symspell.py --corrections
 """
 
+import argparse
 import os
 import subprocess
 import sys
@@ -19,14 +23,22 @@ from pathlib import Path
 def find_project_root():
     """Find project root directory."""
     script_dir = Path(__file__).parent
-    return script_dir.parent
+    return script_dir.parent.parent  # tools/dictionaries -> tools -> project root
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Convert all *_base.json dictionaries to SymSpell .dict format"
+    )
+    parser.add_argument("--corrections", action="store_true",
+                        help="Add precomputed typo corrections (build_correction_cache.py)")
+    args = parser.parse_args()
+
     project_root = find_project_root()
     dictionaries_dir = project_root / "app" / "src" / "main" / "assets" / "common" / "dictionaries"
     output_dir = project_root / "app" / "src" / "main" / "assets" / "common" / "dictionaries_serialized"
-    script_path = project_root / "scripts" / "build_symspell_dict.py"
+    script_path = Path(__file__).parent / "build_symspell_dict.py"
+    corrections_script = Path(__file__).parent / "build_correction_cache.py"
     
     if not dictionaries_dir.exists():
         print(f"ERROR: Dictionaries directory not found: {dictionaries_dir}")
@@ -64,7 +76,8 @@ def main():
                     sys.executable,
                     str(script_path),
                     "--input", str(input_path),
-                    "--output", str(output_path)
+                    "--output", str(output_path),
+                    "--language", language
                 ],
                 cwd=str(project_root),
                 capture_output=True,
@@ -72,6 +85,21 @@ def main():
                 encoding="utf-8"
             )
             
+            if result.returncode == 0 and args.corrections:
+                print(f"  {result.stdout.strip()}")
+                result = subprocess.run(
+                    [
+                        sys.executable,
+                        str(corrections_script),
+                        "--input", str(output_path),
+                        "--language", language
+                    ],
+                    cwd=str(project_root),
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8"
+                )
+
             if result.returncode == 0:
                 print(f"  ✓ Success")
                 print(f"  {result.stdout.strip()}")
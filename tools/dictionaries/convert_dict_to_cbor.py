@@ -13,16 +13,21 @@ Requirements:
     pip install cbor2
 """
 
+import argparse
 import os
 import json
 import sys
 from pathlib import Path
 
-try:
-    import cbor2
-except ImportError:
-    print("ERROR: cbor2 not installed. Run: pip install cbor2")
-    sys.exit(1)
+
+def import_cbor2():
+    """Import cbor2 on first use, so --help and JSON-only paths work without it."""
+    try:
+        import cbor2
+    except ImportError:
+        print("ERROR: cbor2 not installed. Run: pip install cbor2")
+        sys.exit(1)
+    return cbor2
 
 
 def find_project_root():
@@ -45,7 +50,7 @@ def convert_json_to_cbor(input_path: Path, output_path: Path) -> tuple[bool, str
         
         # Write CBOR
         with open(output_path, "wb") as f:
-            cbor2.dump(data, f)
+            import_cbor2().dump(data, f)
         
         # Calculate sizes
         json_size = input_path.stat().st_size / (1024 * 1024)
@@ -61,6 +66,12 @@ def convert_json_to_cbor(input_path: Path, output_path: Path) -> tuple[bool, str
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Convert *_base.dict files from JSON to CBOR format (in place)"
+    )
+    parser.parse_args()
+    import_cbor2()
+
     project_root = find_project_root()
     dict_dir = project_root / "app" / "src" / "main" / "assets" / "common" / "dictionaries_serialized"
     
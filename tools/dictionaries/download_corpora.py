@@ -7,21 +7,37 @@ to improve TitanKeys keyboard dictionaries.
 
 Usage:
     python download_corpora.py [--language LANG] [--output-dir DIR] [--source SOURCE]
+        [--jobs N] [--cache-dir DIR] [--no-cache] [--stream [--limit N]]
 
 Sources:
     - opensubtitles: Word frequency lists from OpenSubtitles
     - wikipedia: Wikipedia word frequency data
     - gutenberg: Project Gutenberg books (public domain)
+
+Downloads run concurrently (--jobs) and go through a local content-addressed
+cache (default: OUTPUT_DIR/.cache). Cached files are revalidated with
+ETag/Last-Modified conditional requests, interrupted transfers resume with
+HTTP Range requests guarded by If-Range (a changed file restarts instead of
+being spliced), and every cached object is checked against its SHA-256.
+
+With --stream, the HTTP response (optionally gzip) is parsed line by line as it
+arrives and written straight to the {"w", "f"} JSON word list; no intermediate
+text file is written and the transfer stops once --limit entries are read.
 """
 
 import argparse
+import hashlib
+import io
 import os
+import shutil
 import sys
 import json
+import threading
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 import gzip
 import re
 
@@ -58,78 +74,314 @@ WIKIPEDIA_FILES = {
 WIKIPEDIA_FREQ_BASE = "https://raw.githubusercontent.com/IlyaSemenov/wikipedia-word-frequency/master/results/{filename}"
 
 
-def download_file(url: str, output_path: Path, description: str = "file") -> bool:
-    """Download a file from URL to output path."""
+CHUNK_SIZE = 64 * 1024
+
+
+def sha256_file(path: Path) -> str:
+    """Compute the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadCache:
+    """
+    Content-addressed download cache.
+
+    Layout:
+        objects/<sha[:2]>/<sha256>   - downloaded content, named by its hash
+        partial/<sha256(url)>.part   - interrupted transfers (resumed with Range)
+        partial/<sha256(url)>.json   - ETag/Last-Modified the .part was started with
+        index.json                   - url -> {sha256, etag, last_modified, size}
+
+    The index is shared between download threads and guarded by a lock.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.objects_dir = cache_dir / 'objects'
+        self.partial_dir = cache_dir / 'partial'
+        self.index_path = cache_dir / 'index.json'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict] = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    def partial_path(self, url: str) -> Path:
+        return self.partial_dir / (hashlib.sha256(url.encode('utf-8')).hexdigest() + '.part')
+
+    def partial_validator(self, url: str) -> Optional[str]:
+        """If-Range value for resuming url's .part: a strong ETag, else Last-Modified."""
+        try:
+            with open(self.partial_path(url).with_suffix('.json'), 'r', encoding='utf-8') as f:
+                headers = json.load(f)
+        except (OSError, ValueError):
+            return None
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return headers.get('last_modified')
+
+    def start_partial(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        with open(self.partial_path(url).with_suffix('.json'), 'w', encoding='utf-8') as f:
+            json.dump({'etag': etag, 'last_modified': last_modified}, f)
+
+    def discard_partial(self, url: str) -> None:
+        part_file = self.partial_path(url)
+        for path in (part_file, part_file.with_suffix('.json')):
+            if path.exists():
+                path.unlink()
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Return the index record for url if its object exists and is intact."""
+        with self._lock:
+            record = self._index.get(url)
+        if not record:
+            return None
+        path = self.object_path(record['sha256'])
+        if not path.exists() or sha256_file(path) != record['sha256']:
+            return None
+        return record
+
+    def store(self, url: str, part_file: Path, etag: Optional[str], last_modified: Optional[str]) -> Dict:
+        """Move a completed download into the object store and index it."""
+        sha256 = sha256_file(part_file)
+        path = self.object_path(sha256)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part_file, path)
+        validator_file = part_file.with_suffix('.json')
+        if validator_file.exists():
+            validator_file.unlink()
+        record = {
+            'sha256': sha256,
+            'etag': etag,
+            'last_modified': last_modified,
+            'size': path.stat().st_size,
+        }
+        with self._lock:
+            self._index[url] = record
+            tmp = self.index_path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.index_path)
+        return record
+
+
+def fetch_to_cache(url: str, cache: DownloadCache) -> Dict:
+    """
+    Fetch url into the cache and return its index record.
+
+    Sends If-None-Match/If-Modified-Since for known URLs (304 reuses the cached
+    object) and Range + If-Range for partial downloads: 206 appends, 200 (the
+    resource changed since the .part was started) restarts. A .part without a
+    usable validator is discarded rather than resumed blindly.
+    """
+    cached = cache.lookup(url)
+    part_file = cache.partial_path(url)
+    offset = part_file.stat().st_size if part_file.exists() else 0
+    validator = cache.partial_validator(url) if offset else None
+    if offset and not validator:
+        cache.discard_partial(url)
+        offset = 0
+
+    request = urllib.request.Request(url)
+    if cached and not offset:
+        if cached.get('etag'):
+            request.add_header('If-None-Match', cached['etag'])
+        if cached.get('last_modified'):
+            request.add_header('If-Modified-Since', cached['last_modified'])
+    if offset:
+        request.add_header('Range', f'bytes={offset}-')
+        request.add_header('If-Range', validator)
+
+    try:
+        response = urllib.request.urlopen(request, timeout=60)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return {**cached, 'status': 'not-modified'}
+        if e.code == 416 and offset:
+            # Range past the end: the partial file is stale, start over
+            cache.discard_partial(url)
+            return fetch_to_cache(url, cache)
+        raise
+
+    with response:
+        resumed = offset > 0 and response.status == 206
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not resumed:
+            cache.start_partial(url, etag, last_modified)
+        mode = 'ab' if resumed else 'wb'
+        with open(part_file, mode) as f:
+            shutil.copyfileobj(response, f, CHUNK_SIZE)
+
+    record = cache.store(url, part_file, etag, last_modified)
+    return {**record, 'status': 'resumed' if resumed else 'downloaded'}
+
+
+def download_file(url: str, output_path: Path, description: str = "file",
+                  cache: Optional[DownloadCache] = None) -> bool:
+    """Download a file from URL to output path (through the cache when given)."""
     try:
         print(f"Downloading {description} from {url}...")
-        urllib.request.urlretrieve(url, output_path)
-        print(f"  [OK] Downloaded to {output_path}")
+        if cache is None:
+            urllib.request.urlretrieve(url, output_path)
+            print(f"  [OK] Downloaded to {output_path}")
+            return True
+
+        record = fetch_to_cache(url, cache)
+        tmp = output_path.with_name(output_path.name + '.tmp')
+        shutil.copyfile(cache.object_path(record['sha256']), tmp)
+        os.replace(tmp, output_path)
+        if record['status'] == 'not-modified':
+            print(f"  [OK] {description}: not modified, reused cached copy -> {output_path}")
+        else:
+            print(f"  [OK] {description}: {record['status']} ({record['size'] / 1024:.0f} KB) -> {output_path}")
         return True
     except urllib.error.URLError as e:
-        print(f"  [FAIL] Failed to download: {e}")
+        print(f"  [FAIL] Failed to download {description}: {e}")
         return False
     except Exception as e:
-        print(f"  [ERROR] Error: {e}")
+        print(f"  [ERROR] Error downloading {description}: {e}")
         return False
 
 
-def download_frequencywords(lang_code: str, output_dir: Path) -> Optional[Path]:
+def frequencywords_url(lang_code: str) -> str:
+    """FrequencyWords URL (uses language code directly: en, it, de, etc.)."""
+    return FREQUENCYWORDS_BASE.format(lang=lang_code)
+
+
+def wikipedia_url(lang_code: str) -> Optional[str]:
+    """Wikipedia frequency URL, or None if the language is not available."""
+    filename = WIKIPEDIA_FILES.get(lang_code)
+    if filename is None:
+        return None
+    return WIKIPEDIA_FREQ_BASE.format(filename=filename)
+
+
+def download_frequencywords(lang_code: str, output_dir: Path,
+                            cache: Optional[DownloadCache] = None) -> Optional[Path]:
     """Download FrequencyWords word frequency list (from OpenSubtitles corpus)."""
-    # Uses language code directly (en, it, de, etc.)
-    url = FREQUENCYWORDS_BASE.format(lang=lang_code)
+    url = frequencywords_url(lang_code)
 
     output_file = output_dir / f"{lang_code}_frequencywords_50k.txt"
 
-    if download_file(url, output_file, f"FrequencyWords list for {lang_code}"):
+    if download_file(url, output_file, f"FrequencyWords list for {lang_code}", cache):
         return output_file
     return None
 
 
-def download_wikipedia_frequency(lang_code: str, output_dir: Path) -> Optional[Path]:
+def download_wikipedia_frequency(lang_code: str, output_dir: Path,
+                                 cache: Optional[DownloadCache] = None) -> Optional[Path]:
     """Download Wikipedia word frequency data."""
-    if lang_code not in WIKIPEDIA_FILES:
+    url = wikipedia_url(lang_code)
+    if url is None:
         print(f"  [SKIP] Wikipedia frequency not available for {lang_code}")
         return None
 
-    filename = WIKIPEDIA_FILES[lang_code]
-    url = WIKIPEDIA_FREQ_BASE.format(filename=filename)
-
     output_file = output_dir / f"{lang_code}_wikipedia_freq.txt"
 
-    if download_file(url, output_file, f"Wikipedia frequency for {lang_code}"):
+    if download_file(url, output_file, f"Wikipedia frequency for {lang_code}", cache):
         return output_file
     return None
 
 
+def parse_opensubtitles_line(line: str) -> Optional[Dict]:
+    """Parse one 'word frequency' line (space-separated) into a {w, f} entry."""
+    parts = line.split()
+    if len(parts) < 2:
+        return None
+    try:
+        return {"w": ' '.join(parts[:-1]), "f": int(parts[-1])}
+    except ValueError:
+        return None
+
+
+def parse_wikipedia_line(line: str) -> Optional[Dict]:
+    """Parse one 'word,count' or 'word count' line into a {w, f} entry."""
+    # CSV format: word,count or word count
+    parts = line.split(',')
+    if len(parts) < 2:
+        parts = line.split()
+    if len(parts) < 2:
+        return None
+    word = parts[0].strip().strip('"')
+    try:
+        return {"w": word, "f": int(parts[1].strip().strip('"'))}
+    except (ValueError, IndexError):
+        return None
+
+
+def skip_header(lines: Iterable[str], prefix: str = 'word') -> Iterator[str]:
+    """Drop the first line if it is a CSV header (starts with prefix)."""
+    lines = iter(lines)
+    first_line = next(lines, None)
+    if first_line is not None and not first_line.strip().startswith(prefix):
+        yield first_line
+    yield from lines
+
+
+def iter_entries(lines: Iterable[str], parse_line: Callable[[str], Optional[Dict]],
+                 limit: Optional[int] = None) -> Iterator[Dict]:
+    """Yield parsed entries from lines, stopping as soon as limit entries were produced."""
+    count = 0
+    for line in lines:
+        if limit is not None and count >= limit:
+            return
+        line = line.strip()
+        if not line:
+            continue
+        entry = parse_line(line)
+        if entry is None:
+            continue
+        count += 1
+        yield entry
+
+
+def write_entries_json(entries: Iterable[Dict], json_file: Path) -> int:
+    """
+    Write entries incrementally as a JSON array.
+
+    Output is identical to json.dump(entries, f, ensure_ascii=False, indent=2).
+    Returns the number of entries written. If entries raises (e.g. a stream
+    breaks off), json_file is left untouched and the partial .tmp removed.
+    """
+    count = 0
+    tmp = json_file.with_name(json_file.name + '.tmp')
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                body = json.dumps(entry, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+                f.write(('[\n  ' if count == 0 else ',\n  ') + body)
+                count += 1
+            f.write('\n]' if count else '[]')
+        os.replace(tmp, json_file)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return count
+
+
 def convert_opensubtitles_to_json(txt_file: Path, json_file: Path) -> bool:
     """Convert OpenSubtitles frequency list to JSON format."""
     try:
-        entries = []
         print(f"Converting {txt_file.name} to JSON...")
         
         with open(txt_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Format: word frequency (space-separated)
-                parts = line.split()
-                if len(parts) < 2:
-                    continue
-                
-                word = ' '.join(parts[:-1])
-                try:
-                    frequency = int(parts[-1])
-                    entries.append({"w": word, "f": frequency})
-                except ValueError:
-                    continue
+            count = write_entries_json(iter_entries(f, parse_opensubtitles_line), json_file)
         
-        # Write JSON
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(entries, f, ensure_ascii=False, indent=2)
-        
-        print(f"  [OK] Converted {len(entries)} entries to {json_file.name}")
+        print(f"  [OK] Converted {count} entries to {json_file.name}")
         return True
     except Exception as e:
         print(f"  [FAIL] Conversion failed: {e}")
@@ -139,49 +391,49 @@ def convert_opensubtitles_to_json(txt_file: Path, json_file: Path) -> bool:
 def convert_wikipedia_to_json(csv_file: Path, json_file: Path, limit: int = 50000) -> bool:
     """Convert Wikipedia frequency CSV to JSON format."""
     try:
-        entries = []
         print(f"Converting {csv_file.name} to JSON...")
         
         with open(csv_file, 'r', encoding='utf-8') as f:
-            # Skip header if present
-            first_line = f.readline()
-            if not first_line.strip().startswith('word'):
-                f.seek(0)
-            
-            for line_num, line in enumerate(f, 1):
-                if len(entries) >= limit:
-                    break
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # CSV format: word,count or word count
-                parts = line.split(',')
-                if len(parts) < 2:
-                    parts = line.split()
-                
-                if len(parts) < 2:
-                    continue
-                
-                word = parts[0].strip().strip('"')
-                try:
-                    frequency = int(parts[1].strip().strip('"'))
-                    entries.append({"w": word, "f": frequency})
-                except (ValueError, IndexError):
-                    continue
-        
-        # Write JSON
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(entries, f, ensure_ascii=False, indent=2)
+            count = write_entries_json(iter_entries(skip_header(f), parse_wikipedia_line, limit), json_file)
         
-        print(f"  [OK] Converted {len(entries)} entries to {json_file.name}")
+        print(f"  [OK] Converted {count} entries to {json_file.name}")
         return True
     except Exception as e:
         print(f"  [FAIL] Conversion failed: {e}")
         return False
 
 
+def stream_convert(url: str, json_file: Path, parse_line: Callable[[str], Optional[Dict]],
+                   limit: Optional[int], description: str = "file", has_header: bool = False) -> bool:
+    """
+    Download url and convert it to JSON in a single streaming pass.
+
+    The response is decoded (gunzipped if the URL ends in .gz or the server
+    sends Content-Encoding: gzip) and parsed line by line while bytes arrive.
+    The connection is closed as soon as limit entries have been read.
+    With has_header, a leading CSV header line is skipped.
+    """
+    try:
+        print(f"Streaming {description} from {url}...")
+        request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            raw = response
+            if url.endswith('.gz') or response.headers.get('Content-Encoding') == 'gzip':
+                raw = gzip.GzipFile(fileobj=response)
+            lines = io.TextIOWrapper(raw, encoding='utf-8', errors='replace', newline='')
+            if has_header:
+                lines = skip_header(lines)
+            count = write_entries_json(iter_entries(lines, parse_line, limit), json_file)
+        print(f"  [OK] Streamed {count} entries to {json_file.name}")
+        return True
+    except urllib.error.URLError as e:
+        print(f"  [FAIL] Failed to stream {description}: {e}")
+        return False
+    except Exception as e:
+        print(f"  [ERROR] Error streaming {description}: {e}")
+        return False
+
+
 def main():
     parser = argparse.ArgumentParser(description='Download text corpora for dictionary generation')
     parser.add_argument('--language', '-l', help='Language code (it, en, de, etc.)', default='all')
@@ -190,38 +442,88 @@ def main():
                        default='all', help='Data source to download')
     parser.add_argument('--convert', '-c', action='store_true', 
                        help='Convert downloaded files to JSON format')
+    parser.add_argument('--jobs', '-j', type=int, default=4,
+                       help='Number of concurrent downloads (default: 4)')
+    parser.add_argument('--cache-dir', type=Path, default=None,
+                       help='Download cache directory (default: OUTPUT_DIR/.cache)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Always download directly, bypassing the cache')
+    parser.add_argument('--stream', action='store_true',
+                       help='Parse responses while downloading and write JSON only (no .txt files, no cache)')
+    parser.add_argument('--limit', type=int, default=50000,
+                       help='Maximum entries per source in --stream mode (default: 50000)')
     
     args = parser.parse_args()
     
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    cache = None
+    if not args.no_cache and not args.stream:
+        cache = DownloadCache(args.cache_dir or output_dir / '.cache')
+    
     languages = [args.language] if args.language != 'all' else list(LANGUAGE_CODES.keys())
     
     print(f"Downloading corpora for languages: {', '.join(languages)}")
     print(f"Output directory: {output_dir.absolute()}")
+    if cache is not None:
+        print(f"Cache directory: {cache.cache_dir.absolute()}")
+    if args.stream:
+        print(f"Streaming mode: up to {args.limit} entries per source")
     print()
     
-    downloaded_files = []
+    if args.stream:
+        # (description, url, parser, has CSV header, JSON output)
+        streams = []
+        for lang_code in languages:
+            if args.source in ['opensubtitles', 'all']:
+                streams.append((f"FrequencyWords list for {lang_code}", frequencywords_url(lang_code),
+                                parse_opensubtitles_line, False, output_dir / f"{lang_code}_frequencywords.json"))
+            if args.source in ['wikipedia', 'all']:
+                url = wikipedia_url(lang_code)
+                if url is None:
+                    print(f"  [SKIP] Wikipedia frequency not available for {lang_code}")
+                    continue
+                streams.append((f"Wikipedia frequency for {lang_code}", url,
+                                parse_wikipedia_line, True, output_dir / f"{lang_code}_wikipedia.json"))
+        
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            futures = [pool.submit(stream_convert, url, json_file, parse_line, args.limit, description, has_header)
+                       for description, url, parse_line, has_header, json_file in streams]
+            written = [json_file for (_, _, _, _, json_file), future in zip(streams, futures) if future.result()]
+        
+        print(f"\n=== Summary ===")
+        print(f"Streamed {len(written)} word lists")
+        print(f"Files saved to: {output_dir.absolute()}")
+        
+        if not written:
+            print("\n[WARN] Nothing was streamed. Check your internet connection and URLs.")
+            return 1
+        return 0
     
+    # (source, lang_code, download function, converter, JSON name)
+    tasks = []
     for lang_code in languages:
-        print(f"\n=== Processing {lang_code} ===")
-        
         if args.source in ['opensubtitles', 'all']:
-            file = download_frequencywords(lang_code, output_dir)
-            if file:
-                downloaded_files.append(file)
-                if args.convert:
-                    json_file = output_dir / f"{lang_code}_frequencywords.json"
-                    convert_opensubtitles_to_json(file, json_file)
-        
+            tasks.append(('opensubtitles', lang_code, download_frequencywords,
+                          convert_opensubtitles_to_json, f"{lang_code}_frequencywords.json"))
         if args.source in ['wikipedia', 'all']:
-            file = download_wikipedia_frequency(lang_code, output_dir)
-            if file:
-                downloaded_files.append(file)
-                if args.convert:
-                    json_file = output_dir / f"{lang_code}_wikipedia.json"
-                    convert_wikipedia_to_json(file, json_file)
+            tasks.append(('wikipedia', lang_code, download_wikipedia_frequency,
+                          convert_wikipedia_to_json, f"{lang_code}_wikipedia.json"))
+    
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(download, lang_code, output_dir, cache)
+                   for _, lang_code, download, _, _ in tasks]
+        results = [future.result() for future in futures]
+    
+    downloaded_files = []
+    
+    for (source, lang_code, _, convert, json_name), file in zip(tasks, results):
+        if not file:
+            continue
+        downloaded_files.append(file)
+        if args.convert:
+            convert(file, output_dir / json_name)
     
     print(f"\n=== Summary ===")
     print(f"Downloaded {len(downloaded_files)} files")
@@ -237,4 +539,3 @@ def main():
 
 if __name__ == '__main__':
     sys.exit(main())
-
@@ -4,18 +4,36 @@ Extract n-grams (bigrams and trigrams) from text corpora for next-word predictio
 
 Usage:
     python extract_ngrams.py input.txt output_bigrams.json output_trigrams.json [--min-freq N]
+        [--token-cache PREFIX [--dictionary DICT.json]] [--dict it_base.dict [--coverage 0.8]]
 
 This script processes text files and extracts word sequences to build language models
 for next-word prediction in the TitanKeys keyboard.
+
+With --token-cache, the corpus is tokenized once by tokenize_corpus.py into a
+memory-mapped token array (re-used while the corpus is unchanged) and n-grams
+are counted on that array with NumPy, so changing --min-freq does not pay the
+tokenization cost again.
+
+With --dict, the n-grams are also stored in that .dict (bigrams, trigrams)
+together with a next-word cache: for the most frequent 1- and 2-word
+contexts, covering --coverage of all context occurrences, the final ranked
+predictions of NgramLanguageModel.predictFromBigram/predictFromTrigram
+(n-gram probability boosted by the word's dictionary frequency) are
+precomputed, up to --cache-depth per context. The app answers those contexts
+without scoring and sorting the candidate maps; other contexts use the full
+model.
 """
 
 import json
 import re
 import sys
 from collections import defaultdict
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import argparse
 
+USER_DEFAULTS = Path(__file__).resolve().parent.parent.parent / "app" / "src" / "main" / "assets" / "common" / "dictionaries" / "user_defaults.json"
+
 
 def normalize_word(word: str) -> str:
     """Normalize a word: lowercase, remove accents, keep only letters."""
@@ -115,6 +133,47 @@ def extract_ngrams(input_file: str, min_freq: int = 1) -> Tuple[Dict[str, Dict[s
     return dict(bigrams), dict(trigrams)
 
 
+def extract_ngrams_cached(
+    input_file: str,
+    cache_prefix: Path,
+    min_freq: int = 1,
+    dictionary_file: Optional[Path] = None
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, Dict[str, Dict[str, int]]]]:
+    """
+    Extract bigrams and trigrams via the token cache (same result as extract_ngrams).
+
+    The corpus is tokenized only if the cache at cache_prefix is missing or stale.
+    """
+    from tokenize_corpus import count_ngrams, is_cache_valid, load_tokens, tokenize_corpus
+
+    if not Path(input_file).exists():
+        print(f"Error: File '{input_file}' not found", file=sys.stderr)
+        sys.exit(1)
+
+    if is_cache_valid(cache_prefix, Path(input_file), dictionary_file):
+        print(f"Using token cache {cache_prefix}.*")
+    else:
+        tokenize_corpus(Path(input_file), cache_prefix, dictionary_file)
+
+    tokens, offsets, vocab = load_tokens(cache_prefix)
+    print(f"Counting n-grams over {len(tokens)} tokens...")
+
+    bigrams: Dict[str, Dict[str, int]] = {}
+    ngrams, counts = count_ngrams(tokens, offsets, 2, min_freq)
+    for (w1, w2), freq in zip(ngrams.tolist(), counts.tolist()):
+        bigrams.setdefault(vocab[w1], {})[vocab[w2]] = freq
+
+    trigrams: Dict[str, Dict[str, Dict[str, int]]] = {}
+    ngrams, counts = count_ngrams(tokens, offsets, 3, min_freq)
+    for (w1, w2, w3), freq in zip(ngrams.tolist(), counts.tolist()):
+        trigrams.setdefault(vocab[w1], {}).setdefault(vocab[w2], {})[vocab[w3]] = freq
+
+    print(f"Extracted {sum(len(m) for m in bigrams.values())} bigrams")
+    print(f"Extracted {sum(sum(len(m) for m in w2.values()) for w2 in trigrams.values())} trigrams")
+
+    return bigrams, trigrams
+
+
 def save_json(data: dict, output_file: str):
     """Save data to JSON file."""
     print(f"Saving to {output_file}...")
@@ -127,19 +186,135 @@ def save_json(data: dict, output_file: str):
         sys.exit(1)
 
 
+def exact_word_frequencies(index: dict, user_defaults: Optional[Path] = USER_DEFAULTS) -> Dict[str, int]:
+    """
+    Lowercased word -> DictionaryRepository.getExactWordFrequency() for the .dict's
+    normalizedIndex plus the default user entries the app indexes on load.
+    """
+    frequencies: Dict[str, int] = {}
+
+    def add(word: str, frequency: int):
+        key = word.lower()
+        frequencies[key] = max(frequencies.get(key, frequency), frequency)
+
+    for entries in index["normalizedIndex"].values():
+        for entry in entries:
+            add(entry["word"], int(entry.get("frequency", 0)))
+    if user_defaults is not None and user_defaults.exists():
+        with open(user_defaults, 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                add(entry["w"], int(entry.get("f", 1)))
+    return frequencies
+
+
+def rank_next_words(next_map: Dict[str, int], word_frequencies: Dict[str, int]) -> List[Tuple[str, float]]:
+    """(word, score) sorted like NgramLanguageModel.predictFromBigram/predictFromTrigram."""
+    total = float(sum(next_map.values()))
+    if total == 0.0:
+        return []
+    scored = [(word, (freq / total) * (1.0 + word_frequencies.get(word.lower(), 0) / 1000.0))
+              for word, freq in next_map.items()]
+    # Stable, like sortedByDescending: ties keep the map order
+    return sorted(scored, key=lambda item: -item[1])
+
+
+def select_contexts(occurrences: Dict[str, int], coverage: float) -> List[str]:
+    """Most frequent contexts until they account for `coverage` of all occurrences."""
+    total = sum(occurrences.values())
+    selected = []
+    covered = 0
+    for context in sorted(occurrences, key=lambda c: (-occurrences[c], c)):
+        if covered >= coverage * total:
+            break
+        selected.append(context)
+        covered += occurrences[context]
+    return selected
+
+
+def build_next_word_cache(
+    bigrams: Dict[str, Dict[str, int]],
+    trigrams: Dict[str, Dict[str, Dict[str, int]]],
+    word_frequencies: Dict[str, int],
+    coverage: float = 0.8,
+    depth: int = 18
+) -> Tuple[dict, dict]:
+    """
+    Ranked predictions for the frequent contexts ("w1" for bigrams, "w1 w2" for
+    trigrams) in the NextWordCache shape of DictionaryIndex.kt, and statistics.
+    """
+    next_maps = {w1: next_map for w1, next_map in bigrams.items()}
+    for w1, w2_map in trigrams.items():
+        for w2, next_map in w2_map.items():
+            next_maps[f"{w1} {w2}"] = next_map
+
+    contexts = {}
+    stats = {}
+    for order, keys in (("bigram", list(bigrams)), ("trigram", [k for k in next_maps if " " in k])):
+        occurrences = {key: sum(next_maps[key].values()) for key in keys}
+        selected = select_contexts(occurrences, coverage)
+        for key in selected:
+            ranked = rank_next_words(next_maps[key], word_frequencies)[:depth]
+            if ranked:
+                contexts[key] = {"words": [word for word, _ in ranked], "scores": [score for _, score in ranked]}
+        total = sum(occurrences.values())
+        stats[order] = {
+            "contexts": len(keys),
+            "cached": len(selected),
+            "occurrenceCoverage": round(sum(occurrences[k] for k in selected) / total, 4) if total else 0,
+        }
+    return {"depth": depth, "coverage": coverage, "contexts": contexts}, stats
+
+
+def store_in_dict(dict_path: Path, bigrams: dict, trigrams: dict, coverage: float, depth: int,
+                  user_defaults: Optional[Path] = USER_DEFAULTS):
+    """Write n-grams and the next-word cache into an existing .dict (CBOR)."""
+    from build_symspell_dict import import_cbor2, load_input
+    cbor2 = import_cbor2()
+
+    index = load_input(str(dict_path))
+    cache, stats = build_next_word_cache(bigrams, trigrams, exact_word_frequencies(index, user_defaults),
+                                         coverage, depth)
+    index["bigrams"] = bigrams
+    index["trigrams"] = trigrams
+    index["nextWordCache"] = cache
+    with open(dict_path, 'wb') as f:
+        cbor2.dump(index, f)
+
+    cache_kb = len(cbor2.dumps(cache)) / 1024
+    print(f"Stored n-grams and next-word cache in {dict_path} ({cache_kb:.0f} KB cache)")
+    for order, order_stats in stats.items():
+        print(f"  {order} contexts: {order_stats['cached']}/{order_stats['contexts']} cached, "
+              f"{order_stats['occurrenceCoverage']:.1%} of occurrences")
+
+
 def main():
     parser = argparse.ArgumentParser(description='Extract n-grams from text corpora')
     parser.add_argument('input_file', help='Input text file')
     parser.add_argument('output_bigrams', help='Output JSON file for bigrams')
     parser.add_argument('output_trigrams', help='Output JSON file for trigrams')
     parser.add_argument('--min-freq', type=int, default=1, help='Minimum frequency to include (default: 1)')
+    parser.add_argument('--token-cache', type=Path, default=None,
+                        help='Token cache prefix (see tokenize_corpus.py); tokenizes once, counts with NumPy')
+    parser.add_argument('--dictionary', type=Path, default=None,
+                        help='Dictionary JSON used to assign token IDs when building the token cache')
+    parser.add_argument('--dict', type=Path, default=None,
+                        help='Also store the n-grams and a next-word cache in this .dict (CBOR)')
+    parser.add_argument('--coverage', type=float, default=0.8,
+                        help='Share of context occurrences the next-word cache covers (default: 0.8)')
+    parser.add_argument('--cache-depth', type=int, default=18,
+                        help='Predictions cached per context; larger requests use the full model (default: 18)')
     
     args = parser.parse_args()
     
-    bigrams, trigrams = extract_ngrams(args.input_file, args.min_freq)
+    if args.token_cache is not None:
+        bigrams, trigrams = extract_ngrams_cached(args.input_file, args.token_cache, args.min_freq, args.dictionary)
+    else:
+        bigrams, trigrams = extract_ngrams(args.input_file, args.min_freq)
     
     save_json(bigrams, args.output_bigrams)
     save_json(trigrams, args.output_trigrams)
+    if args.dict is not None:
+        store_in_dict(args.dict, bigrams, trigrams, args.coverage, args.cache_depth)
     
     print("\nDone!")
 
@@ -7,19 +7,27 @@ and intelligently merges frequencies.
 
 Usage:
     python merge_dictionaries.py input1.json input2.json ... --output merged.json [--strategy STRATEGY]
+        [--weights W1 W2 ...] [--normalize]
 
 Merge Strategies:
     - max: Use maximum frequency when duplicates found
     - sum: Sum frequencies for duplicates
     - avg: Average frequencies for duplicates
-    - weighted: Weighted average (first source has higher weight)
+    - weighted: Weighted average over the sources containing the word
+      (default weights: first source 0.6, the others share 0.4)
+
+Options:
+    --weights    Per-source weights for the weighted strategy, one per input file
+    --normalize  Rescale every source to per-million frequencies before merging,
+                 so a large corpus does not drown a small one. The merged result
+                 is scaled back to the first source's corpus size.
 """
 
 import argparse
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 
 
@@ -86,85 +94,185 @@ def merge_avg_frequency(entries: List[Dict]) -> Dict:
     }
 
 
-def merge_weighted_frequency(entries: List[Dict], weights: List[float] = None) -> Dict:
-    """Merge strategy: Weighted average (first source has higher weight)."""
-    if not entries:
-        return None
-    
+def default_source_weights(source_count: int) -> List[float]:
+    """Default weights: first source gets 0.6, the others share 0.4."""
+    if source_count <= 1:
+        return [1.0] * source_count
+    return [0.6] + [0.4 / (source_count - 1)] * (source_count - 1)
+
+
+def normalize_source_sizes(sources: List[List[Dict]]) -> List[List[Dict]]:
+    """
+    Rescale each source to per-million frequencies.
+
+    Frequencies are then multiplied back by the first source's corpus size
+    (in millions), which keeps integer precision for rare words while making
+    all sources comparable.
+    """
+    totals = [sum(e.get('f', 0) for e in entries) for entries in sources]
+    reference = next((t for t in totals if t > 0), 0)
+
+    scaled_sources = []
+    for entries, total in zip(sources, totals):
+        if total <= 0:
+            scaled_sources.append(entries)
+            continue
+        # per-million, then back to the reference corpus size
+        factor = (1_000_000 / total) * (reference / 1_000_000)
+        scaled_sources.append([{**e, 'f': e.get('f', 0) * factor} for e in entries])
+    return scaled_sources
+
+
+def merge_weighted_sources(sources: List[List[Dict]], weights: Optional[List[float]] = None) -> List[Dict]:
+    """
+    Merge strategy: Weighted average, computed over all sources at once.
+
+    Builds a (words x sources) frequency matrix and averages each row using
+    the weights of the sources that actually contain the word. Duplicate
+    spellings inside one source (e.g. "Casa" and "casa") are summed.
+    The original case is taken from the first occurrence in source order.
+    Without numpy the same average is computed row by row in pure Python.
+    """
     if weights is None:
-        # Default: first entry gets 0.6, others share 0.4
-        weights = [0.6] + [0.4 / (len(entries) - 1)] * (len(entries) - 1) if len(entries) > 1 else [1.0]
-    
-    weighted_sum = sum(e.get('f', 0) * w for e, w in zip(entries, weights))
-    return {
-        'w': entries[0]['w'],
-        'f': int(weighted_sum)
-    }
+        weights = default_source_weights(len(sources))
+
+    row_of: Dict[str, int] = {}
+    display_words: List[str] = []
+    rows: List[int] = []
+    cols: List[int] = []
+    values: List[float] = []
+
+    for col, entries in enumerate(sources):
+        for entry in entries:
+            word = entry.get('w', '')
+            if not word:
+                continue
+            normalized = normalize_word(word)
+            row = row_of.get(normalized)
+            if row is None:
+                row = len(display_words)
+                row_of[normalized] = row
+                display_words.append(word)
+            rows.append(row)
+            cols.append(col)
+            values.append(entry.get('f', 0))
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("Warning: numpy not installed, using the slower pure-Python merge (pip install numpy)")
+        return weighted_average_rows(display_words, rows, cols, values, weights)
+
+    shape = (len(display_words), len(sources))
+    freqs = np.zeros(shape, dtype=np.float64)
+    np.add.at(freqs, (rows, cols), values)
+    present = np.zeros(shape, dtype=bool)
+    present[rows, cols] = True
+
+    w = np.asarray(weights, dtype=np.float64)
+    weight_sums = (present * w).sum(axis=1)
+    merged = np.divide(freqs @ w, weight_sums, out=np.zeros(shape[0]), where=weight_sums > 0)
+
+    return [{'w': word, 'f': int(freq)} for word, freq in zip(display_words, merged.tolist())]
+
+
+def weighted_average_rows(display_words: List[str], rows: List[int], cols: List[int],
+                          values: List[float], weights: List[float]) -> List[Dict]:
+    """Pure-Python version of the matrix average in merge_weighted_sources()."""
+    freqs: List[Dict[int, float]] = [defaultdict(float) for _ in display_words]
+    for row, col, value in zip(rows, cols, values):
+        freqs[row][col] += value
+
+    merged = []
+    for word, row_freqs in zip(display_words, freqs):
+        weight_sum = sum(weights[col] for col in row_freqs)
+        freq = sum(f * weights[col] for col, f in row_freqs.items()) / weight_sum if weight_sum > 0 else 0
+        merged.append({'w': word, 'f': int(freq)})
+    return merged
 
 
 def merge_dictionaries(
     input_files: List[Path],
     output_file: Path,
     strategy: str = 'max',
-    min_frequency: int = 1
+    min_frequency: int = 1,
+    weights: Optional[List[float]] = None,
+    normalize: bool = False
 ) -> bool:
     """Merge multiple dictionary files into one."""
     
     print(f"Merging {len(input_files)} dictionary files...")
     print(f"Strategy: {strategy}")
+    if strategy == 'weighted':
+        shown = weights if weights is not None else default_source_weights(len(input_files))
+        print(f"Weights: {', '.join(f'{w:.3f}' for w in shown)}")
+    print(f"Per-million normalization: {'on' if normalize else 'off'}")
     print(f"Minimum frequency: {min_frequency}")
     print()
     
-    # Load all dictionaries
-    all_entries = []
+    # Load all dictionaries (kept per source so weights/normalization can apply)
+    sources: List[List[Dict]] = []
     for input_file in input_files:
         entries = load_dictionary(input_file)
         print(f"Loaded {len(entries)} entries from {input_file.name}")
-        all_entries.extend(entries)
+        sources.append(entries)
     
-    if not all_entries:
+    total_entries = sum(len(entries) for entries in sources)
+    if not total_entries:
         print("Error: No entries loaded from input files")
         return False
     
-    # Group by normalized word
-    word_groups: Dict[str, List[Dict]] = defaultdict(list)
-    for entry in all_entries:
-        word = entry.get('w', '')
-        if not word:
-            continue
-        normalized = normalize_word(word)
-        word_groups[normalized].append(entry)
-    
-    print(f"\nFound {len(word_groups)} unique words (after normalization)")
-    print(f"Total entries before merge: {len(all_entries)}")
-    
-    # Merge entries based on strategy
-    merge_strategies = {
-        'max': merge_max_frequency,
-        'sum': merge_sum_frequency,
-        'avg': merge_avg_frequency,
-        'weighted': merge_weighted_frequency
-    }
-    
-    merge_func = merge_strategies.get(strategy, merge_max_frequency)
-    
-    merged_entries = []
-    duplicates_count = 0
+    if normalize:
+        sources = normalize_source_sizes(sources)
     
-    for normalized, entries in word_groups.items():
-        if len(entries) > 1:
-            duplicates_count += len(entries) - 1
-            merged = merge_func(entries)
-        else:
-            merged = entries[0]
+    if strategy == 'weighted':
+        merged_entries = [e for e in merge_weighted_sources(sources, weights) if e['f'] >= min_frequency]
+        print(f"\nFound {len(merged_entries)} unique words (after normalization and filtering)")
+        print(f"Total entries before merge: {total_entries}")
+        print(f"Merged {total_entries - len(merged_entries)} duplicate or filtered entries")
+    else:
+        # Group by normalized word
+        word_groups: Dict[str, List[Dict]] = defaultdict(list)
+        for entries in sources:
+            for entry in entries:
+                word = entry.get('w', '')
+                if not word:
+                    continue
+                normalized = normalize_word(word)
+                word_groups[normalized].append(entry)
         
-        if merged and merged.get('f', 0) >= min_frequency:
-            merged_entries.append(merged)
+        print(f"\nFound {len(word_groups)} unique words (after normalization)")
+        print(f"Total entries before merge: {total_entries}")
+        
+        # Merge entries based on strategy
+        merge_strategies = {
+            'max': merge_max_frequency,
+            'sum': merge_sum_frequency,
+            'avg': merge_avg_frequency,
+        }
+        
+        merge_func = merge_strategies.get(strategy, merge_max_frequency)
+        
+        merged_entries = []
+        duplicates_count = 0
+        
+        for normalized, entries in word_groups.items():
+            if len(entries) > 1:
+                duplicates_count += len(entries) - 1
+                merged = merge_func(entries)
+            else:
+                merged = entries[0]
+            
+            if merged:
+                merged = {'w': merged['w'], 'f': int(merged.get('f', 0))}
+                if merged['f'] >= min_frequency:
+                    merged_entries.append(merged)
+        
+        print(f"Merged {duplicates_count} duplicate entries")
     
     # Sort by frequency (descending)
     merged_entries.sort(key=lambda e: e.get('f', 0), reverse=True)
     
-    print(f"Merged {duplicates_count} duplicate entries")
     print(f"Final dictionary: {len(merged_entries)} entries")
     
     # Write output
@@ -189,9 +297,21 @@ def main():
                        default='max', help='Merge strategy for duplicate words')
     parser.add_argument('--min-freq', '-m', type=int, default=1,
                        help='Minimum frequency to include in output')
+    parser.add_argument('--weights', '-w', type=float, nargs='+', default=None,
+                       help='Per-source weights for the weighted strategy (one per input, in order)')
+    parser.add_argument('--normalize', '-n', action='store_true',
+                       help='Normalize each source to per-million frequencies before merging')
     
     args = parser.parse_args()
     
+    if args.weights is not None:
+        if len(args.weights) != len(args.inputs):
+            print(f"Error: Got {len(args.weights)} weights for {len(args.inputs)} input files")
+            return 1
+        if any(w < 0 for w in args.weights) or sum(args.weights) <= 0:
+            print("Error: Weights must be non-negative and not all zero")
+            return 1
+    
     # Validate input files
     for input_file in args.inputs:
         if not input_file.exists():
@@ -201,7 +321,10 @@ def main():
     # Create output directory if needed
     args.output.parent.mkdir(parents=True, exist_ok=True)
     
-    success = merge_dictionaries(args.inputs, args.output, args.strategy, args.min_freq)
+    success = merge_dictionaries(
+        args.inputs, args.output, args.strategy, args.min_freq,
+        weights=args.weights, normalize=args.normalize
+    )
     return 0 if success else 1
 
 
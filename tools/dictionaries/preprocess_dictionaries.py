@@ -4,6 +4,7 @@ Pre-process JSON dictionaries into serialized format for faster loading.
 Converts *_base.json files to *_base.dict files (JSON serialized format).
 """
 
+import argparse
 import json
 import os
 import sys
@@ -107,6 +108,11 @@ def process_dictionary(json_file_path, output_dir):
 
 def main():
     """Main function."""
+    parser = argparse.ArgumentParser(
+        description="Pre-process *_base.json dictionaries into serialized .dict files"
+    )
+    parser.parse_args()
+
     print("=" * 60)
     print("Dictionary Pre-processing Script (Python)")
     print("=" * 60)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Python reference of the app's SymSpell lookup (core/suggestions/SymSpell.kt).
+
+The engine reproduces what the keyboard does with a .dict file:
+
+    - DictionaryRepository: term frequencies are the best effectiveFrequency()
+      of each normalized term; symDeletes buckets hold full terms or (older
+      builds) prefix keys, which are expanded to every term with that prefix
+    - SymSpell.lookup: breadth-first deletes of the input's first
+      prefixLength characters, each bucket term verified against the whole
+      input with the limited Damerau (optimal string alignment) distance,
+      sorted by distance, frequency (descending) and term length
+    - corrections (build_correction_cache.py): typos in the precomputed
+      table are answered from it when at most correctionMeta.depth
+      suggestions are requested
+
+Results, including the order of ties, match the Kotlin implementation, so
+index parameters can be evaluated at build time (see benchmark_symspell.py).
+
+Usage:
+    python symspell.py --input it_base.dict helo cane gatoo
+    python symspell.py --input it_base.json --max_edit_distance 2 --prefix_length 4 helo
+"""
+
+import argparse
+import sys
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from build_symspell_dict import generate_deletes, load_input, normalize
+
+# DictionaryRepository.effectiveFrequency
+MAX_RAW_FREQUENCY = 255.0
+SCALED_FREQUENCY_MAX = 1600.0
+
+
+class SuggestItem(NamedTuple):
+    term: str
+    distance: int
+    frequency: int
+
+
+def effective_frequency(raw: int) -> int:
+    """Non-linear 0-255 -> 1-1600 scaling applied to dictionary frequencies by the app."""
+    raw = min(max(raw, 0), int(MAX_RAW_FREQUENCY))
+    return max(int((raw / MAX_RAW_FREQUENCY) ** 0.75 * SCALED_FREQUENCY_MAX), 1)
+
+
+def damerau_distance_limited(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or -1 once it must exceed max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return -1
+    prev = list(range(len(b) + 1))
+    curr = [0] * (len(b) + 1)
+    prev_prev = [0] * (len(b) + 1)
+
+    for i in range(1, len(a) + 1):
+        curr[0] = i
+        min_row = curr[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev_prev[j - 2] + 1)
+            curr[j] = value
+            if value < min_row:
+                min_row = value
+        if min_row > max_distance:
+            return -1
+        prev_prev, prev, curr = prev, curr, prev_prev
+    return prev[len(b)] if prev[len(b)] <= max_distance else -1
+
+
+class SymSpell:
+    """Delete-only SymSpell over normalized terms, up to max_edit_distance."""
+
+    def __init__(self, max_edit_distance: int = 2, prefix_length: int = 7):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        # term -> frequency
+        self.dictionary: Dict[str, int] = {}
+        # delete -> terms that produced it
+        self.deletes: Dict[str, List[str]] = {}
+        # Damerau verifications run by lookup() so far (the dominant lookup cost)
+        self.verifications = 0
+        # typo -> precomputed lookup result, and how many suggestions each one holds
+        self.corrections: Dict[str, List[SuggestItem]] = {}
+        self.correction_depth = 0
+
+    def add_word(self, term: str, frequency: int):
+        if not term:
+            return
+        existing = self.dictionary.get(term)
+        if existing is None or frequency > existing:
+            self.dictionary[term] = frequency
+
+        for delete in generate_deletes(term[:self.prefix_length], self.max_edit_distance):
+            bucket = self.deletes.setdefault(delete, [])
+            # A new term cannot be in any bucket yet; skip the linear scan
+            if existing is None or term not in bucket:
+                bucket.append(term)
+
+        if self.corrections:
+            # Only typos within reach of the term can get a different result
+            self.corrections = {typo: items for typo, items in self.corrections.items()
+                                if damerau_distance_limited(typo, term, self.max_edit_distance) < 0}
+
+    def load_serialized(self, terms: Dict[str, int], deletes: Dict[str, List[str]]):
+        self.dictionary = dict(terms)
+        self.deletes = {delete: list(bucket) for delete, bucket in deletes.items()}
+        self.corrections = {}
+
+    def load_corrections(self, corrections: Dict[str, List[str]], depth: int):
+        """Precomputed lookups, "<distance><term>" encoded (build_correction_cache.py)."""
+        self.corrections = {
+            typo: [SuggestItem(entry[1:], int(entry[0]), self.dictionary.get(entry[1:], 0)) for entry in entries]
+            for typo, entries in corrections.items()
+        }
+        self.correction_depth = depth
+
+    def lookup(self, input_term: str, max_suggestions: int = 8) -> List[SuggestItem]:
+        if not input_term:
+            return []
+        cached = self.corrections.get(input_term)
+        if cached is not None and (max_suggestions <= self.correction_depth or len(cached) < self.correction_depth):
+            return cached[:max_suggestions]
+        suggestions: Dict[str, SuggestItem] = {}
+        dictionary = self.dictionary
+        max_distance = self.max_edit_distance
+
+        input_prefix = input_term[:self.prefix_length]
+        queue = deque([input_prefix])
+        considered = {input_prefix}
+
+        # direct hit
+        if input_term in dictionary:
+            suggestions[input_term] = SuggestItem(input_term, 0, dictionary[input_term])
+
+        while queue:
+            candidate = queue.popleft()
+            distance = len(input_prefix) - len(candidate)
+            if distance > max_distance:
+                continue
+
+            # candidate is a delete; see if it maps to any terms
+            for term in self.deletes.get(candidate, ()):
+                if term in suggestions:
+                    continue
+                self.verifications += 1
+                edit_distance = damerau_distance_limited(input_term, term, max_distance)
+                if 0 <= edit_distance <= max_distance:
+                    suggestions[term] = SuggestItem(term, edit_distance, dictionary.get(term, 0))
+
+            # enqueue next deletes
+            if distance < max_distance:
+                for i in range(len(candidate)):
+                    delete = candidate[:i] + candidate[i + 1:]
+                    if delete not in considered:
+                        considered.add(delete)
+                        queue.append(delete)
+
+        # Sort by distance asc, frequency desc, length asc (stable, like sortedWith) and trim
+        ranked = sorted(suggestions.values(), key=lambda s: (s.distance, -s.frequency, len(s.term)))
+        return ranked[:max_suggestions]
+
+    def lookup_batch(self, inputs: Iterable[str], max_suggestions: int = 8) -> List[List[SuggestItem]]:
+        """lookup() for many inputs; repeated inputs are looked up once."""
+        results: Dict[str, List[SuggestItem]] = {}
+        output = []
+        for input_term in inputs:
+            if input_term not in results:
+                results[input_term] = self.lookup(input_term, max_suggestions)
+            output.append(results[input_term])
+        return output
+
+    @classmethod
+    def from_index(cls, index: Dict, max_edit_distance: Optional[int] = None,
+                   prefix_length: Optional[int] = None) -> "SymSpell":
+        """
+        Engine for a DictionaryIndex (a loaded .dict or base JSON, see load_input()).
+
+        With symDeletes/symMeta the precomputed deletes (and corrections, if
+        any) are loaded like DictionaryRepository does; otherwise (or when
+        parameters are overridden) deletes are generated with add_word(), like
+        buildSymSpell().
+        """
+        meta = index.get("symMeta") or {}
+        precomputed = index.get("symDeletes") is not None and meta and (
+            max_edit_distance in (None, meta["maxEditDistance"])
+            and prefix_length in (None, meta["prefixLength"])
+        )
+        engine = cls(
+            max_edit_distance if max_edit_distance is not None else meta.get("maxEditDistance", 2),
+            prefix_length if prefix_length is not None else meta.get("prefixLength", 4),
+        )
+
+        term_frequencies = {
+            norm: max((effective_frequency(int(e.get("frequency", 0))) for e in entries), default=0)
+            for norm, entries in index["normalizedIndex"].items()
+        }
+        if not precomputed:
+            for norm, frequency in term_frequencies.items():
+                engine.add_word(norm, frequency)
+            return engine
+
+        prefix_to_terms: Dict[str, List[str]] = {}
+        for term in term_frequencies:
+            prefix_to_terms.setdefault(term[:engine.prefix_length], []).append(term)
+        expanded: Dict[str, List[str]] = {}
+        for delete, terms in index["symDeletes"].items():
+            targets = {}
+            for term in terms:
+                if term in term_frequencies:
+                    targets[term] = None
+                else:
+                    targets.update(dict.fromkeys(prefix_to_terms.get(term, ())))
+            if targets:
+                expanded[delete] = list(targets)
+        engine.load_serialized(term_frequencies, expanded)
+        correction_meta = index.get("correctionMeta")
+        if index.get("corrections") and correction_meta and (
+            correction_meta["maxEditDistance"] == engine.max_edit_distance
+            and correction_meta["prefixLength"] == engine.prefix_length
+        ):
+            engine.load_corrections(index["corrections"], correction_meta["depth"])
+        return engine
+
+
+def load_engine(path: str, max_edit_distance: Optional[int] = None,
+                prefix_length: Optional[int] = None) -> SymSpell:
+    """SymSpell for a .dict (CBOR/JSON) or base JSON file."""
+    return SymSpell.from_index(load_input(path), max_edit_distance, prefix_length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up words with the reference SymSpell engine")
+    parser.add_argument("--input", required=True, help="Path to a .dict or base JSON dictionary")
+    parser.add_argument("--max_edit_distance", type=int, default=None,
+                        help="Override symMeta (regenerates deletes)")
+    parser.add_argument("--prefix_length", type=int, default=None,
+                        help="Override symMeta (regenerates deletes)")
+    parser.add_argument("--max_suggestions", type=int, default=8)
+    parser.add_argument("words", nargs="+", help="Words to look up (normalized like the app)")
+    args = parser.parse_args()
+
+    engine = load_engine(args.input, args.max_edit_distance, args.prefix_length)
+    print(f"Loaded {len(engine.dictionary)} terms, {len(engine.deletes)} delete buckets "
+          f"(maxEditDistance={engine.max_edit_distance}, prefixLength={engine.prefix_length})")
+
+    words = [normalize(word) for word in args.words]
+    for word, suggestions in zip(words, engine.lookup_batch(words, args.max_suggestions)):
+        formatted = ", ".join(f"{s.term} (d={s.distance}, f={s.frequency})" for s in suggestions)
+        print(f"  {word}: {formatted or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Shard routing of build_sharded_dict.py for both strategies, including empty-key terms."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from build_sharded_dict import ShardedDictionary, verify, write_sharded  # noqa: E402
+from build_symspell_dict import build_index, build_sym_deletes  # noqa: E402
+
+WORDS = [
+    ("il", 900), ("di", 850), ("che", 800), ("è", 790), ("e", 780), ("la", 700), ("Mario", 650), ("casa", 600),
+    ("città", 550), ("perché", 500), ("più", 480), ("zio", 300), ("zero", 290), ("amico", 280), ("andare", 270),
+    ("bello", 260), ("buono", 250), ("dove", 240), ("fare", 230), ("gatto", 220), ("hotel", 210), ("io", 200),
+    ("lago", 190), ("mare", 180), ("notte", 170), ("oggi", 160), ("pane", 150), ("quando", 140), ("roma", 130),
+    ("sole", 120), ("tempo", 110), ("uva", 100), ("vino", 90), ("week", 80), ("xilofono", 70), ("yoga", 60),
+    # Normalize to "" (no letters): the terms aab735b kept in the initial-letter shards
+    ("½", 50), ("42", 40),
+]
+
+
+def source_index():
+    index = build_index([{"w": word, "f": frequency} for word, frequency in WORDS])
+    index["symDeletes"] = build_sym_deletes(index["normalizedIndex"], 1, 4)
+    index["symMeta"] = {"maxEditDistance": 1, "prefixLength": 4, "bucketOrder": "frequency", "keyStrategy": "term"}
+    return index
+
+
+def entry_keys(entries):
+    return sorted((e["word"], e["frequency"], e.get("source", 0)) for e in entries)
+
+
+class ShardRoutingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = source_index()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, strategy, **options):
+        prefix = str(Path(self.tmp.name) / f"it_base_{strategy}")
+        manifest = write_sharded(prefix, self.index, strategy, language="it", **options)
+        self.assertGreater(len(manifest["shards"]), 2)
+        return f"{prefix}.manifest.json"
+
+    def check_lookups(self, reader):
+        for norm, entries in self.index["normalizedIndex"].items():
+            self.assertEqual(reader.lookup(norm), entries, norm)
+        for prefix, bucket in self.index["prefixCache"].items():
+            self.assertEqual(entry_keys(reader.prefix(prefix)), entry_keys(bucket), prefix)
+        self.assertEqual(reader.lookup("parolamancante"), [])
+
+    def test_tier(self):
+        manifest = self.build("tier", hot_words=8, tier_words=10)
+        self.assertEqual(verify(manifest, self.index), [])
+        reader = ShardedDictionary(manifest)
+        self.check_lookups(reader)
+        self.assertEqual([entry["word"] for entry in reader.lookup("")], ["½", "42"])
+
+        # The hot shard alone answers with the head of the frequency-sorted bucket
+        reader = ShardedDictionary(manifest)
+        reader.load_shard(0)
+        self.assertEqual([e["word"] for e in reader.prefix("c", loaded_only=True)], ["che", "casa", "città"])
+
+    def test_initial(self):
+        manifest = self.build("initial", shards=4)
+        self.assertEqual(verify(manifest, self.index), [])
+        reader = ShardedDictionary(manifest)
+        self.check_lookups(reader)
+        for norm in self.index["normalizedIndex"]:
+            self.assertEqual(len(reader.route(norm)), 1, norm)
+
+        # Empty-key terms live in the first shard, whose range starts at ""
+        self.assertEqual(reader.manifest["shards"][0]["keyRange"][0], "")
+        self.assertEqual(reader.route(""), [0])
+        self.assertIn("", reader.load_shard(0)["normalizedIndex"])
+        self.assertEqual([entry["word"] for entry in reader.lookup("")], ["½", "42"])
+
+        # A lookup loads only the shard it routes to
+        reader = ShardedDictionary(manifest)
+        reader.lookup("zio")
+        self.assertEqual(list(reader.shards), reader.route("z"))
+
+
+if __name__ == "__main__":
+    unittest.main()
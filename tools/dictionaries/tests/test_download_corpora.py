@@ -0,0 +1,131 @@
+"""fetch_to_cache() against a local http.server: fresh, 304, Range/If-Range resume and 416 restart."""
+
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from download_corpora import DownloadCache, fetch_to_cache  # noqa: E402
+
+BODY = b"".join(b"word%d %d\n" % (i, 1000 - i) for i in range(1000))
+
+
+class CorpusHandler(BaseHTTPRequestHandler):
+    """Serves `body` with an ETag, answering conditional and Range requests like a CDN."""
+
+    body = BODY
+    etag = '"v1"'
+    last_modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", self.etag) == self.etag:
+            start = int(range_header[len("bytes="):].rstrip("-"))
+            if start >= len(self.body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(self.body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(self.body) - 1}/{len(self.body)}")
+        else:
+            self.send_response(200)
+        data = self.body[start:]
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", self.last_modified)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetchToCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CorpusHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/it_50k.txt"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        CorpusHandler.body = BODY
+        CorpusHandler.etag = '"v1"'
+        CorpusHandler.requests = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DownloadCache(Path(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cached_bytes(self, record):
+        return self.cache.object_path(record["sha256"]).read_bytes()
+
+    def write_partial(self, data, etag):
+        self.cache.partial_path(self.url).write_bytes(data)
+        if etag is not None:
+            self.cache.start_partial(self.url, etag, CorpusHandler.last_modified)
+
+    def test_fresh_download(self):
+        record = fetch_to_cache(self.url, self.cache)
+        self.assertEqual(record["status"], "downloaded")
+        self.assertEqual(record["etag"], '"v1"')
+        self.assertEqual(self.cached_bytes(record), BODY)
+        self.assertFalse(self.cache.partial_path(self.url).exists())
+
+    def test_not_modified_reuses_cached_object(self):
+        first = fetch_to_cache(self.url, self.cache)
+        second = fetch_to_cache(self.url, DownloadCache(Path(self.tmp.name)))
+        self.assertEqual(second["status"], "not-modified")
+        self.assertEqual(second["sha256"], first["sha256"])
+        self.assertEqual(CorpusHandler.requests[-1].get("If-None-Match"), '"v1"')
+
+    def test_resumes_partial_download(self):
+        self.write_partial(BODY[:4000], '"v1"')
+        record = fetch_to_cache(self.url, self.cache)
+        self.assertEqual(record["status"], "resumed")
+        self.assertEqual(self.cached_bytes(record), BODY)
+        self.assertEqual(CorpusHandler.requests[-1].get("Range"), "bytes=4000-")
+        self.assertEqual(CorpusHandler.requests[-1].get("If-Range"), '"v1"')
+
+    def test_changed_resource_restarts_instead_of_splicing(self):
+        self.write_partial(BODY[:4000], '"v0"')
+        record = fetch_to_cache(self.url, self.cache)
+        self.assertEqual(record["status"], "downloaded")
+        self.assertEqual(self.cached_bytes(record), BODY)
+
+    def test_partial_without_validator_is_discarded(self):
+        self.write_partial(b"stale bytes", None)
+        record = fetch_to_cache(self.url, self.cache)
+        self.assertEqual(record["status"], "downloaded")
+        self.assertEqual(self.cached_bytes(record), BODY)
+        self.assertNotIn("Range", CorpusHandler.requests[-1])
+
+    def test_range_past_end_restarts(self):
+        self.write_partial(BODY + b"extra", '"v1"')
+        record = fetch_to_cache(self.url, self.cache)
+        self.assertEqual(record["status"], "downloaded")
+        self.assertEqual(self.cached_bytes(record), BODY)
+        self.assertEqual(len(CorpusHandler.requests), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Tokenize a text corpus once into a memory-mapped uint32 token-ID array.
+
+Re-tokenizing and re-normalizing a large corpus on every n-gram run is the
+slowest part of the pipeline. This script does it once and writes:
+
+    PREFIX.tokens.u32   - token IDs of all sentences, concatenated (uint32)
+    PREFIX.offsets.u64  - start offset of every sentence, plus the total length (uint64)
+    PREFIX.vocab.txt    - one normalized word per line; the line number is the token ID
+    PREFIX.meta.json    - counts and the source file stamp used to validate the cache
+
+Token ID 0 is reserved for <unk>. When a dictionary is given, its words are
+assigned the lowest IDs in descending frequency order; other corpus words are
+appended in first-seen order (or mapped to <unk> with --dictionary-only).
+Each non-empty line of the corpus is one sentence, and words are normalized
+exactly like extract_ngrams.py does, so n-gram counts are identical.
+
+Usage:
+    python tokenize_corpus.py corpus.txt --output corpora/it_corpus [--dictionary it_base.json] [--dictionary-only]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from extract_ngrams import extract_words, normalize_word
+
+UNK_TOKEN = "<unk>"
+UNK_ID = 0
+FLUSH_TOKENS = 1 << 20
+# Bumped whenever normalization or the on-disk layout changes
+TOKENIZER_VERSION = 1
+
+
+def source_stamp(path: Path) -> Dict:
+    """Size and mtime of the source corpus, used to detect a stale cache."""
+    stat = path.stat()
+    return {"path": str(path.resolve()), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def load_dictionary_vocab(dictionary_file: Path) -> List[str]:
+    """Normalized dictionary words, most frequent first, without duplicates."""
+    with open(dictionary_file, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    entries = sorted(entries, key=lambda e: int(e.get('f', 0)), reverse=True)
+    words = []
+    seen = set()
+    for entry in entries:
+        word = normalize_word(entry.get('w', ''))
+        if len(word) > 1 and word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def tokenize_corpus(
+    input_file: Path,
+    output_prefix: Path,
+    dictionary_file: Optional[Path] = None,
+    dictionary_only: bool = False
+) -> Dict:
+    """Tokenize input_file into the PREFIX.* cache files and return the metadata."""
+    import numpy as np
+
+    vocab: List[str] = [UNK_TOKEN]
+    if dictionary_file is not None:
+        vocab.extend(load_dictionary_vocab(dictionary_file))
+    ids: Dict[str, int] = {word: i for i, word in enumerate(vocab)}
+    dictionary_size = len(vocab)
+
+    output_prefix.parent.mkdir(parents=True, exist_ok=True)
+    tokens_path = Path(f"{output_prefix}.tokens.u32")
+    offsets_path = Path(f"{output_prefix}.offsets.u64")
+
+    print(f"Tokenizing {input_file}...")
+    buffer: List[int] = []
+    offsets: List[int] = [0]
+    total = 0
+    unk_count = 0
+    line_count = 0
+
+    with open(input_file, 'r', encoding='utf-8', errors='ignore') as f, \
+            open(tokens_path, 'wb') as out:
+        for line in f:
+            line_count += 1
+            if line_count % 10000 == 0:
+                print(f"  Processed {line_count} lines...", end='\r')
+
+            words = extract_words(line)
+            if not words:
+                continue
+            for word in words:
+                token = ids.get(word)
+                if token is None:
+                    if dictionary_only:
+                        token = UNK_ID
+                        unk_count += 1
+                    else:
+                        token = len(vocab)
+                        ids[word] = token
+                        vocab.append(word)
+                buffer.append(token)
+            total += len(words)
+            offsets.append(total)
+
+            if len(buffer) >= FLUSH_TOKENS:
+                np.asarray(buffer, dtype=np.uint32).tofile(out)
+                buffer.clear()
+
+        if buffer:
+            np.asarray(buffer, dtype=np.uint32).tofile(out)
+
+    np.asarray(offsets, dtype=np.uint64).tofile(offsets_path)
+
+    with open(f"{output_prefix}.vocab.txt", 'w', encoding='utf-8') as f:
+        for word in vocab:
+            f.write(f"{word}\n")
+
+    meta = {
+        "version": TOKENIZER_VERSION,
+        "source": source_stamp(input_file),
+        "dictionary": source_stamp(dictionary_file) if dictionary_file is not None else None,
+        "dictionaryOnly": dictionary_only,
+        "vocabSize": len(vocab),
+        "dictionaryVocabSize": dictionary_size,
+        "sentences": len(offsets) - 1,
+        "tokens": total,
+        "unknownTokens": unk_count,
+    }
+    with open(f"{output_prefix}.meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    print(f"\n  Processed {line_count} lines total")
+    print(f"  [OK] {total} tokens in {meta['sentences']} sentences, vocabulary {len(vocab)} "
+          f"({dictionary_size - 1} from dictionary, {unk_count} unknown tokens)")
+    return meta
+
+
+def is_cache_valid(output_prefix: Path, input_file: Path,
+                   dictionary_file: Optional[Path] = None, dictionary_only: bool = False) -> bool:
+    """True if PREFIX.* was produced from the same corpus/dictionary with the same settings."""
+    meta_path = Path(f"{output_prefix}.meta.json")
+    if not meta_path.exists():
+        return False
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    expected_dictionary = source_stamp(dictionary_file) if dictionary_file is not None else None
+    return (
+        meta.get("version") == TOKENIZER_VERSION
+        and meta.get("source") == source_stamp(input_file)
+        and meta.get("dictionary") == expected_dictionary
+        and meta.get("dictionaryOnly") == dictionary_only
+        and all(Path(f"{output_prefix}{suffix}").exists()
+                for suffix in (".tokens.u32", ".offsets.u64", ".vocab.txt"))
+    )
+
+
+def load_tokens(output_prefix: Path):
+    """
+    Open a tokenized corpus.
+
+    Returns (tokens, offsets, vocab): tokens is a read-only uint32 memmap,
+    offsets a uint64 array of sentence starts (with the total length appended),
+    vocab the list of words indexed by token ID.
+    """
+    import numpy as np
+
+    tokens_path = Path(f"{output_prefix}.tokens.u32")
+    if tokens_path.stat().st_size:
+        tokens = np.memmap(tokens_path, dtype=np.uint32, mode='r')
+    else:
+        tokens = np.zeros(0, dtype=np.uint32)
+    offsets = np.fromfile(f"{output_prefix}.offsets.u64", dtype=np.uint64)
+    with open(f"{output_prefix}.vocab.txt", 'r', encoding='utf-8') as f:
+        vocab = [line.rstrip('\n') for line in f]
+    return tokens, offsets, vocab
+
+
+def sentence_ids(offsets):
+    """Sentence index of every token position."""
+    import numpy as np
+
+    lengths = np.diff(offsets.astype(np.int64))
+    return np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+
+
+def ngram_windows(tokens, offsets, n: int, skip_unknown: bool = True):
+    """
+    All n-grams that do not cross a sentence boundary, as an (count, n) array.
+
+    N-grams containing <unk> are dropped unless skip_unknown is False.
+    """
+    import numpy as np
+
+    if len(tokens) < n:
+        return np.zeros((0, n), dtype=np.uint32)
+    sentences = sentence_ids(offsets)
+    starts = len(tokens) - n + 1
+    valid = sentences[:starts] == sentences[n - 1:]
+    windows = np.lib.stride_tricks.sliding_window_view(np.asarray(tokens), n)[valid]
+    if skip_unknown:
+        windows = windows[(windows != UNK_ID).all(axis=1)]
+    return windows
+
+
+def count_ngrams(tokens, offsets, n: int, min_freq: int = 1):
+    """
+    Count n-grams with NumPy.
+
+    Each n-gram is packed into one uint64 key (21 bits per token for n <= 3),
+    so counting is a single np.unique. Returns (ngrams, counts) with ngrams an
+    (unique, n) uint32 array.
+    """
+    import numpy as np
+
+    bits = 64 // n
+    windows = ngram_windows(tokens, offsets, n)
+    if len(windows) and int(windows.max()) >= (1 << bits):
+        raise ValueError(f"Vocabulary too large to pack {n}-grams into 64-bit keys")
+
+    keys = np.zeros(len(windows), dtype=np.uint64)
+    for i in range(n):
+        keys = (keys << np.uint64(bits)) | windows[:, i].astype(np.uint64)
+    unique_keys, counts = np.unique(keys, return_counts=True)
+
+    keep = counts >= min_freq
+    unique_keys = unique_keys[keep]
+    counts = counts[keep]
+
+    mask = np.uint64((1 << bits) - 1)
+    ngrams = np.empty((len(unique_keys), n), dtype=np.uint32)
+    for i in range(n - 1, -1, -1):
+        ngrams[:, i] = (unique_keys & mask).astype(np.uint32)
+        unique_keys = unique_keys >> np.uint64(bits)
+    return ngrams, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tokenize a corpus into a memory-mapped uint32 token array')
+    parser.add_argument('input_file', type=Path, help='Input text file (one sentence per line)')
+    parser.add_argument('--output', '-o', type=Path, required=True,
+                        help='Output prefix (writes PREFIX.tokens.u32, .offsets.u64, .vocab.txt, .meta.json)')
+    parser.add_argument('--dictionary', '-d', type=Path, default=None,
+                        help='Dictionary JSON ([{w, f}]) whose words get the lowest token IDs')
+    parser.add_argument('--dictionary-only', action='store_true',
+                        help='Map words missing from the dictionary to <unk> instead of growing the vocabulary')
+    parser.add_argument('--force', action='store_true', help='Re-tokenize even if the cache is up to date')
+
+    args = parser.parse_args()
+
+    if not args.input_file.exists():
+        print(f"Error: File '{args.input_file}' not found", file=sys.stderr)
+        return 1
+    if args.dictionary_only and args.dictionary is None:
+        print("Error: --dictionary-only requires --dictionary", file=sys.stderr)
+        return 1
+
+    if not args.force and is_cache_valid(args.output, args.input_file, args.dictionary, args.dictionary_only):
+        print(f"[OK] {args.output}.* is up to date, nothing to do")
+        return 0
+
+    tokenize_corpus(args.input_file, args.output, args.dictionary, args.dictionary_only)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Tune SymSpell index parameters per language and write them to symspell_config.json.
+
+For every language the tuner sweeps
+
+    --max_words        dictionary truncation (0 = keep all words)
+    --edit_distances   maxEditDistance
+    --prefix_lengths   prefixLength
+    --key_strategies   symDeletes bucket contents (full terms or prefix keys)
+    --max_bucket_sizes per-bucket cap on frequency-ordered buckets (0 = none)
+
+and for each configuration builds the index exactly like
+build_symspell_dict.py, then measures:
+
+    sizeBytes          serialized .dict size (CBOR; normalizedIndex,
+                       prefixCache and symDeletes)
+    bucketSizes        delete bucket sizes as the app sees them (after
+                       prefix keys are expanded to terms)
+    verifications      Damerau verifications per lookup on a synthetic typo
+                       set (benchmark_symspell.py), the dominant lookup cost
+    recall             recall@k on the same typo set; words are drawn from the
+                       untruncated dictionary, so truncation costs recall
+
+Without a cap the key strategy only changes the file size (the app expands
+prefix keys to the same buckets), so those lookups are measured once. A
+configuration is Pareto-optimal when no other one is at least as small, as
+cheap and as accurate and strictly better in one of them. The chosen
+configuration is the Pareto point with the best recall@k within
+--max_size_mb/--max_verifications; with --write_config it becomes the
+language's entry in symspell_config.json, which build_symspell_dict.py,
+convert_all_to_symspell.py and backup_truncate_and_convert.py read.
+
+Usage:
+    python tune_symspell.py --languages it en --output symspell_tuning.json
+    python tune_symspell.py --max_size_mb 8 --max_verifications 2000 --write_config
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from benchmark_symspell import build_typo_set, evaluate, percentile
+from build_symspell_dict import CONFIG_FILE, KEY_STRATEGIES, build_index, build_sym_deletes, import_cbor2
+from symspell import SymSpell
+
+DICTIONARIES_DIR = Path(__file__).resolve().parent.parent.parent / "app" / "src" / "main" / "assets" / "common" / "dictionaries"
+
+
+def word_length_stats(index: Dict) -> Dict:
+    lengths = sorted(len(norm) for norm in index["normalizedIndex"])
+    return {
+        "terms": len(lengths),
+        "mean": round(statistics.mean(lengths), 2) if lengths else 0,
+        "p50": percentile(lengths, 0.50) if lengths else 0,
+        "p90": percentile(lengths, 0.90) if lengths else 0,
+        "max": lengths[-1] if lengths else 0,
+    }
+
+
+def bucket_stats(engine: SymSpell) -> Dict:
+    sizes = sorted(len(bucket) for bucket in engine.deletes.values())
+    return {
+        "buckets": len(sizes),
+        "entries": sum(sizes),
+        "mean": round(statistics.mean(sizes), 2) if sizes else 0,
+        "p50": percentile(sizes, 0.50) if sizes else 0,
+        "p95": percentile(sizes, 0.95) if sizes else 0,
+        "max": sizes[-1] if sizes else 0,
+    }
+
+
+def dominates(a: Dict, b: Dict) -> bool:
+    """a is no worse than b in size, cost and recall, and better in at least one."""
+    no_worse = (a["sizeBytes"] <= b["sizeBytes"] and a["verificationsMean"] <= b["verificationsMean"]
+                and a["recall"] >= b["recall"])
+    better = (a["sizeBytes"] < b["sizeBytes"] or a["verificationsMean"] < b["verificationsMean"]
+              or a["recall"] > b["recall"])
+    return no_worse and better
+
+
+def mark_pareto(results: List[Dict]):
+    for result in results:
+        result["pareto"] = not any(dominates(other, result) for other in results if other is not result)
+
+
+def choose(results: List[Dict], max_size_bytes: float = None, max_verifications: float = None):
+    """Best-recall Pareto configuration within the budgets (smallest one if none fits)."""
+    front = [r for r in results if r["pareto"]]
+    feasible = [r for r in front
+                if (max_size_bytes is None or r["sizeBytes"] <= max_size_bytes)
+                and (max_verifications is None or r["verificationsMean"] <= max_verifications)]
+    if feasible:
+        return min(feasible, key=lambda r: (-r["recall"], r["verificationsMean"], r["sizeBytes"])), True
+    return min(front, key=lambda r: (r["sizeBytes"], -r["recall"])), False
+
+
+def tune_language(language: str, dictionary_file: Path, settings: Dict) -> Dict:
+    """Sweep all configurations for one language; returns its report section."""
+    cbor2 = import_cbor2()
+    with open(dictionary_file, "r", encoding="utf-8") as f:
+        entries = sorted(json.load(f), key=lambda e: int(e.get("f", 0)), reverse=True)
+
+    full_index = build_index(entries)
+    typo_set = build_typo_set(full_index, settings["samples"], settings["edits"],
+                              settings["top_words"], settings["min_length"], settings["seed"])
+    k = settings["k"]
+
+    results = []
+    for max_words in settings["max_words"]:
+        kept = entries[:max_words] if max_words else entries
+        index = build_index(kept)
+        base_bytes = len(cbor2.dumps({"normalizedIndex": index["normalizedIndex"],
+                                      "prefixCache": index["prefixCache"]}))
+        for edit_distance in settings["edit_distances"]:
+            for prefix_length in settings["prefix_lengths"]:
+                uncapped = None
+                for max_bucket_size in settings["max_bucket_sizes"]:
+                    for key_strategy in settings["key_strategies"]:
+                        start = time.perf_counter()
+                        sym_deletes = build_sym_deletes(index["normalizedIndex"], edit_distance, prefix_length,
+                                                        key_strategy, max_bucket_size=max_bucket_size)
+                        deletes_bytes = len(cbor2.dumps(sym_deletes))
+
+                        if max_bucket_size or uncapped is None:
+                            # Uncapped buckets expand to the same terms for both strategies
+                            engine = SymSpell.from_index({
+                                "normalizedIndex": index["normalizedIndex"],
+                                "symDeletes": sym_deletes,
+                                "symMeta": {"maxEditDistance": edit_distance, "prefixLength": prefix_length},
+                            })
+                            measured = (evaluate(engine, typo_set, sorted({1, k, 8})), bucket_stats(engine))
+                            if not max_bucket_size:
+                                uncapped = measured
+                        evaluation, buckets = measured if max_bucket_size else uncapped
+
+                        results.append({
+                            "maxWords": len(kept),
+                            "maxEditDistance": edit_distance,
+                            "prefixLength": prefix_length,
+                            "keyStrategy": key_strategy,
+                            "maxBucketSize": max_bucket_size or None,
+                            "sizeBytes": base_bytes + deletes_bytes,
+                            "deletesBytes": deletes_bytes,
+                            "bucketSizes": buckets,
+                            "verificationsMean": evaluation["verificationsPerLookup"]["mean"],
+                            "verificationsP95": evaluation["verificationsPerLookup"]["p95"],
+                            "lookupUs": evaluation["latencyUs"],
+                            "recall": evaluation["overall"][f"recall@{k}"],
+                            "recallByEdits": evaluation["recall"],
+                        })
+                        print(f"  [{language}] words={len(kept)} d={edit_distance} prefix={prefix_length} "
+                              f"cap={max_bucket_size or '-'} keys={key_strategy}: "
+                              f"recall@{k} {evaluation['overall'][f'recall@{k}']:.1%}, "
+                              f"{evaluation['verificationsPerLookup']['mean']:.0f} verifications/lookup "
+                              f"({time.perf_counter() - start:.0f} s)", flush=True)
+
+    mark_pareto(results)
+    max_size_bytes = settings["max_size_mb"] * 1024 * 1024 if settings["max_size_mb"] else None
+    chosen, within_budget = choose(results, max_size_bytes, settings["max_verifications"])
+    return {
+        "dictionary": str(dictionary_file),
+        "wordLengths": word_length_stats(full_index),
+        "typoSamples": len(typo_set),
+        "configurations": results,
+        "chosen": chosen,
+        "withinBudget": within_budget,
+    }
+
+
+def write_config(chosen: Dict[str, Dict], config_file: Path = CONFIG_FILE):
+    """Merge the chosen configurations into symspell_config.json."""
+    config = {"default": {}, "languages": {}}
+    if config_file.exists():
+        with open(config_file, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    for language, result in sorted(chosen.items()):
+        config["languages"][language] = {
+            "maxWords": result["maxWords"],
+            "maxEditDistance": result["maxEditDistance"],
+            "prefixLength": result["prefixLength"],
+            "keyStrategy": result["keyStrategy"],
+            "maxBucketSize": result["maxBucketSize"],
+            "tuned": {
+                "sizeBytes": result["sizeBytes"],
+                "verificationsPerLookup": result["verificationsMean"],
+                "recall": result["recall"],
+                "date": time.strftime("%Y-%m-%d"),
+            },
+        }
+    with open(config_file, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep SymSpell parameters per language and pick Pareto-optimal ones")
+    parser.add_argument("--languages", nargs="+", default=None,
+                        help="Language codes (default: every *_base.json)")
+    parser.add_argument("--dictionaries_dir", type=Path, default=DICTIONARIES_DIR)
+    parser.add_argument("--max_words", type=int, nargs="+", default=[20000, 50000],
+                        help="Truncation sizes to try; 0 keeps all words (default: 20000 50000)")
+    parser.add_argument("--edit_distances", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--prefix_lengths", type=int, nargs="+", default=[4, 5, 6, 7])
+    parser.add_argument("--key_strategies", choices=KEY_STRATEGIES, nargs="+", default=list(KEY_STRATEGIES))
+    parser.add_argument("--max_bucket_sizes", type=int, nargs="+", default=[0],
+                        help="Per-bucket caps to try; 0 = uncapped (default: 0)")
+    parser.add_argument("--samples", type=int, default=200, help="Typos per edit count (default: 200)")
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 2], help="Typo edit counts (default: 1 2)")
+    parser.add_argument("--top_words", type=int, default=20000,
+                        help="Typos are made from the N most frequent words (default: 20000)")
+    parser.add_argument("--min_length", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3, help="Recall cut-off to optimize (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max_size_mb", type=float, default=None, help="Size budget for the chosen config")
+    parser.add_argument("--max_verifications", type=float, default=None,
+                        help="Mean verifications/lookup budget for the chosen config")
+    parser.add_argument("--workers", type=int, default=1, help="Languages tuned in parallel (default: 1)")
+    parser.add_argument("--output", type=Path, default=Path("symspell_tuning.json"),
+                        help="Report path (default: symspell_tuning.json)")
+    parser.add_argument("--write_config", action="store_true",
+                        help=f"Write the chosen parameters to {CONFIG_FILE.name}")
+    args = parser.parse_args()
+
+    if args.languages:
+        languages = {lang: args.dictionaries_dir / f"{lang}_base.json" for lang in args.languages}
+    else:
+        languages = {p.stem[:-len("_base")]: p for p in sorted(args.dictionaries_dir.glob("*_base.json"))}
+    missing = [str(path) for path in languages.values() if not path.exists()]
+    if missing or not languages:
+        print(f"ERROR: Dictionaries not found: {', '.join(missing) or args.dictionaries_dir}")
+        return 1
+
+    settings = {
+        "max_words": args.max_words, "edit_distances": args.edit_distances,
+        "prefix_lengths": args.prefix_lengths, "key_strategies": args.key_strategies,
+        "max_bucket_sizes": args.max_bucket_sizes,
+        "samples": args.samples, "edits": args.edits, "top_words": args.top_words,
+        "min_length": args.min_length, "k": args.k, "seed": args.seed,
+        "max_size_mb": args.max_size_mb, "max_verifications": args.max_verifications,
+    }
+    configurations = (len(args.max_words) * len(args.edit_distances) * len(args.prefix_lengths)
+                      * len(args.key_strategies) * len(args.max_bucket_sizes))
+    print(f"Tuning {len(languages)} language(s), {configurations} configurations each...")
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {lang: executor.submit(tune_language, lang, path, settings) for lang, path in languages.items()}
+        reports = {lang: future.result() for lang, future in futures.items()}
+
+    print(f"\n{'lang':<6} {'words':>7} {'d':>2} {'prefix':>6} {'keys':<7} {'size MB':>8} "
+          f"{'verif.':>8} {f'recall@{args.k}':>9}")
+    for language, report in reports.items():
+        chosen = report["chosen"]
+        status = "" if report["withinBudget"] else "  [WARN] over budget"
+        print(f"{language:<6} {chosen['maxWords']:>7} {chosen['maxEditDistance']:>2} {chosen['prefixLength']:>6} "
+              f"{chosen['keyStrategy']:<7} {chosen['sizeBytes'] / 1024 / 1024:>8.2f} "
+              f"{chosen['verificationsMean']:>8.0f} {chosen['recall']:>9.1%}{status}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"settings": settings, "languages": reports}, f, indent=2)
+    print(f"\nReport saved to: {args.output}")
+
+    if args.write_config:
+        write_config({language: report["chosen"] for language, report in reports.items()})
+        print(f"[OK] Updated {CONFIG_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
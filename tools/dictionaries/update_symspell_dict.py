@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Apply a word-list diff to a .dict without rebuilding it.
+
+build_symspell_dict.py regenerates every delete set; for a handful of
+curated words that is most of the build time. This script takes an existing
+.dict (written by build_symspell_dict.py) and the words that were added,
+removed or given a new frequency, and updates only:
+
+    normalizedIndex  buckets of the changed terms
+    prefixCache      buckets of the changed terms' prefixes
+    symDeletes       buckets of the deletes of changed terms (or prefix
+                     keys), recomputed from the prefixes that can produce
+                     them, then ordered and capped like a full build
+
+The result is byte-identical to running build_symspell_dict.py on the
+edited word list with the .dict's symMeta (--verify checks this when the
+new list is given). Fields a full build does not write (corrections,
+n-grams, next-word cache) are dropped, as a rebuild would; regenerate them
+afterwards.
+
+The diff is either a JSON file
+
+    {"added": [{"w": "word", "f": 120}], "changed": [{"w": "word", "f": 90}], "removed": ["word"]}
+
+or computed from the old and new base JSON lists (--old/--new). A word's
+entries are replaced as a whole ("added" and "changed" both set them).
+
+Whether the delete buckets hold terms or prefix keys comes from
+symMeta.keyStrategy (detected from the bucket values for .dict files
+written before it was recorded); a --key_strategy that disagrees is an
+error.
+
+Usage:
+    python update_symspell_dict.py --input it_base.dict --diff it_diff.json --output it_base.dict
+    python update_symspell_dict.py --input it_base.dict --old it_base.old.json --new it_base.json --verify
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from build_symspell_dict import (
+    KEY_STRATEGIES, build_index, build_sym_deletes, canonical_index, cap_buckets, entry_order, generate_deletes,
+    import_cbor2, load_input, normalize, order_buckets
+)
+
+PREFIX_CACHE_LENGTH = 4  # build_index() default, the app's cachePrefixLength
+SOURCE_MAIN = 0
+
+
+def word_frequencies(entries: List[Dict]) -> Dict[str, List[int]]:
+    """word -> frequencies of its entries, in list order."""
+    words: Dict[str, List[int]] = defaultdict(list)
+    for entry in entries:
+        words[entry["w"]].append(int(entry.get("f", 1)))
+    return dict(words)
+
+
+def load_diff(path: str) -> Dict[str, List[int]]:
+    """word -> new frequencies ([] = removed) from a diff file."""
+    with open(path, "r", encoding="utf-8") as f:
+        diff = json.load(f)
+    changes: Dict[str, List[int]] = {}
+    for word in diff.get("removed", []):
+        changes[word if isinstance(word, str) else word["w"]] = []
+    for section in ("added", "changed"):
+        for word, frequencies in word_frequencies(diff.get(section, [])).items():
+            changes[word] = frequencies
+    return changes
+
+
+def diff_word_lists(old_entries: List[Dict], new_entries: List[Dict]) -> Dict[str, List[int]]:
+    old = word_frequencies(old_entries)
+    new = word_frequencies(new_entries)
+    changes = {word: [] for word in old if word not in new}
+    changes.update({word: frequencies for word, frequencies in new.items() if old.get(word) != frequencies})
+    return changes
+
+
+def best_frequency(entries: List[Dict]) -> int:
+    return max((int(e.get("frequency", 0)) for e in entries), default=0)
+
+
+class KeyIndex:
+    """Prefix keys grouped by length, searchable for supersequences of a delete."""
+
+    def __init__(self, keys):
+        by_length: Dict[int, List[str]] = defaultdict(list)
+        for key in sorted(keys):
+            by_length[len(key)].append(key)
+        self.keys = dict(by_length)
+        # One newline-separated text per length, so a regex scans all keys at C speed
+        self.texts = {length: "\n".join(group) for length, group in self.keys.items()}
+        self.starts = {}
+        for length, group in self.keys.items():
+            offsets, position = [], 0
+            for key in group:
+                offsets.append(position)
+                position += len(key) + 1
+            self.starts[length] = offsets
+
+    def producing(self, delete: str, max_edit_distance: int) -> Set[str]:
+        """Keys whose generate_deletes(key, max_edit_distance) contain delete."""
+        found = set()
+        pattern = re.compile("[^\n]*?".join(map(re.escape, delete)))
+        for length in range(len(delete) + 1, len(delete) + max_edit_distance + 1):
+            group = self.keys.get(length)
+            if not group:
+                continue
+            if not delete:
+                found.update(group)
+                continue
+            starts = self.starts[length]
+            for match in pattern.finditer(self.texts[length]):
+                found.add(group[bisect_right(starts, match.start()) - 1])
+        return found
+
+
+def detect_key_strategy(index: Dict) -> str:
+    """
+    symMeta.keyStrategy, or for older .dict files what the buckets hold: a
+    value that is not a term is a prefix key. (When every term is a prefix
+    key as well, both strategies give the same buckets and "term" is right.)
+    """
+    recorded = index["symMeta"].get("keyStrategy")
+    if recorded:
+        return recorded
+    terms = index["normalizedIndex"]
+    for bucket in index["symDeletes"].values():
+        if any(value not in terms for value in bucket):
+            return "prefix"
+    return "term"
+
+
+def apply_changes(index: Dict, changes: Dict[str, List[int]]) -> Tuple[Set[str], Set[str]]:
+    """
+    Update normalizedIndex and prefixCache in place.
+    Returns (terms whose entries changed, terms added/removed or with a new best frequency).
+    """
+    normalized_index = index["normalizedIndex"]
+    prefix_cache = index["prefixCache"]
+    by_norm: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+    for word, frequencies in changes.items():
+        by_norm[normalize(word)][word] = frequencies
+
+    touched = set()
+    ranking_changed = set()
+    for norm, words in by_norm.items():
+        old_bucket = normalized_index.get(norm, [])
+        before = best_frequency(old_bucket) if old_bucket else None
+        new_entries = [{"word": word, "frequency": frequency, "source": SOURCE_MAIN}
+                       for word, frequencies in words.items() for frequency in frequencies]
+
+        def replace(bucket: List[Dict]) -> List[Dict]:
+            kept = [e for e in bucket if not (e["word"] in words and e.get("source", 0) == SOURCE_MAIN)]
+            return sorted(kept + new_entries, key=entry_order)
+
+        bucket = replace(old_bucket)
+        if bucket:
+            normalized_index[norm] = bucket
+        else:
+            normalized_index.pop(norm, None)
+        for length in range(1, min(len(norm), PREFIX_CACHE_LENGTH) + 1):
+            prefix = norm[:length]
+            entries = replace(prefix_cache.get(prefix, []))
+            if entries:
+                prefix_cache[prefix] = entries
+            else:
+                prefix_cache.pop(prefix, None)
+
+        touched.add(norm)
+        after = best_frequency(bucket) if bucket else None
+        if before != after:
+            ranking_changed.add(norm)
+    return touched, ranking_changed
+
+
+def update_sym_deletes(index: Dict, ranking_changed: Set[str], key_strategy: str) -> int:
+    """Recompute the delete buckets the changed terms belong to; returns how many were rebuilt."""
+    meta = index["symMeta"]
+    max_edit_distance, prefix_length = meta["maxEditDistance"], meta["prefixLength"]
+    sym_deletes = index["symDeletes"]
+
+    affected: Set[str] = set()
+    for norm in ranking_changed:
+        affected |= generate_deletes(norm[:prefix_length], max_edit_distance)
+    if not affected:
+        return 0
+
+    # Bucket values per key, with the frequency a full build ranks them by
+    values_by_key: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for norm, entries in index["normalizedIndex"].items():
+        key = norm[:prefix_length]
+        frequency = best_frequency(entries)
+        value = norm if key_strategy == "term" else key
+        values_by_key[key][value] = max(values_by_key[key].get(value, -1), frequency)
+    keys = KeyIndex(values_by_key)
+
+    buckets = {}
+    value_frequencies = {}
+    for delete in affected:
+        values = set()
+        for key in keys.producing(delete, max_edit_distance):
+            values.update(values_by_key[key])
+            value_frequencies.update(values_by_key[key])
+        buckets[delete] = values
+    ordered = order_buckets(buckets, value_frequencies, meta.get("bucketOrder", "frequency"))
+    capped, _ = cap_buckets(ordered, meta.get("maxBucketSize"))
+    for delete, bucket in capped.items():
+        if bucket:
+            sym_deletes[delete] = bucket
+        else:
+            sym_deletes.pop(delete, None)
+    return len(affected)
+
+
+def build_sym_meta(meta: Dict, key_strategy: str) -> Dict:
+    """symMeta as build_symspell_dict.py writes it (field order included)."""
+    sym_meta = {"maxEditDistance": meta["maxEditDistance"], "prefixLength": meta["prefixLength"],
+                "bucketOrder": meta.get("bucketOrder", "frequency"), "keyStrategy": key_strategy}
+    if meta.get("maxBucketSize"):
+        sym_meta["maxBucketSize"] = meta["maxBucketSize"]
+    return sym_meta
+
+
+def full_build(entries: List[Dict], meta: Dict, key_strategy: str) -> Dict:
+    """What build_symspell_dict.py writes for a base JSON list with these parameters."""
+    index = build_index(entries)
+    sym_meta = build_sym_meta(meta, key_strategy)
+    return canonical_index({
+        "normalizedIndex": index["normalizedIndex"],
+        "prefixCache": index["prefixCache"],
+        "symDeletes": build_sym_deletes(index["normalizedIndex"], meta["maxEditDistance"], meta["prefixLength"],
+                                        key_strategy, sym_meta["bucketOrder"], meta.get("maxBucketSize")),
+        "symMeta": sym_meta,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply a word-list diff to a .dict without a full rebuild")
+    parser.add_argument("--input", required=True, help="Existing .dict (build_symspell_dict.py output)")
+    parser.add_argument("--output", default=None, help="Path to write the updated .dict (default: overwrite --input)")
+    parser.add_argument("--diff", default=None, help="Diff JSON with added/changed/removed words")
+    parser.add_argument("--old", default=None, help="Base JSON the .dict was built from (with --new)")
+    parser.add_argument("--new", default=None, help="Edited base JSON (with --old)")
+    parser.add_argument("--key_strategy", choices=KEY_STRATEGIES, default=None,
+                        help="Delete bucket contents the .dict was built with; checked against the .dict "
+                             "(default: its symMeta.keyStrategy, else detected from the buckets)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Compare with a full rebuild of --new (byte for byte)")
+    args = parser.parse_args()
+    if bool(args.diff) == bool(args.old or args.new) or (args.old is None) != (args.new is None):
+        parser.error("give either --diff or both --old and --new")
+    if args.verify and not args.new:
+        parser.error("--verify needs --new")
+    cbor2 = import_cbor2()
+    output = args.output or args.input
+
+    start = time.perf_counter()
+    index = load_input(args.input)
+    if not index.get("symDeletes") or not index.get("symMeta"):
+        print("ERROR: No precomputed deletes; build the .dict with build_symspell_dict.py first")
+        return 1
+    key_strategy = detect_key_strategy(index)
+    if args.key_strategy and args.key_strategy != key_strategy:
+        print(f"ERROR: {args.input} has {key_strategy}-valued delete buckets, not {args.key_strategy}")
+        return 1
+    if args.diff:
+        changes = load_diff(args.diff)
+    else:
+        with open(args.old, "r", encoding="utf-8") as f:
+            old_entries = json.load(f)
+        with open(args.new, "r", encoding="utf-8") as f:
+            new_entries = json.load(f)
+        changes = diff_word_lists(old_entries, new_entries)
+
+    touched, ranking_changed = apply_changes(index, changes)
+    rebuilt = update_sym_deletes(index, ranking_changed, key_strategy)
+    meta = build_sym_meta(index["symMeta"], key_strategy)
+    out = canonical_index({
+        "normalizedIndex": index["normalizedIndex"],
+        "prefixCache": index["prefixCache"],
+        "symDeletes": index["symDeletes"],
+        "symMeta": meta,
+    })
+    data = cbor2.dumps(out)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "wb") as f:
+        f.write(data)
+    print(f"[OK] {len(changes)} word(s) changed, {len(touched)} term(s) updated, {rebuilt} delete bucket(s) "
+          f"recomputed -> {output} ({time.perf_counter() - start:.1f} s)")
+
+    if args.verify:
+        start = time.perf_counter()
+        expected = cbor2.dumps(full_build(new_entries, meta, key_strategy))
+        if expected != data:
+            print(f"[WARN] Output differs from a full rebuild ({len(data)} vs {len(expected)} bytes)")
+            return 1
+        print(f"[OK] Identical to a full rebuild ({len(data)} bytes, rebuild took {time.perf_counter() - start:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
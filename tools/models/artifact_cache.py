@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for model pipeline stages.
+
+Each stage (TF conversion, SavedModel export, TFLite conversion, ...) is
+keyed by a hash of its input artifacts and parameters:
+
+    key = sha256({"stage": name, "inputs": {...}})
+
+where artifact inputs are content hashes of files or directories (see
+hash_tree()), never paths or timestamps. A stage's result lives in
+cache/{stage}/{key}/ next to a meta.json that records the inputs and the
+content hash of the result, which later stages use as their input hash.
+An entry is written to a temporary directory and renamed into place only
+when the stage finished, so an interrupted conversion is never reused.
+
+Offline mode (--offline or TITANKEYS_OFFLINE=1) also sets HF_HUB_OFFLINE
+and TRANSFORMERS_OFFLINE, so transformers only reads its local files.
+
+Usage:
+    python artifact_cache.py [--cache-dir DIR]            # list entries
+    python artifact_cache.py --remove-stage tflite        # drop one stage's entries
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+CACHE_DIR = Path(os.environ.get("TITANKEYS_CACHE_DIR", Path(__file__).parent / "cache"))
+META_FILE = "meta.json"
+# Written by download_grammar_model.py into the model directory; not part of its content hash
+STAMP_FILE = ".artifact.json"
+
+OFFLINE_ENV = ("TITANKEYS_OFFLINE", "HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE")
+
+
+def enable_offline():
+    """Never touch the network: transformers/huggingface_hub read local files only."""
+    for name in OFFLINE_ENV:
+        os.environ[name] = "1"
+
+
+def is_offline() -> bool:
+    return os.environ.get("TITANKEYS_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_tree(path: Path) -> str:
+    """Content hash of a file, or of a directory's relative file names and contents."""
+    path = Path(path)
+    if path.is_file():
+        return hash_file(path)
+
+    digest = hashlib.sha256()
+    for file in sorted(p for p in path.rglob("*") if p.is_file() and p.name != STAMP_FILE):
+        digest.update(file.relative_to(path).as_posix().encode("utf-8") + b"\0")
+        digest.update(hash_file(file).encode("ascii"))
+    return digest.hexdigest()
+
+
+def hash_strings(values) -> str:
+    """Content hash of a list of strings (e.g. calibration sentences)."""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(value.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+def package_version(name: str) -> Optional[str]:
+    """Installed version without importing the package (it is part of conversion keys)."""
+    from importlib import metadata
+
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def stage_key(stage: str, **inputs) -> str:
+    payload = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """Stage results under root/{stage}/{key}/, built at most once per key."""
+
+    def __init__(self, root: Path = CACHE_DIR, rebuild: bool = False):
+        self.root = Path(root)
+        self.rebuild = rebuild
+
+    def entry_dir(self, stage: str, key: str) -> Path:
+        return self.root / stage / key
+
+    def meta(self, stage: str, key: str) -> Optional[Dict]:
+        meta_path = self.entry_dir(stage, key) / META_FILE
+        if not meta_path.exists():
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def lookup(self, stage: str, key: str) -> Optional[Path]:
+        """Entry directory if the stage completed for this key."""
+        return self.entry_dir(stage, key) if self.meta(stage, key) is not None else None
+
+    def content_hash(self, stage: str, key: str) -> str:
+        return self.meta(stage, key)["contentHash"]
+
+    def build(self, stage: str, key: str, produce: Callable[[Path], None],
+              inputs: Optional[Dict] = None) -> Path:
+        """
+        Return the entry for (stage, key), running produce(directory) first if
+        it is missing (or --rebuild was given).
+        """
+        final = self.entry_dir(stage, key)
+        if not self.rebuild and self.lookup(stage, key) is not None:
+            print(f"  [CACHE] {stage}: reusing {key[:12]}")
+            return final
+
+        print(f"  [CACHE] {stage}: building {key[:12]}")
+        staging = final.parent / f".tmp-{key}-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            start = time.perf_counter()
+            produce(staging)
+            meta = {
+                "stage": stage,
+                "key": key,
+                "inputs": inputs or {},
+                "contentHash": hash_tree(staging),
+                "sizeBytes": sum(f.stat().st_size for f in staging.rglob("*") if f.is_file()),
+                "buildSeconds": round(time.perf_counter() - start, 1),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            with open(staging / META_FILE, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+            shutil.rmtree(final, ignore_errors=True)
+            os.replace(staging, final)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return final
+
+    def stage(self, stage: str, produce: Callable[[Path], None], **inputs) -> Tuple[Path, str]:
+        """(entry directory, content hash) of a stage keyed by its inputs."""
+        key = stage_key(stage, **inputs)
+        directory = self.build(stage, key, produce, inputs)
+        return directory, self.content_hash(stage, key)
+
+    def entries(self):
+        for meta_path in sorted(self.root.glob(f"*/*/{META_FILE}")):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                yield meta_path.parent, json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or clear cached model pipeline stages")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR,
+                        help=f"Cache directory (default: {CACHE_DIR}, or $TITANKEYS_CACHE_DIR)")
+    parser.add_argument("--remove-stage", action="append", default=[],
+                        help="Delete all entries of a stage (e.g. tflite); can be repeated")
+
+    args = parser.parse_args()
+
+    cache = ArtifactCache(args.cache_dir)
+    for stage in args.remove_stage:
+        shutil.rmtree(cache.root / stage, ignore_errors=True)
+        print(f"[OK] Removed stage '{stage}'")
+
+    total = 0
+    for directory, meta in cache.entries():
+        total += meta["sizeBytes"]
+        print(f"  {meta['stage']:<20} {meta['key'][:12]}  {meta['sizeBytes'] / 1024 / 1024:>8.1f} MB  "
+              f"{meta['buildSeconds']:>7.1f} s  {meta['created']}")
+    print(f"\nCache: {cache.root} ({total / 1024 / 1024:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+CPU latency/throughput benchmark for exported grammar and prediction models.
+
+Loads each artifact with the local CPU runtime and sweeps thread counts and
+input lengths:
+
+    *.tflite with encode/decode_* signatures  - encoder + fixed number of cached decoder steps
+    *.tflite (single signature)               - one forward pass (encoder, predictor, tagger)
+    *.onnx                                    - one InferenceSession.run
+    directory with *.onnx (optimum export)    - generate() with a fixed number of new tokens
+
+Every (artifact, threads, length) configuration runs in a fresh process, so
+peak RSS is measured per configuration and earlier runs cannot warm caches for
+later ones. Inputs are generated from a fixed seed and decoding always runs a
+fixed number of steps (EOS is ignored), so results are comparable run to run.
+
+Usage:
+    python benchmark_models.py output/grammar_en.tflite output/grammar_en_onnx_int8 \
+        --threads 1 2 4 --lengths 8 16 32 64 --output benchmark_en.json
+
+    # Gate a conversion change: fail if any p50 is more than 10% slower
+    python benchmark_models.py output/grammar_en.tflite --baseline benchmark_en.json --max-regression 0.10
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List
+
+
+def artifact_kind(path: Path) -> str:
+    """Classify an artifact path (see module docstring)."""
+    if path.is_dir():
+        if any(path.glob("*.onnx")):
+            return "onnx-seq2seq"
+        raise ValueError(f"{path}: directory without ONNX files")
+    if path.suffix == ".onnx":
+        return "onnx"
+    if path.suffix == ".tflite":
+        from seq2seq_runner import load_interpreter
+
+        signatures = load_interpreter(path).get_signature_list()
+        return "tflite-seq2seq" if "decode_step" in signatures else "tflite"
+    raise ValueError(f"{path}: unsupported artifact type")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def make_tokens(rng, length: int, vocab_size: int = 32000):
+    """Random token IDs that avoid the special tokens 0-2."""
+    return rng.integers(3, vocab_size, size=length, dtype="int64")
+
+
+def fill_inputs(details: List[Dict], length: int, rng) -> Dict:
+    """
+    Build feed values for model inputs of the given (unpadded) length.
+
+    Integer inputs named *mask* get 1 for the first `length` positions, other
+    integer inputs get random token IDs there; padding is 0. Float inputs get
+    standard normal values. Dynamic dimensions are set to 1 (batch) or length.
+    """
+    import numpy as np
+
+    feeds = {}
+    for detail in details:
+        shape = [dim if isinstance(dim, int) and dim > 0 else (1 if i == 0 else length)
+                 for i, dim in enumerate(detail["shape"])]
+        dtype = np.dtype(detail["dtype"])
+        if np.issubdtype(dtype, np.integer):
+            value = np.zeros(shape, dtype=dtype)
+            if len(shape) >= 2:
+                used = min(length, shape[1])
+                if "mask" in detail["name"]:
+                    value[..., :used] = 1
+                else:
+                    value[..., :used] = make_tokens(rng, used)
+        else:
+            value = rng.standard_normal(shape).astype(dtype)
+        feeds[detail["name"]] = value
+    return feeds
+
+
+def build_runner(path: Path, kind: str, threads: int, length: int, decode_steps: int, seed: int):
+    """Return a zero-argument callable that runs one inference for the configuration."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+
+    if kind == "tflite-seq2seq":
+        from seq2seq_runner import TFLiteSeq2SeqRunner
+
+        runner = TFLiteSeq2SeqRunner(path, threads)
+        input_ids = np.zeros((1, runner.max_length), dtype=np.int32)
+        attention_mask = np.zeros((1, runner.max_length), dtype=np.int32)
+        used = min(length, runner.max_length)
+        input_ids[0, :used] = make_tokens(rng, used)
+        attention_mask[0, :used] = 1
+        return lambda: runner.generate(input_ids, attention_mask, decode_steps, stop_at_eos=False)
+
+    if kind == "tflite":
+        from seq2seq_runner import encoder_buckets, load_interpreter, select_bucket
+
+        interpreter = load_interpreter(path, threads)
+        buckets = {bucket: name for name, bucket in encoder_buckets(interpreter.get_signature_list()).items()
+                   if bucket is not None}
+        if buckets:
+            # Length-bucketed encoder: run the signature a runtime would pick for this length
+            runner = interpreter.get_signature_runner(buckets[select_bucket(list(buckets), length)])
+            signature_inputs = runner.get_input_details()
+            feeds = fill_inputs(
+                [{"name": name, "shape": list(d["shape"]), "dtype": d["dtype"]}
+                 for name, d in signature_inputs.items()],
+                length, rng,
+            )
+            return lambda: runner(**feeds)
+
+        details = interpreter.get_input_details()
+        for detail in details:
+            signature = detail.get("shape_signature", detail["shape"])
+            if any(dim < 0 for dim in signature):
+                shape = [1 if i == 0 else length if dim < 0 else dim for i, dim in enumerate(signature)]
+                interpreter.resize_tensor_input(detail["index"], shape)
+        interpreter.allocate_tensors()
+        details = interpreter.get_input_details()
+        feeds = fill_inputs(
+            [{"name": d["name"], "shape": list(d["shape"]), "dtype": d["dtype"]} for d in details],
+            length, rng,
+        )
+
+        def run():
+            for detail in details:
+                interpreter.set_tensor(detail["index"], feeds[detail["name"]])
+            interpreter.invoke()
+        return run
+
+    if kind == "onnx":
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        session = onnxruntime.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        onnx_types = {"tensor(int64)": np.int64, "tensor(int32)": np.int32,
+                      "tensor(float)": np.float32, "tensor(float16)": np.float16, "tensor(bool)": np.bool_}
+        feeds = fill_inputs(
+            [{"name": i.name, "shape": list(i.shape), "dtype": onnx_types.get(i.type, np.float32)}
+             for i in session.get_inputs()],
+            length, rng,
+        )
+        return lambda: session.run(None, feeds)
+
+    if kind == "onnx-seq2seq":
+        import onnxruntime
+        import torch
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            str(path), use_cache=True, provider="CPUExecutionProvider", session_options=options
+        )
+        input_ids = torch.tensor([make_tokens(rng, length).tolist()])
+        attention_mask = torch.ones_like(input_ids)
+        return lambda: model.generate(
+            input_ids=input_ids, attention_mask=attention_mask, num_beams=1,
+            min_new_tokens=decode_steps, max_new_tokens=decode_steps,
+        )
+
+    raise ValueError(f"Unknown artifact kind: {kind}")
+
+
+def run_configuration(path: str, kind: str, threads: int, length: int,
+                      iterations: int, warmup: int, decode_steps: int, seed: int) -> Dict:
+    """Benchmark one configuration (runs inside a fresh worker process)."""
+    run = build_runner(Path(path), kind, threads, length, decode_steps, seed)
+    for _ in range(warmup):
+        run()
+
+    timings = []
+    start_all = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - start_all
+
+    timings.sort()
+
+    def percentile(p: float) -> float:
+        return round(timings[min(len(timings) - 1, int(round(p * (len(timings) - 1))))], 3)
+
+    return {
+        "artifact": path,
+        "kind": kind,
+        "threads": threads,
+        "length": length,
+        "decodeSteps": decode_steps if kind.endswith("seq2seq") else None,
+        "iterations": iterations,
+        "p50Ms": percentile(0.50),
+        "p95Ms": percentile(0.95),
+        "p99Ms": percentile(0.99),
+        "meanMs": round(statistics.mean(timings), 3),
+        "throughputPerSec": round(iterations / elapsed, 2),
+        "peakRssMB": round(peak_rss_mb(), 1),
+    }
+
+
+def environment_info() -> Dict:
+    """Machine and library versions, recorded so reports can be compared."""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpuCount": os.cpu_count(),
+    }
+    for module in ("numpy", "tensorflow", "tflite_runtime", "onnxruntime", "optimum"):
+        try:
+            info[module] = __import__(module).__version__
+        except (ImportError, AttributeError):
+            info[module] = None
+    return info
+
+
+def find_regressions(results: List[Dict], baseline: Dict, max_regression: float) -> List[str]:
+    """Compare p50 latencies against a baseline report; return regression messages."""
+    def key(r):
+        return (Path(r["artifact"]).name, r["threads"], r["length"], r.get("decodeSteps"))
+
+    previous = {key(r): r for r in baseline.get("results", [])}
+    messages = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None or not old["p50Ms"]:
+            continue
+        change = result["p50Ms"] / old["p50Ms"] - 1
+        if change > max_regression:
+            name, threads, length, _ = key(result)
+            messages.append(f"{name} threads={threads} length={length}: "
+                            f"p50 {old['p50Ms']} -> {result['p50Ms']} ms (+{change * 100:.1f}%)")
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exported models on the local CPU")
+    parser.add_argument("artifacts", nargs="+", type=Path, help="*.tflite, *.onnx or optimum ONNX directories")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="Thread counts (default: 1 2 4)")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[8, 16, 32, 64],
+                        help="Input lengths in tokens (default: 8 16 32 64)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed runs per configuration (default: 50)")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed warm-up runs (default: 5)")
+    parser.add_argument("--decode-steps", type=int, default=16,
+                        help="Decoder steps per seq2seq inference (default: 16)")
+    parser.add_argument("--seed", type=int, default=0, help="Input generation seed (default: 0)")
+    parser.add_argument("--output", "-o", type=Path, default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed p50 slowdown vs. baseline, as a fraction (default: 0.10)")
+
+    args = parser.parse_args()
+
+    for artifact in args.artifacts:
+        if not artifact.exists():
+            print(f"Error: Artifact not found: {artifact}")
+            return 1
+
+    kinds = {}
+    for artifact in args.artifacts:
+        try:
+            kinds[artifact] = artifact_kind(artifact)
+        except (ValueError, ImportError) as e:
+            print(f"Error: {e}")
+            return 1
+
+    print("=" * 50)
+    print("TitanKeys Model Benchmark")
+    print("=" * 50)
+    print(f"Threads: {args.threads}, lengths: {args.lengths}, "
+          f"iterations: {args.iterations} (+{args.warmup} warm-up)\n")
+    print(f"  {'artifact':<32} {'thr':>3} {'len':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'inf/s':>8} {'RSS MB':>8}")
+
+    results = []
+    context = get_context("spawn")
+    for artifact in args.artifacts:
+        for threads in args.threads:
+            for length in args.lengths:
+                # Fresh process per configuration: isolated peak RSS and caches
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    future = pool.submit(run_configuration, str(artifact), kinds[artifact], threads, length,
+                                         args.iterations, args.warmup, args.decode_steps, args.seed)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"  {artifact.name:<32} {threads:>3} {length:>4} [FAIL] {e}")
+                        continue
+                results.append(result)
+                print(f"  {artifact.name:<32} {threads:>3} {length:>4} {result['p50Ms']:>8} {result['p95Ms']:>8} "
+                      f"{result['p99Ms']:>8} {result['throughputPerSec']:>8} {result['peakRssMB']:>8}")
+
+    report = {
+        "environment": environment_info(),
+        "config": {
+            "threads": args.threads,
+            "lengths": args.lengths,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "decodeSteps": args.decode_steps,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\n[FAIL] {len(regressions)} configuration(s) slower than baseline "
+                  f"by more than {args.max_regression * 100:.0f}%:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\n[OK] No p50 regression above {args.max_regression * 100:.0f}% vs. {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Build contextual_predictor.tflite, the next-word model used by ContextualPredictor.kt.
+
+app/src/main/assets/models/README.md specifies the model; this script
+produces it from local data:
+
+    1. Vocabulary: [PAD] [UNK] [CLS] [SEP] [MASK], then the most frequent
+       lowercase words of {lang}_base.json, padded with [unused_N] entries to
+       exactly --vocab-size lines (ContextualPredictor reads vocabSize logits)
+    2. Training windows from a tokenized corpus (tokenize_corpus.py token
+       cache; built from --text files if needed): for sampled positions t of
+       a sentence, the input is [CLS] w[t-30..t-1] [SEP] [PAD]... and the
+       target is w[t]. Cache words are accent-stripped (extract_ngrams
+       normalization); each maps to the most frequent vocabulary word with
+       the same normalized form
+    3. A small transformer encoder (hidden 256, 4 layers, 8 heads, FF 1024 by
+       default) trained on CPU with Keras; the [SEP] position is pooled and
+       projected onto the tied word embedding
+    4. Export: int32 [1, 32] input_ids -> float32 [1, vocab] logits, INT8
+       dynamic-range quantized, plus a latency/accuracy report measured with
+       the TFLite interpreter on held-out windows (2 threads, like the app)
+
+Usage:
+    python build_contextual_predictor.py --language en --text ../corpora/en_sentences.txt [--install]
+    python build_contextual_predictor.py --language en --corpus ../corpora/en_corpus   # existing token cache
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from calibration import DICTIONARIES_DIR, PROJECT_ROOT
+
+DICTIONARY_TOOLS_DIR = Path(__file__).resolve().parent.parent / "dictionaries"
+ASSETS_MODELS_DIR = PROJECT_ROOT / "app" / "src" / "main" / "assets" / "models"
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+PAD_ID, UNK_ID, CLS_ID, SEP_ID, MASK_ID = range(len(SPECIAL_TOKENS))
+
+# Contract with ContextualPredictor.kt
+SEQUENCE_LENGTH = 32
+APP_VOCAB_SIZE = 30000
+APP_THREADS = 2
+LATENCY_BUDGET_MS = 100
+SIZE_BUDGET_MB = 50
+
+
+def build_vocabulary(language: str, vocab_size: int = APP_VOCAB_SIZE,
+                     dictionaries_dir: Path = DICTIONARIES_DIR) -> List[str]:
+    """Special tokens + most frequent lowercase dictionary words, padded to vocab_size entries."""
+    dictionary_file = dictionaries_dir / f"{language}_base.json"
+    with open(dictionary_file, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    entries = sorted(entries, key=lambda e: int(e.get("f", 0)), reverse=True)
+
+    vocab = list(SPECIAL_TOKENS)
+    seen = set(vocab)
+    for entry in entries:
+        if len(vocab) >= vocab_size:
+            break
+        word = entry.get("w", "").strip().lower()
+        if word and not any(c.isspace() for c in word) and word not in seen:
+            seen.add(word)
+            vocab.append(word)
+    # ContextualPredictor reads exactly vocabSize logits; filler entries are never valid predictions
+    vocab.extend(f"[unused_{i}]" for i in range(vocab_size - len(vocab)))
+    return vocab
+
+
+def use_dictionary_tools():
+    """Make tools/dictionaries importable (token cache and word normalization)."""
+    if str(DICTIONARY_TOOLS_DIR) not in sys.path:
+        sys.path.insert(0, str(DICTIONARY_TOOLS_DIR))
+
+
+def load_corpus_tokens(corpus_prefix: Optional[Path], text_files: List[Path],
+                       cache_prefix: Path, language: str):
+    """(tokens, offsets, cache_vocab) from an existing token cache or tokenized --text files."""
+    use_dictionary_tools()
+    from tokenize_corpus import is_cache_valid, load_tokens, tokenize_corpus
+
+    if corpus_prefix is not None:
+        return load_tokens(corpus_prefix)
+
+    # Concatenate the text files into one corpus next to the cache
+    dictionary_file = DICTIONARIES_DIR / f"{language}_base.json"
+    corpus_file = Path(f"{cache_prefix}.txt")
+    cache_prefix.parent.mkdir(parents=True, exist_ok=True)
+    with open(corpus_file, "w", encoding="utf-8") as out:
+        for path in text_files:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                shutil.copyfileobj(f, out)
+            out.write("\n")
+    if not is_cache_valid(cache_prefix, corpus_file, dictionary_file):
+        tokenize_corpus(corpus_file, cache_prefix, dictionary_file)
+    return load_tokens(cache_prefix)
+
+
+def remap_tokens(tokens, cache_vocab: List[str], vocab: List[str]):
+    """Map token-cache IDs to predictor vocabulary IDs (unknown -> [UNK])."""
+    import numpy as np
+    use_dictionary_tools()
+    from extract_ngrams import normalize_word
+
+    by_normalized: Dict[str, int] = {}
+    for token_id, word in enumerate(vocab[len(SPECIAL_TOKENS):], start=len(SPECIAL_TOKENS)):
+        by_normalized.setdefault(normalize_word(word), token_id)
+    lookup = np.array([by_normalized.get(word, UNK_ID) for word in cache_vocab], dtype=np.int32)
+    lookup[0] = UNK_ID  # tokenize_corpus <unk>
+    return lookup[np.asarray(tokens)]
+
+
+def build_windows(tokens, offsets, max_windows: int, seed: int = 0,
+                  sequence_length: int = SEQUENCE_LENGTH):
+    """
+    Sample (inputs, targets): inputs [N, sequence_length] laid out like
+    ContextualPredictor.prepareInputSequence: [CLS], the last
+    sequence_length - 2 words of the sentence (the app keeps the same most
+    recent words with takeLast), [SEP]. Targets are the following word.
+    """
+    import numpy as np
+    use_dictionary_tools()
+    from tokenize_corpus import sentence_ids
+
+    sentences = sentence_ids(offsets)
+    position = np.arange(len(tokens), dtype=np.int64) - offsets[:-1].astype(np.int64)[sentences]
+    candidates = np.nonzero((position >= 1) & (tokens != UNK_ID))[0]
+    rng = np.random.default_rng(seed)
+    if len(candidates) > max_windows:
+        candidates = np.sort(rng.choice(candidates, max_windows, replace=False))
+
+    context = sequence_length - 2
+    lengths = np.minimum(position[candidates], context)
+    inputs = np.full((len(candidates), sequence_length), PAD_ID, dtype=np.int32)
+    inputs[:, 0] = CLS_ID
+    for j in range(context):
+        valid = j < lengths
+        inputs[valid, 1 + j] = tokens[candidates[valid] - lengths[valid] + j]
+    inputs[np.arange(len(candidates)), 1 + lengths] = SEP_ID
+    targets = tokens[candidates].astype(np.int32)
+
+    order = rng.permutation(len(candidates))
+    return inputs[order], targets[order]
+
+
+def build_model(vocab_size: int, hidden: int = 256, layers: int = 4, heads: int = 8,
+                feed_forward: int = 1024, dropout: float = 0.1,
+                sequence_length: int = SEQUENCE_LENGTH):
+    """Pre-LN transformer encoder pooled at [SEP], with the output tied to the word embedding."""
+    import tensorflow as tf
+
+    class ContextualPredictorModel(tf.keras.Model):
+        def __init__(self):
+            super().__init__(name="contextual_predictor")
+            self.word_embedding = tf.keras.layers.Embedding(vocab_size, hidden, name="word_embedding")
+            self.position_embedding = tf.keras.layers.Embedding(sequence_length, hidden, name="position_embedding")
+            self.dropout = tf.keras.layers.Dropout(dropout)
+            self.blocks = []
+            for i in range(layers):
+                self.blocks.append((
+                    tf.keras.layers.LayerNormalization(epsilon=1e-6, name=f"attention_norm_{i}"),
+                    tf.keras.layers.MultiHeadAttention(num_heads=heads, key_dim=hidden // heads,
+                                                       dropout=dropout, name=f"attention_{i}"),
+                    tf.keras.layers.LayerNormalization(epsilon=1e-6, name=f"ffn_norm_{i}"),
+                    tf.keras.layers.Dense(feed_forward, activation="gelu", name=f"ffn_in_{i}"),
+                    tf.keras.layers.Dense(hidden, name=f"ffn_out_{i}"),
+                ))
+            self.final_norm = tf.keras.layers.LayerNormalization(epsilon=1e-6, name="final_norm")
+
+        def build(self, input_shape):
+            self.output_bias = self.add_weight(name="output_bias", shape=(vocab_size,), initializer="zeros")
+            super().build(input_shape)
+
+        def call(self, input_ids, training=False):
+            input_ids = tf.cast(input_ids, tf.int32)
+            x = self.word_embedding(input_ids) + self.position_embedding(tf.range(sequence_length))
+            x = self.dropout(x, training=training)
+
+            # [B, 1, L]: attend to non-padding positions only
+            attention_mask = tf.not_equal(input_ids, PAD_ID)[:, tf.newaxis, :]
+            for attention_norm, attention, ffn_norm, ffn_in, ffn_out in self.blocks:
+                normed = attention_norm(x)
+                x = x + self.dropout(attention(normed, normed, attention_mask=attention_mask,
+                                               training=training), training=training)
+                x = x + self.dropout(ffn_out(ffn_in(ffn_norm(x))), training=training)
+            x = self.final_norm(x)
+
+            # Hidden state at the [SEP] position (one-hot pooling converts to plain TFLite ops)
+            sep = tf.cast(tf.equal(input_ids, SEP_ID), x.dtype)
+            pooled = tf.einsum("bl,bld->bd", sep, x)
+            return tf.matmul(pooled, self.word_embedding.embeddings, transpose_b=True) + self.output_bias
+
+    model = ContextualPredictorModel()
+    model(tf.zeros((1, sequence_length), dtype=tf.int32))
+    return model
+
+
+def export_tflite(model, output_path: Path, quantize: bool = True) -> Path:
+    """Export with a fixed [1, SEQUENCE_LENGTH] int32 input, as the app allocates it."""
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec([1, SEQUENCE_LENGTH], tf.int32, name="input_ids")])
+    def serve(input_ids):
+        return {"logits": model(input_ids, training=False)}
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([serve.get_concrete_function()], model)
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    output_path.write_bytes(converter.convert())
+    return output_path
+
+
+def measure_tflite(model_path: Path, inputs, targets, threads: int = APP_THREADS, runs: int = 200) -> Dict:
+    """Latency (batch 1) and top-1/top-3 accuracy of the exported model on held-out windows."""
+    import numpy as np
+    from seq2seq_runner import load_interpreter
+
+    interpreter = load_interpreter(model_path, threads)
+    interpreter.allocate_tensors()
+    input_index = interpreter.get_input_details()[0]["index"]
+    output_index = interpreter.get_output_details()[0]["index"]
+
+    count = min(runs, len(inputs))
+    timings = []
+    top1 = top3 = 0
+    for i in range(count):
+        interpreter.set_tensor(input_index, inputs[i:i + 1])
+        start = time.perf_counter()
+        interpreter.invoke()
+        timings.append((time.perf_counter() - start) * 1000)
+        logits = interpreter.get_tensor(output_index)[0]
+        logits[:len(SPECIAL_TOKENS)] = -np.inf
+        best = np.argpartition(-logits, 3)[:3]
+        top1 += int(best[np.argmax(logits[best])] == targets[i])
+        top3 += int(targets[i] in best)
+
+    timings.sort()
+    return {
+        "threads": threads,
+        "windows": count,
+        "p50Ms": round(statistics.median(timings), 2),
+        "p95Ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "meanMs": round(statistics.mean(timings), 2),
+        "top1Accuracy": round(top1 / count, 4),
+        "top3Accuracy": round(top3 / count, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and export contextual_predictor.tflite on local data")
+    parser.add_argument("--language", "-l", required=True, help="Language code (e.g., en, de, es)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--text", type=Path, action="append", help="Sentence file (one per line); can be repeated")
+    source.add_argument("--corpus", type=Path, help="Existing tokenize_corpus.py cache prefix")
+    parser.add_argument("--output-dir", "-o", type=Path, default=Path(__file__).parent / "output",
+                        help="Output directory for the model, vocabulary and report")
+    parser.add_argument("--vocab-size", type=int, default=APP_VOCAB_SIZE,
+                        help=f"Vocabulary size (default: {APP_VOCAB_SIZE}, what the app expects)")
+    parser.add_argument("--hidden", type=int, default=256, help="Hidden size (default: 256)")
+    parser.add_argument("--layers", type=int, default=4, help="Transformer layers (default: 4)")
+    parser.add_argument("--heads", type=int, default=8, help="Attention heads (default: 8)")
+    parser.add_argument("--feed-forward", type=int, default=1024, help="Feed-forward size (default: 1024)")
+    parser.add_argument("--max-windows", type=int, default=500000, help="Training windows to sample (default: 500000)")
+    parser.add_argument("--held-out", type=int, default=5000, help="Held-out windows (default: 5000)")
+    parser.add_argument("--epochs", type=int, default=3, help="Training epochs (default: 3)")
+    parser.add_argument("--batch-size", type=int, default=128, help="Batch size (default: 128)")
+    parser.add_argument("--learning-rate", type=float, default=1e-3, help="Adam learning rate (default: 1e-3)")
+    parser.add_argument("--no-quantize", action="store_true", help="Export FP32 instead of INT8 dynamic range")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling/training seed (default: 0)")
+    parser.add_argument("--install", action="store_true",
+                        help="Copy the model and vocabulary into app/src/main/assets/models/")
+
+    args = parser.parse_args()
+
+    if args.hidden % args.heads:
+        parser.error("--hidden must be divisible by --heads")
+    if not (DICTIONARIES_DIR / f"{args.language}_base.json").exists():
+        print(f"Error: No dictionary for '{args.language}' in {DICTIONARIES_DIR}")
+        return 1
+    for path in args.text or []:
+        if not path.exists():
+            print(f"Error: File '{path}' not found")
+            return 1
+    if args.install and args.vocab_size != APP_VOCAB_SIZE:
+        print(f"Error: --install requires --vocab-size {APP_VOCAB_SIZE} (ContextualPredictor.vocabSize)")
+        return 1
+
+    import numpy as np
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(args.seed)
+    work_dir = args.output_dir / f"contextual_{args.language}"
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    print("=" * 50)
+    print("TitanKeys Contextual Predictor Builder")
+    print("=" * 50)
+    print(f"\nLanguage: {args.language}")
+
+    print("\n[1/4] Building vocabulary...")
+    vocab = build_vocabulary(args.language, args.vocab_size)
+    real_words = sum(1 for w in vocab[len(SPECIAL_TOKENS):] if not w.startswith("[unused_"))
+    print(f"  {len(vocab)} entries ({real_words} words)")
+
+    print("\n[2/4] Preparing training windows...")
+    tokens, offsets, cache_vocab = load_corpus_tokens(args.corpus, args.text or [],
+                                                      work_dir / "corpus", args.language)
+    tokens = remap_tokens(tokens, cache_vocab, vocab)
+    inputs, targets = build_windows(tokens, offsets, args.max_windows + args.held_out, args.seed)
+    if len(inputs) <= args.held_out:
+        print(f"Error: Only {len(inputs)} windows in the corpus; need more than --held-out {args.held_out}")
+        return 1
+    train_inputs, train_targets = inputs[args.held_out:], targets[args.held_out:]
+    eval_inputs, eval_targets = inputs[:args.held_out], targets[:args.held_out]
+    known = float(np.mean(tokens != UNK_ID)) if len(tokens) else 0.0
+    print(f"  {len(train_inputs)} training / {len(eval_inputs)} held-out windows "
+          f"({known:.1%} of corpus tokens in vocabulary)")
+
+    print("\n[3/4] Training...")
+    model = build_model(len(vocab), args.hidden, args.layers, args.heads, args.feed_forward)
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(args.learning_rate),
+        loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+        metrics=[tf.keras.metrics.SparseTopKCategoricalAccuracy(k=3, name="top3")],
+    )
+    print(f"  Parameters: {model.count_params():,}")
+    history = model.fit(
+        train_inputs, train_targets,
+        validation_data=(eval_inputs, eval_targets),
+        epochs=args.epochs, batch_size=args.batch_size, shuffle=True, verbose=2,
+    )
+
+    print("\n[4/4] Exporting to TFLite...")
+    model_path = args.output_dir / f"contextual_predictor_{args.language}.tflite"
+    vocab_path = args.output_dir / f"contextual_vocab_{args.language}.txt"
+    export_tflite(model, model_path, quantize=not args.no_quantize)
+    vocab_path.write_text("".join(f"{word}\n" for word in vocab), encoding="utf-8")
+    size_mb = model_path.stat().st_size / 1024 / 1024
+    print(f"  Model saved to: {model_path} ({size_mb:.1f} MB)")
+    print(f"  Vocabulary saved to: {vocab_path}")
+
+    measured = measure_tflite(model_path, eval_inputs, eval_targets)
+    report = {
+        "language": args.language,
+        "vocabSize": len(vocab),
+        "vocabularyWords": real_words,
+        "architecture": {"hidden": args.hidden, "layers": args.layers, "heads": args.heads,
+                         "feedForward": args.feed_forward, "sequenceLength": SEQUENCE_LENGTH},
+        "parameters": model.count_params(),
+        "trainingWindows": len(train_inputs),
+        "heldOutWindows": len(eval_inputs),
+        "corpusVocabularyCoverage": round(known, 4),
+        "history": {key: [round(float(v), 4) for v in values] for key, values in history.history.items()},
+        "quantized": not args.no_quantize,
+        "sizeMB": round(size_mb, 2),
+        "tflite": measured,
+        "latencyBudgetMs": LATENCY_BUDGET_MS,
+        "sizeBudgetMB": SIZE_BUDGET_MB,
+        "withinBudget": measured["p95Ms"] < LATENCY_BUDGET_MS and size_mb < SIZE_BUDGET_MB,
+    }
+    report_path = args.output_dir / f"contextual_predictor_{args.language}_report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n  TFLite ({measured['threads']} threads): p50 {measured['p50Ms']} ms, p95 {measured['p95Ms']} ms")
+    print(f"  Held-out accuracy: top-1 {measured['top1Accuracy']:.1%}, top-3 {measured['top3Accuracy']:.1%}")
+    print(f"  {'[OK]' if report['withinBudget'] else '[WARN]'} Budget: "
+          f"<{LATENCY_BUDGET_MS} ms, <{SIZE_BUDGET_MB} MB")
+    print(f"  Report saved to: {report_path}")
+
+    if args.install:
+        shutil.copyfile(model_path, ASSETS_MODELS_DIR / "contextual_predictor.tflite")
+        shutil.copyfile(vocab_path, ASSETS_MODELS_DIR / "vocab.txt")
+        print(f"\nInstalled into: {ASSETS_MODELS_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Calibration data for full-integer (INT8) TFLite quantization.
+
+Full-integer quantization needs a representative dataset so the converter can
+measure activation ranges. This module builds one from local data only:
+
+    - Sentence files (one sentence per line), e.g. text corpora in tools/corpora/
+    - The language's *_base.json dictionary, from which word sequences are
+      sampled by frequency when no (or too little) sentence text is available
+
+Sentences are shuffled deterministically and split into a calibration set and
+a held-out set used to compare the quantized model against FP32.
+
+Usage (standalone, prints a sample of the calibration sentences):
+    python calibration.py --language en [--text corpus.txt ...] [--samples 200]
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DICTIONARIES_DIR = PROJECT_ROOT / "app" / "src" / "main" / "assets" / "common" / "dictionaries"
+
+# Same task prefix the model is run with
+TASK_PREFIX = "gec: "
+
+
+def load_text_sentences(paths: List[Path], min_words: int = 3, max_words: int = 40) -> List[str]:
+    """Read sentences (one per line) from local text files."""
+    sentences = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if min_words <= len(line.split()) <= max_words:
+                    sentences.append(line)
+    return sentences
+
+
+def sample_dictionary_sentences(language: str, count: int, seed: int = 0,
+                                dictionaries_dir: Path = DICTIONARIES_DIR,
+                                top_words: int = 20000) -> List[str]:
+    """
+    Sample pseudo-sentences of 4-16 words from the language dictionary.
+
+    Words are drawn proportionally to frequency, which reproduces the token
+    distribution of real text well enough for activation-range calibration.
+    """
+    dictionary_file = dictionaries_dir / f"{language}_base.json"
+    if not dictionary_file.exists():
+        return []
+
+    with open(dictionary_file, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    entries = sorted(entries, key=lambda e: int(e.get("f", 0)), reverse=True)[:top_words]
+    words = [e["w"] for e in entries]
+    weights = [max(1, int(e.get("f", 1))) for e in entries]
+
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        length = rng.randint(4, 16)
+        sentence = " ".join(rng.choices(words, weights=weights, k=length))
+        sentences.append(sentence[:1].upper() + sentence[1:] + ".")
+    return sentences
+
+
+def build_calibration_sets(language: str, text_files: Optional[List[Path]] = None,
+                           samples: int = 200, held_out: int = 50,
+                           seed: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Return (calibration, held_out) sentence lists.
+
+    Text sentences are preferred; dictionary samples fill up whatever is missing.
+    """
+    sentences = load_text_sentences(text_files or [])
+    needed = samples + held_out
+    if len(sentences) < needed:
+        sentences += sample_dictionary_sentences(language, needed - len(sentences), seed)
+
+    rng = random.Random(seed)
+    rng.shuffle(sentences)
+    sentences = sentences[:needed]
+    return sentences[:samples], sentences[samples:]
+
+
+def encode_sentences(tokenizer, sentences: List[str], max_length: int) -> Iterator[Tuple]:
+    """Yield (input_ids, attention_mask) int32 arrays of shape [1, max_length]."""
+    import numpy as np
+
+    for sentence in sentences:
+        encoded = tokenizer(
+            TASK_PREFIX + sentence,
+            max_length=max_length,
+            padding="max_length",
+            truncation=True,
+            return_tensors="np",
+        )
+        yield (encoded["input_ids"].astype(np.int32),
+               encoded["attention_mask"].astype(np.int32))
+
+
+def encode_bucketed(tokenizer, sentences: List[str], buckets: List[int]) -> Iterator[Tuple]:
+    """Yield (bucket, input_ids, attention_mask), padded to the smallest bucket that fits."""
+    import numpy as np
+    from seq2seq_runner import select_bucket
+
+    for sentence in sentences:
+        ids = tokenizer(TASK_PREFIX + sentence, max_length=max(buckets), truncation=True)["input_ids"]
+        bucket = select_bucket(buckets, len(ids))
+        input_ids = np.zeros((1, bucket), dtype=np.int32)
+        attention_mask = np.zeros((1, bucket), dtype=np.int32)
+        input_ids[0, :len(ids)] = ids
+        attention_mask[0, :len(ids)] = 1
+        yield bucket, input_ids, attention_mask
+
+
+def representative_dataset(tokenizer, sentences: List[str], buckets: List[int]):
+    """
+    Representative dataset generator in the form TFLiteConverter expects.
+
+    Yields (signature_key, inputs) for every encode_{n} signature, so each
+    length bucket is calibrated on all sentences (truncated where needed).
+    """
+    def generator():
+        for bucket in buckets:
+            for input_ids, attention_mask in encode_sentences(tokenizer, sentences, bucket):
+                yield f"encode_{bucket}", {"input_ids": input_ids, "attention_mask": attention_mask}
+    return generator
+
+
+def run_interpreter(interpreter, inputs: Dict, signature: Optional[str] = None):
+    """
+    Run a TFLite interpreter on named inputs and return the first output as float32.
+
+    Inputs are matched by name; quantized outputs are dequantized with the
+    tensor's scale/zero point so results are comparable across models. With
+    `signature`, that signature runs instead of the default subgraph.
+    """
+    import numpy as np
+
+    if signature is not None:
+        runner = interpreter.get_signature_runner(signature)
+        input_details = runner.get_input_details()
+        outputs = runner(**{name: inputs[name].astype(detail["dtype"]) for name, detail in input_details.items()})
+        output_name = sorted(outputs)[0]
+        value = outputs[output_name]
+        scale, zero_point = runner.get_output_details()[output_name]["quantization"]
+        if scale:
+            value = (value.astype(np.float32) - zero_point) * scale
+        return value.astype(np.float32)
+
+    for detail in interpreter.get_input_details():
+        name = next((key for key in inputs if key in detail["name"]), None)
+        if name is None:
+            raise KeyError(f"No value for model input {detail['name']}")
+        interpreter.set_tensor(detail["index"], inputs[name].astype(detail["dtype"]))
+    interpreter.invoke()
+
+    output = interpreter.get_output_details()[0]
+    value = interpreter.get_tensor(output["index"])
+    scale, zero_point = output["quantization"]
+    if scale:
+        value = (value.astype(np.float32) - zero_point) * scale
+    return value.astype(np.float32)
+
+
+def compare_models(reference_path: Path, candidate_path: Path, tokenizer,
+                   sentences: List[str], buckets: List[int]) -> Dict:
+    """
+    Compare a quantized model with its FP32 reference on held-out sentences.
+
+    Each sentence runs through the encode_{n} signature of its length bucket.
+    Reports file sizes plus mean cosine similarity and mean absolute error of
+    the outputs over non-padding positions.
+    """
+    import numpy as np
+    import tensorflow as tf
+
+    reference = tf.lite.Interpreter(model_path=str(reference_path))
+    candidate = tf.lite.Interpreter(model_path=str(candidate_path))
+    reference.allocate_tensors()
+    candidate.allocate_tensors()
+
+    cosines = []
+    errors = []
+    bucket_counts: Dict[int, int] = {}
+    for bucket, input_ids, attention_mask in encode_bucketed(tokenizer, sentences, buckets):
+        bucket_counts[bucket] = bucket_counts.get(bucket, 0) + 1
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        expected = run_interpreter(reference, inputs, f"encode_{bucket}")
+        actual = run_interpreter(candidate, inputs, f"encode_{bucket}")
+
+        mask = attention_mask[0].astype(bool)
+        expected = expected[0][mask].reshape(int(mask.sum()), -1)
+        actual = actual[0][mask].reshape(int(mask.sum()), -1)
+
+        norms = np.linalg.norm(expected, axis=-1) * np.linalg.norm(actual, axis=-1)
+        cosines.append(float(np.mean(np.sum(expected * actual, axis=-1) / np.maximum(norms, 1e-12))))
+        errors.append(float(np.mean(np.abs(expected - actual))))
+
+    return {
+        "reference": str(reference_path),
+        "candidate": str(candidate_path),
+        "referenceSizeMB": round(reference_path.stat().st_size / 1024 / 1024, 2),
+        "candidateSizeMB": round(candidate_path.stat().st_size / 1024 / 1024, 2),
+        "heldOutSentences": len(sentences),
+        "sentencesPerBucket": {str(bucket): count for bucket, count in sorted(bucket_counts.items())},
+        "meanCosineSimilarity": round(float(np.mean(cosines)), 5) if cosines else None,
+        "minCosineSimilarity": round(float(np.min(cosines)), 5) if cosines else None,
+        "meanAbsoluteError": round(float(np.mean(errors)), 6) if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build INT8 calibration sentences from local data")
+    parser.add_argument("--language", "-l", required=True, help="Language code (e.g., en, de, es)")
+    parser.add_argument("--text", type=Path, action="append", default=[],
+                        help="Sentence file (one per line); can be repeated")
+    parser.add_argument("--samples", type=int, default=200, help="Calibration sentences (default: 200)")
+    parser.add_argument("--held-out", type=int, default=50, help="Held-out sentences (default: 50)")
+    parser.add_argument("--seed", type=int, default=0, help="Shuffle/sampling seed (default: 0)")
+
+    args = parser.parse_args()
+
+    calibration, held_out = build_calibration_sets(
+        args.language, args.text, args.samples, args.held_out, args.seed
+    )
+    if not calibration:
+        print(f"Error: No calibration data for '{args.language}' (no text files, no dictionary)")
+        return 1
+
+    print(f"Calibration sentences: {len(calibration)}")
+    print(f"Held-out sentences: {len(held_out)}")
+    for sentence in calibration[:5]:
+        print(f"  {sentence}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,132 +7,321 @@ suitable for on-device inference in TitanKeys.
 
 Usage:
     python convert_to_tflite.py --language LANG [--quantize]
+        [--full-int8 [--calibration-text FILE ...] [--allow-float-fallback]]
+        [--seq2seq] [--length-buckets N ...] [--pruned | --variant NAME] [--offline] [--rebuild]
 
 Arguments:
     --language  Language code (e.g., en, de, es)
-    --quantize  Apply INT8 quantization (reduces size ~4x, recommended)
+    --quantize  Apply INT8 dynamic-range quantization (reduces size ~4x, recommended)
+    --full-int8 Full-integer INT8 quantization calibrated on local sentences/dictionary
+                (int8 activations and outputs; token-ID inputs stay int32)
+    --allow-float-fallback  With --full-int8: if some ops have no int8 kernel, keep
+                them in float (and Flex) instead of failing; the number of
+                non-int8 ops is printed and written to the INT8 report
+    --length-buckets  Input lengths to export encoder signatures for (default: 16 32 64 128)
+    --pruned    Convert the vocabulary-pruned model written by prune_vocabulary.py
+    --variant   Convert downloaded/t5_gec_{lang}_{NAME} (e.g. student, see distill_student.py)
+    --offline   Never touch the network (transformers reads local files only)
+    --rebuild   Ignore cached stages and convert again
 
 The output will be:
-    - grammar_{lang}.tflite - The quantized model (~60MB for INT8)
+    - grammar_{lang}.tflite - The quantized model (~60MB for INT8), with one
+      encode_{n} signature per length bucket; the largest bucket is exported
+      first, so the default subgraph keeps the [1, 128] input shape
     - vocab_{lang}.txt - Vocabulary file for tokenization
+    - grammar_{lang}_fp32.tflite, grammar_{lang}_int8_report.json - with --full-int8:
+      the FP32 reference and a size/accuracy comparison on held-out sentences
+    - grammar_{lang}_seq2seq.tflite - with --seq2seq: encoder plus a single-step
+      decoder with explicit key/value cache tensors, as separate signatures
+      (encode_{n} per bucket, decode_init, decode_step; see seq2seq_runner.py)
+
+Every stage (PyTorch -> TF, TF -> SavedModel signatures, SavedModel ->
+TFLite per quantization mode) is cached in tools/models/cache/, keyed by
+the content hash of its input and its parameters (see artifact_cache.py).
+Changing only the quantization mode reruns the last stage, not the
+multi-minute TF conversion.
+
+Short inputs are padded only to the smallest bucket that fits instead of 128
+tokens, which cuts encoder and cross-attention cost for typical keyboard
+sentences severalfold.
 """
 
 import argparse
+import importlib.util
+import json
 import os
+import shutil
 import sys
 from pathlib import Path
+from typing import Dict, List
+
+from artifact_cache import CACHE_DIR, ArtifactCache, enable_offline, hash_strings, hash_tree, package_version
+
+DEFAULT_LENGTH_BUCKETS = [16, 32, 64, 128]
+
+
+def check_dependencies():
+    """Fail early if the conversion stack is missing, without importing it."""
+    missing = [name for name in ("tensorflow", "transformers", "torch")
+               if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"Error: Required library not found: {', '.join(missing)}")
+        print("\nInstall dependencies with:")
+        print("  pip install transformers tensorflow torch")
+        sys.exit(1)
 
-try:
-    import tensorflow as tf
-    from transformers import T5ForConditionalGeneration, T5Tokenizer
-    from transformers import TFT5ForConditionalGeneration
-except ImportError as e:
-    print(f"Error: Required library not found: {e}")
-    print("\nInstall dependencies with:")
-    print("  pip install transformers tensorflow torch")
-    sys.exit(1)
 
 def load_pytorch_model(model_path: Path):
-    """Load the PyTorch model and tokenizer."""
+    """Load the PyTorch model and tokenizer (a PrunedTokenizer for pruned models)."""
+    from transformers import T5ForConditionalGeneration
+    from prune_vocabulary import load_tokenizer
+
     print(f"Loading model from: {model_path}")
 
-    tokenizer = T5Tokenizer.from_pretrained(model_path / "tokenizer")
+    tokenizer = load_tokenizer(model_path / "tokenizer")
     model = T5ForConditionalGeneration.from_pretrained(model_path / "model")
 
     return model, tokenizer
 
 
-def convert_to_tensorflow(pt_model, tokenizer, language: str, output_dir: Path):
+def convert_to_tensorflow(model_path: Path, tf_output: Path):
     """Convert PyTorch model to TensorFlow format."""
-    print("\n[1/4] Converting PyTorch model to TensorFlow...")
+    from transformers import TFT5ForConditionalGeneration
 
     # Load as TF model directly (transformers supports this)
     tf_model = TFT5ForConditionalGeneration.from_pretrained(
-        output_dir.parent / f"t5_gec_{language}" / "model",
+        model_path / "model",
         from_pt=True
     )
 
-    tf_output = output_dir / f"tf_model_{language}"
     tf_model.save_pretrained(tf_output)
     print(f"TensorFlow model saved to: {tf_output}")
 
     return tf_model
 
 
-def create_concrete_function(tf_model, max_length: int = 128):
-    """Create a concrete function for TFLite conversion."""
-    print("\n[2/4] Creating concrete function for TFLite...")
+class CachedTFModel:
+    """
+    The PyTorch -> TensorFlow conversion as a cached stage.
+
+    The TF model is only loaded (or converted) when a later stage actually
+    has to run, so a fully cached conversion never imports transformers.
+    """
+
+    def __init__(self, model_path: Path, cache: ArtifactCache):
+        print("\n[1/3] Converting PyTorch model to TensorFlow...")
+        self.model_path = model_path
+        self.tokenizer_hash = hash_tree(model_path / "tokenizer")
+        self._model = None
+        self.directory, self.content_hash = cache.stage(
+            "tf_model", self._convert,
+            model=hash_tree(model_path / "model"),
+            transformers=package_version("transformers"),
+            tensorflow=package_version("tensorflow"),
+        )
+
+    def _convert(self, tf_output: Path):
+        self._model = convert_to_tensorflow(self.model_path, tf_output)
+
+    def get(self):
+        if self._model is None:
+            from transformers import TFT5ForConditionalGeneration
+
+            self._model = TFT5ForConditionalGeneration.from_pretrained(self.directory)
+        return self._model
+
+
+def build_encoder_function(tf_model, max_length: int = 128):
+    """Concrete function running the T5 encoder on fixed [1, max_length] inputs."""
+    import tensorflow as tf
+
+    encoder = tf_model.get_encoder()
 
     @tf.function(input_signature=[
         tf.TensorSpec(shape=[1, max_length], dtype=tf.int32, name="input_ids"),
         tf.TensorSpec(shape=[1, max_length], dtype=tf.int32, name="attention_mask"),
     ])
-    def serving_fn(input_ids, attention_mask):
-        # For T5, we need to use the encoder-decoder architecture
-        # This is a simplified version - full implementation would need decoder
-        outputs = tf_model.generate(
-            input_ids=input_ids,
-            attention_mask=attention_mask,
-            max_length=max_length,
-            num_beams=1,  # Greedy decoding for speed
-            early_stopping=True
-        )
-        return {"output_ids": outputs}
+    def encoder_fn(input_ids, attention_mask):
+        outputs = encoder(input_ids=input_ids, attention_mask=attention_mask)
+        return {"last_hidden_state": outputs.last_hidden_state}
 
-    return serving_fn
+    return encoder_fn.get_concrete_function()
 
 
-def convert_to_tflite(tf_model, tokenizer, language: str, output_dir: Path, quantize: bool):
-    """Convert TensorFlow model to TFLite format."""
-    print("\n[3/4] Converting to TFLite format...")
+def encoder_signature_keys(buckets: List[int]) -> List[str]:
+    """encode_{n} signature names, largest bucket first (it becomes the default subgraph)."""
+    return [f"encode_{bucket}" for bucket in sorted(buckets, reverse=True)]
 
-    max_length = 128
 
-    # Create saved model with concrete function
-    saved_model_dir = output_dir / f"saved_model_{language}"
-    saved_model_dir.mkdir(parents=True, exist_ok=True)
+def encoder_signatures(tf_model, buckets: List[int]) -> Dict:
+    """encode_{n} concrete functions, in encoder_signature_keys() order."""
+    return {key: build_encoder_function(tf_model, int(key.split("_")[1]))
+            for key in encoder_signature_keys(buckets)}
 
-    # For T5 models, we'll export the encoder portion for efficient inference
-    # The full encoder-decoder is complex for TFLite, so we use encoder + simple decoder
 
-    try:
-        # Export encoder
-        encoder = tf_model.get_encoder()
+def save_signatures(tf_model, signatures: Dict, saved_model_dir: Path):
+    """Write concrete functions as the signatures of one SavedModel."""
+    import tensorflow as tf
 
-        @tf.function(input_signature=[
-            tf.TensorSpec(shape=[1, max_length], dtype=tf.int32),
-            tf.TensorSpec(shape=[1, max_length], dtype=tf.int32),
-        ])
-        def encoder_fn(input_ids, attention_mask):
-            return encoder(input_ids=input_ids, attention_mask=attention_mask)
+    module = tf.Module()
+    module.model = tf_model
+    tf.saved_model.save(module, str(saved_model_dir), signatures=signatures)
+
+
+def convert_saved_model(saved_model_dir: Path, signature_keys: List[str], mode: str,
+                        representative_data=None, allow_float_fallback: bool = False) -> bytes:
+    """
+    Convert SavedModel signatures to one multi-signature TFLite flatbuffer.
+
+    mode is one of:
+        fp32     - no quantization
+        dynamic  - INT8 weights, float activations (dynamic-range quantization)
+        int8     - full-integer INT8 weights and activations, calibrated with
+                   representative_data (yielding (signature_key, inputs) pairs);
+                   outputs are int8. Token-ID inputs cannot be represented in
+                   int8 and stay int32. Fails if an op has no int8 kernel,
+                   unless allow_float_fallback keeps such ops in float/Flex
+                   (count them with non_int8_ops()).
+    """
+    import tensorflow as tf
 
-        # Save as concrete function
-        concrete_fn = encoder_fn.get_concrete_function()
+    converter = tf.lite.TFLiteConverter.from_saved_model(
+        str(saved_model_dir), signature_keys=signature_keys
+    )
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+        tf.lite.OpsSet.SELECT_TF_OPS  # For ops not in TFLite builtins
+    ]
+
+    if mode == "dynamic":
+        print("  Applying INT8 dynamic-range quantization...")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.int8]
+    elif mode == "int8":
+        print("  Applying full-integer INT8 quantization (calibrating)...")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_data
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_output_type = tf.int8
+        try:
+            return converter.convert()
+        except Exception as e:
+            if not allow_float_fallback:
+                raise RuntimeError(f"Pure INT8 conversion failed ({e}); pass --allow-float-fallback to keep "
+                                   f"ops without int8 kernels in float") from e
+            # Some T5 ops have no int8 kernel; keep them in float and quantize the rest
+            print(f"  [WARN] Pure INT8 conversion failed ({e}); keeping unsupported ops in float")
+            converter.target_spec.supported_ops = [
+                tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+                tf.lite.OpsSet.TFLITE_BUILTINS,
+                tf.lite.OpsSet.SELECT_TF_OPS,
+            ]
+
+    return converter.convert()
+
+
+def non_int8_ops(tflite_path: Path) -> Dict[str, int]:
+    """Op name -> count of ops that run in float: Flex ops and ops with float32 tensors."""
+    import numpy as np
+    from seq2seq_runner import load_interpreter
+
+    interpreter = load_interpreter(tflite_path)
+    dtypes = {t["index"]: t["dtype"] for t in interpreter.get_tensor_details()}
+    counts: Dict[str, int] = {}
+    for op in interpreter._get_ops_details():
+        tensors = [i for i in list(op["inputs"]) + list(op["outputs"]) if i >= 0]
+        if op["op_name"].startswith("Flex") or any(dtypes.get(i) == np.float32 for i in tensors):
+            counts[op["op_name"]] = counts.get(op["op_name"], 0) + 1
+    return counts
+
+
+def cached_tflite(cache: ArtifactCache, stage: str, saved_model_dir: Path, saved_model_hash: str,
+                  signature_keys: List[str], mode: str, representative_data=None,
+                  allow_float_fallback: bool = False, **params) -> Path:
+    """TFLite conversion of a cached SavedModel as its own stage (one entry per mode/params)."""
+    def produce(directory: Path):
+        (directory / "model.tflite").write_bytes(
+            convert_saved_model(saved_model_dir, signature_keys, mode, representative_data, allow_float_fallback)
+        )
 
-        # Convert to TFLite
-        converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_fn])
+    if allow_float_fallback:
+        # A float-fallback build is a different artifact from a pure int8 one
+        params["allow_float_fallback"] = True
 
-        if quantize:
-            print("  Applying INT8 quantization...")
-            converter.optimizations = [tf.lite.Optimize.DEFAULT]
-            converter.target_spec.supported_types = [tf.int8]
-            # For full quantization, we'd need representative dataset
-            # converter.representative_dataset = representative_dataset_gen
+    directory, _ = cache.stage(stage, produce, saved_model=saved_model_hash, signatures=signature_keys,
+                               mode=mode, tensorflow=package_version("tensorflow"), **params)
+    return directory / "model.tflite"
 
-        converter.target_spec.supported_ops = [
-            tf.lite.OpsSet.TFLITE_BUILTINS,
-            tf.lite.OpsSet.SELECT_TF_OPS  # For ops not in TFLite builtins
-        ]
 
-        tflite_model = converter.convert()
+def convert_to_tflite(tf_model: CachedTFModel, tokenizer, language: str, output_dir: Path, quantize: bool,
+                      full_int8: bool = False, calibration_sentences=None, held_out_sentences=None,
+                      length_buckets: List[int] = DEFAULT_LENGTH_BUCKETS, cache: ArtifactCache = None,
+                      allow_float_fallback: bool = False):
+    """Convert TensorFlow model to TFLite format."""
+    print("\n[2/3] Converting to TFLite format...")
+    print(f"  Length buckets: {', '.join(str(b) for b in sorted(length_buckets))}")
 
-        # Save TFLite model
+    cache = cache or ArtifactCache()
+
+    # For T5 models, we'll export the encoder portion for efficient inference
+    # The full encoder-decoder is complex for TFLite, so we use encoder + simple decoder
+
+    try:
+        signature_keys = encoder_signature_keys(length_buckets)
+        saved_model_dir, saved_model_hash = cache.stage(
+            "saved_model",
+            lambda directory: save_signatures(tf_model.get(), encoder_signatures(tf_model.get(), length_buckets),
+                                              directory),
+            tf_model=tf_model.content_hash, signatures=signature_keys,
+        )
         tflite_path = output_dir / f"grammar_{language}.tflite"
-        with open(tflite_path, "wb") as f:
-            f.write(tflite_model)
+
+        if full_int8:
+            from calibration import compare_models, representative_dataset
+
+            # FP32 reference for the accuracy report
+            fp32_path = output_dir / f"grammar_{language}_fp32.tflite"
+            shutil.copyfile(cached_tflite(cache, "tflite", saved_model_dir, saved_model_hash,
+                                          signature_keys, "fp32"), fp32_path)
+            print(f"FP32 reference saved to: {fp32_path}")
+
+            cached_path = cached_tflite(
+                cache, "tflite", saved_model_dir, saved_model_hash, signature_keys, "int8",
+                representative_dataset(tokenizer, calibration_sentences, length_buckets),
+                allow_float_fallback=allow_float_fallback,
+                tokenizer=tf_model.tokenizer_hash, calibration=hash_strings(calibration_sentences),
+            )
+        else:
+            cached_path = cached_tflite(cache, "tflite", saved_model_dir, saved_model_hash, signature_keys,
+                                        "dynamic" if quantize else "fp32")
+
+        # Save TFLite model
+        shutil.copyfile(cached_path, tflite_path)
 
         print(f"TFLite model saved to: {tflite_path}")
-        print(f"Model size: {len(tflite_model) / 1024 / 1024:.1f} MB")
+        print(f"Model size: {tflite_path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        float_ops = non_int8_ops(tflite_path) if full_int8 else {}
+        if float_ops:
+            print(f"  [WARN] Not fully INT8: {sum(float_ops.values())} ops run in float "
+                  f"({', '.join(f'{name} x{count}' for name, count in sorted(float_ops.items()))})")
+
+        if full_int8 and held_out_sentences:
+            print(f"\n  Comparing INT8 against FP32 on {len(held_out_sentences)} held-out sentences...")
+            report = compare_models(fp32_path, tflite_path, tokenizer, held_out_sentences, length_buckets)
+            report["calibrationSentences"] = len(calibration_sentences)
+            report["floatFallback"] = bool(float_ops)
+            report["nonInt8Ops"] = sum(float_ops.values())
+            report["nonInt8OpsByName"] = float_ops
+            report_path = output_dir / f"grammar_{language}_int8_report.json"
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"  Size: {report['referenceSizeMB']} MB (FP32) -> {report['candidateSizeMB']} MB "
+                  f"({'INT8 with float fallback' if float_ops else 'INT8'})")
+            print(f"  Cosine similarity: mean {report['meanCosineSimilarity']}, "
+                  f"min {report['minCosineSimilarity']}")
+            print(f"  Mean absolute error: {report['meanAbsoluteError']}")
+            print(f"  Report saved to: {report_path}")
 
         return tflite_path
 
@@ -143,9 +332,144 @@ def convert_to_tflite(tf_model, tokenizer, language: str, output_dir: Path, quan
         raise
 
 
+def build_seq2seq_module(tf_model, length_buckets: List[int] = DEFAULT_LENGTH_BUCKETS):
+    """
+    tf.Module with encode_{n} (one per length bucket) / decode_init / decode_step functions.
+
+    Cache tensors are passed explicitly, one per layer:
+        past_self_key_{i}, past_self_value_{i}  [1, heads, decoded, d_kv] (grows by one per step)
+        cross_key_{i}, cross_value_{i}          [1, heads, bucket, d_kv] (fixed per sentence)
+    decode_step returns the grown self-attention cache as present_self_{key,value}_{i}.
+    The decoder functions take any encoder length, so one copy serves all buckets.
+    """
+    import tensorflow as tf
+
+    config = tf_model.config
+    num_layers = config.num_decoder_layers
+    heads = config.num_heads
+    d_kv = config.d_kv
+    d_model = config.d_model
+    encoder = tf_model.get_encoder()
+
+    decoder_ids_spec = tf.TensorSpec(shape=[1, 1], dtype=tf.int32, name="decoder_input_ids")
+    hidden_spec = tf.TensorSpec(shape=[1, None, d_model], dtype=tf.float32, name="encoder_hidden_states")
+    encoder_mask_spec = tf.TensorSpec(shape=[1, None], dtype=tf.int32, name="encoder_attention_mask")
+
+    self_names = [name for i in range(num_layers) for name in (f"self_key_{i}", f"self_value_{i}")]
+    cross_names = [name for i in range(num_layers) for name in (f"cross_key_{i}", f"cross_value_{i}")]
+    past_specs = [tf.TensorSpec(shape=[1, heads, None, d_kv], dtype=tf.float32, name=f"past_{name}")
+                  for name in self_names]
+    cross_specs = [tf.TensorSpec(shape=[1, heads, None, d_kv], dtype=tf.float32, name=name)
+                   for name in cross_names]
+
+    def run_decoder(decoder_input_ids, encoder_hidden_states, encoder_attention_mask, past_key_values):
+        outputs = tf_model(
+            decoder_input_ids=decoder_input_ids,
+            encoder_outputs=(encoder_hidden_states,),
+            attention_mask=encoder_attention_mask,
+            past_key_values=past_key_values,
+            use_cache=True,
+            return_dict=True,
+            training=False,
+        )
+        # past_key_values: per layer (self_key, self_value, cross_key, cross_value)
+        return outputs.logits[:, -1, :], outputs.past_key_values
+
+    def encode(input_ids, attention_mask):
+        outputs = encoder(input_ids=input_ids, attention_mask=attention_mask)
+        return {"encoder_hidden_states": outputs.last_hidden_state}
+
+    def decode_init(decoder_input_ids, encoder_hidden_states, encoder_attention_mask):
+        logits, present = run_decoder(decoder_input_ids, encoder_hidden_states, encoder_attention_mask, None)
+        result = {"logits": logits}
+        for i, (self_key, self_value, cross_key, cross_value) in enumerate(present):
+            result[f"present_self_key_{i}"] = self_key
+            result[f"present_self_value_{i}"] = self_value
+            result[f"cross_key_{i}"] = cross_key
+            result[f"cross_value_{i}"] = cross_value
+        return result
+
+    def decode_step(decoder_input_ids, encoder_hidden_states, encoder_attention_mask, *cache):
+        past, cross = cache[:len(self_names)], cache[len(self_names):]
+        past_key_values = tuple(
+            (past[2 * i], past[2 * i + 1], cross[2 * i], cross[2 * i + 1]) for i in range(num_layers)
+        )
+        logits, present = run_decoder(decoder_input_ids, encoder_hidden_states,
+                                      encoder_attention_mask, past_key_values)
+        result = {"logits": logits}
+        for i, layer in enumerate(present):
+            result[f"present_self_key_{i}"] = layer[0]
+            result[f"present_self_value_{i}"] = layer[1]
+        return result
+
+    module = tf.Module()
+    module.model = tf_model
+    module.length_buckets = tuple(sorted(length_buckets, reverse=True))
+    for bucket in module.length_buckets:
+        setattr(module, f"encode_{bucket}", tf.function(encode, input_signature=[
+            tf.TensorSpec(shape=[1, bucket], dtype=tf.int32, name="input_ids"),
+            tf.TensorSpec(shape=[1, bucket], dtype=tf.int32, name="attention_mask"),
+        ]))
+    module.decode_init = tf.function(
+        decode_init, input_signature=[decoder_ids_spec, hidden_spec, encoder_mask_spec]
+    )
+    module.decode_step = tf.function(
+        decode_step, input_signature=[decoder_ids_spec, hidden_spec, encoder_mask_spec] + past_specs + cross_specs
+    )
+    return module
+
+
+def convert_seq2seq_to_tflite(tf_model: CachedTFModel, language: str, output_dir: Path, quantize: bool,
+                              length_buckets: List[int] = DEFAULT_LENGTH_BUCKETS,
+                              cache: ArtifactCache = None) -> Path:
+    """Export bucketed encoders + cached single-step decoder as one multi-signature TFLite model."""
+    import tensorflow as tf
+
+    print("\n  Exporting encoder/decoder split with KV cache...")
+
+    cache = cache or ArtifactCache()
+    signature_keys = encoder_signature_keys(length_buckets) + ["decode_init", "decode_step"]
+
+    def save_module(saved_model_dir: Path):
+        module = build_seq2seq_module(tf_model.get(), length_buckets)
+        signatures = {f"encode_{bucket}": getattr(module, f"encode_{bucket}").get_concrete_function()
+                      for bucket in module.length_buckets}
+        signatures["decode_init"] = module.decode_init.get_concrete_function()
+        signatures["decode_step"] = module.decode_step.get_concrete_function()
+        tf.saved_model.save(module, str(saved_model_dir), signatures=signatures)
+
+    saved_model_dir, saved_model_hash = cache.stage(
+        "saved_model_seq2seq", save_module, tf_model=tf_model.content_hash, signatures=signature_keys,
+    )
+
+    def convert(directory: Path):
+        converter = tf.lite.TFLiteConverter.from_saved_model(
+            str(saved_model_dir), signature_keys=signature_keys
+        )
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS
+        ]
+        if quantize:
+            print("  Applying INT8 dynamic-range quantization...")
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        (directory / "model.tflite").write_bytes(converter.convert())
+
+    cached_dir, _ = cache.stage("tflite_seq2seq", convert, saved_model=saved_model_hash,
+                                quantize=quantize, tensorflow=package_version("tensorflow"))
+
+    tflite_path = output_dir / f"grammar_{language}_seq2seq.tflite"
+    shutil.copyfile(cached_dir / "model.tflite", tflite_path)
+
+    print(f"Seq2seq TFLite model saved to: {tflite_path}")
+    print(f"Model size: {tflite_path.stat().st_size / 1024 / 1024:.1f} MB")
+    print(f"Signatures: {', '.join(signature_keys)}")
+    return tflite_path
+
+
 def export_vocabulary(tokenizer, language: str, output_dir: Path):
     """Export vocabulary file for tokenization."""
-    print("\n[4/4] Exporting vocabulary...")
+    print("\n[3/3] Exporting vocabulary...")
 
     vocab_path = output_dir / f"vocab_{language}.txt"
 
@@ -197,18 +521,107 @@ def main():
         action="store_true",
         help="Disable quantization (larger model, potentially better accuracy)"
     )
+    parser.add_argument(
+        "--full-int8",
+        action="store_true",
+        help="Full-integer INT8 quantization with a representative dataset (faster on phone CPUs)"
+    )
+    parser.add_argument(
+        "--allow-float-fallback",
+        action="store_true",
+        help="With --full-int8: keep ops without int8 kernels in float instead of failing (reported)"
+    )
+    parser.add_argument(
+        "--calibration-text",
+        type=Path,
+        action="append",
+        default=[],
+        help="Sentence file (one per line) for calibration; can be repeated. "
+             "The language dictionary fills up missing samples"
+    )
+    parser.add_argument(
+        "--calibration-samples",
+        type=int,
+        default=200,
+        help="Number of calibration sentences (default: 200)"
+    )
+    parser.add_argument(
+        "--held-out",
+        type=int,
+        default=50,
+        help="Held-out sentences for the INT8 vs FP32 report (default: 50)"
+    )
+    parser.add_argument(
+        "--seq2seq",
+        action="store_true",
+        help="Also export encoder + KV-cached single-step decoder signatures (grammar_{lang}_seq2seq.tflite)"
+    )
+    parser.add_argument(
+        "--length-buckets",
+        type=int,
+        nargs="+",
+        default=DEFAULT_LENGTH_BUCKETS,
+        help="Input lengths to export encoder signatures for (default: 16 32 64 128)"
+    )
+    variant = parser.add_mutually_exclusive_group()
+    variant.add_argument(
+        "--pruned",
+        action="store_const",
+        const="pruned",
+        dest="variant",
+        help="Convert the vocabulary-pruned model (t5_gec_{lang}_pruned, see prune_vocabulary.py)"
+    )
+    variant.add_argument(
+        "--variant",
+        default=None,
+        help="Convert the model in t5_gec_{lang}_{VARIANT} (e.g. student, see distill_student.py)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=CACHE_DIR,
+        help="Stage cache directory (default: tools/models/cache, or $TITANKEYS_CACHE_DIR)"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Ignore cached stages and convert again"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Never touch the network (also enabled by TITANKEYS_OFFLINE=1)"
+    )
 
     args = parser.parse_args()
 
+    if args.offline:
+        enable_offline()
+
     if args.no_quantize:
         args.quantize = False
 
-    model_path = args.input_dir / f"t5_gec_{args.language}"
+    if any(bucket <= 0 for bucket in args.length_buckets):
+        parser.error("--length-buckets must be positive")
+    if args.allow_float_fallback and not args.full_int8:
+        parser.error("--allow-float-fallback only applies to --full-int8")
+    args.length_buckets = sorted(set(args.length_buckets))
+
+    check_dependencies()
+
+    model_path = args.input_dir / f"t5_gec_{args.language}{f'_{args.variant}' if args.variant else ''}"
 
     if not model_path.exists():
         print(f"Error: Model not found at {model_path}")
-        print(f"\nFirst download the model using:")
-        print(f"  python download_grammar_model.py --language {args.language}")
+        if args.variant == "pruned":
+            print(f"\nFirst prune the model using:")
+            print(f"  python prune_vocabulary.py --language {args.language}")
+        elif args.variant == "student":
+            print(f"\nFirst distill the model using:")
+            print(f"  python distill_student.py --language {args.language}")
+        elif args.variant is None:
+            print(f"\nFirst download the model using:")
+            print(f"  python download_grammar_model.py --language {args.language}")
         sys.exit(1)
 
     args.output_dir.mkdir(parents=True, exist_ok=True)
@@ -219,18 +632,60 @@ def main():
     print(f"\nLanguage: {args.language}")
     print(f"Input: {model_path}")
     print(f"Output: {args.output_dir}")
-    print(f"Quantization: {'INT8' if args.quantize else 'None (FP32)'}")
+    if args.full_int8:
+        print(f"Quantization: Full-integer INT8 (calibrated"
+              f"{', float fallback allowed' if args.allow_float_fallback else ''})")
+    else:
+        print(f"Quantization: {'INT8' if args.quantize else 'None (FP32)'}")
     print()
 
+    calibration_sentences = held_out_sentences = None
+    if args.full_int8:
+        from calibration import build_calibration_sets
+
+        calibration_sentences, held_out_sentences = build_calibration_sets(
+            args.language, args.calibration_text, args.calibration_samples, args.held_out
+        )
+        if not calibration_sentences:
+            print(f"Error: No calibration data for '{args.language}'")
+            print("Pass --calibration-text or add a dictionary for the language.")
+            sys.exit(1)
+        print(f"Calibration: {len(calibration_sentences)} sentences, "
+              f"held-out: {len(held_out_sentences)} sentences\n")
+
     try:
-        # Load PyTorch model
-        pt_model, tokenizer = load_pytorch_model(model_path)
+        from prune_vocabulary import load_tokenizer
+
+        cache = ArtifactCache(args.cache_dir, rebuild=args.rebuild)
+        tokenizer = load_tokenizer(model_path / "tokenizer")
 
-        # Convert to TensorFlow
-        tf_model = convert_to_tensorflow(pt_model, tokenizer, args.language, args.output_dir)
+        # Convert to TensorFlow (loaded lazily, only if a later stage is not cached)
+        tf_model = CachedTFModel(model_path, cache)
 
         # Convert to TFLite
-        tflite_path = convert_to_tflite(tf_model, tokenizer, args.language, args.output_dir, args.quantize)
+        tflite_path = convert_to_tflite(
+            tf_model, tokenizer, args.language, args.output_dir, args.quantize,
+            full_int8=args.full_int8,
+            calibration_sentences=calibration_sentences,
+            held_out_sentences=held_out_sentences,
+            length_buckets=args.length_buckets,
+            cache=cache,
+            allow_float_fallback=args.allow_float_fallback,
+        )
+
+        seq2seq_path = None
+        if args.seq2seq:
+            # Full-integer calibration of the decoder cache is not supported; use dynamic range
+            seq2seq_path = convert_seq2seq_to_tflite(
+                tf_model, args.language, args.output_dir, args.quantize or args.full_int8,
+                args.length_buckets, cache
+            )
+
+            from seq2seq_runner import TFLiteSeq2SeqRunner
+
+            sample = "I goed to the store yesterday."
+            runner = TFLiteSeq2SeqRunner(seq2seq_path)
+            print(f"  Reference greedy decode: '{sample}' -> '{runner.correct(tokenizer, sample)}'")
 
         # Export vocabulary
         vocab_path = export_vocabulary(tokenizer, args.language, args.output_dir)
@@ -240,6 +695,8 @@ def main():
         print("=" * 50)
         print(f"\nOutput files:")
         print(f"  - {tflite_path}")
+        if seq2seq_path is not None:
+            print(f"  - {seq2seq_path}")
         print(f"  - {vocab_path}")
         print(f"\nTo use these files:")
         print(f"  1. Upload to model hosting (GitHub Releases, Firebase, etc.)")
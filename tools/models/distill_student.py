@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Distill the T5 GEC teacher into a narrower, shallower student on CPU.
+
+T5-small is the smallest pre-trained GEC model, and it does not fit the
+<100 ms per sentence budget on mid-range phones. This script:
+
+    1. Builds training sentences from local text (and the language dictionary
+       when there is too little text), corrupts most of them with synthetic
+       typos and word-level errors, and labels every sentence with the
+       teacher's greedy correction (cached in distill_data.jsonl)
+    2. Creates a student T5 (default: d_model 256, 4 encoder / 2 decoder
+       layers) initialized from the teacher: the embedding is projected onto
+       its top principal directions, and layers are copied when widths match
+    3. Trains the student on CPU on the teacher outputs (sequence-level KD),
+       optionally mixed with the teacher's soft token distributions
+    4. Saves it as downloaded/t5_gec_{lang}_student/, exports it through
+       convert_to_tflite.py / export_onnx.py (--variant student) and writes
+       distill_report.json with size, latency and accuracy against the teacher
+
+Usage:
+    python distill_student.py --language en --text ../corpora/en_sentences.txt [--epochs 3] [--seq2seq]
+"""
+
+import argparse
+import copy
+import difflib
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from calibration import TASK_PREFIX, build_calibration_sets
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# Per-sentence inference budget from app/src/main/assets/models/README.md
+LATENCY_BUDGET_MS = 100
+NEIGHBOR_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def corrupt_sentence(sentence: str, rng: random.Random, rate: float = 0.15) -> str:
+    """Inject synthetic errors: character typos plus dropped, doubled and swapped words."""
+    words = sentence.split()
+    result = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if rng.random() >= rate or not word:
+            result.append(word)
+            i += 1
+            continue
+        kind = rng.randrange(6)
+        position = rng.randrange(len(word))
+        if kind == 0 and len(word) > 1:
+            word = word[:position] + word[position + 1:]
+        elif kind == 1 and len(word) > 1 and position < len(word) - 1:
+            word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+        elif kind == 2:
+            word = word[:position] + rng.choice(NEIGHBOR_LETTERS) + word[position + 1:]
+        elif kind == 3 and len(words) > 3:
+            i += 1
+            continue
+        elif kind == 4:
+            result.append(word)
+        elif kind == 5 and i + 1 < len(words):
+            result.extend([words[i + 1], word])
+            i += 2
+            continue
+        result.append(word)
+        i += 1
+    return " ".join(result)
+
+
+def encode_batch(tokenizer, texts: List[str], max_length: int, pad_value: int = 0):
+    """Encode, truncate (keeping </s>) and right-pad texts; returns (ids, mask) tensors."""
+    import torch
+
+    encoded = []
+    for text in texts:
+        ids = tokenizer.encode(text)
+        if len(ids) > max_length:
+            ids = ids[:max_length - 1] + [tokenizer.eos_token_id]
+        encoded.append(ids)
+    width = max(len(ids) for ids in encoded)
+    input_ids = torch.full((len(texts), width), pad_value, dtype=torch.long)
+    attention_mask = torch.zeros((len(texts), width), dtype=torch.long)
+    for row, ids in enumerate(encoded):
+        input_ids[row, :len(ids)] = torch.tensor(ids)
+        attention_mask[row, :len(ids)] = 1
+    return input_ids, attention_mask
+
+
+def generate_texts(model, tokenizer, texts: List[str], max_length: int, batch_size: int = 16) -> List[str]:
+    """Greedy-decode a list of sources in batches."""
+    import torch
+
+    outputs = []
+    model.eval()
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            batch = [TASK_PREFIX + t for t in texts[start:start + batch_size]]
+            input_ids, attention_mask = encode_batch(tokenizer, batch, max_length, tokenizer.pad_token_id)
+            generated = model.generate(input_ids=input_ids, attention_mask=attention_mask,
+                                       max_length=max_length, num_beams=1)
+            outputs.extend(tokenizer.decode(ids, skip_special_tokens=True) for ids in generated)
+    return outputs
+
+
+def build_distillation_data(teacher, tokenizer, sentences: List[str], max_length: int,
+                            noise_rate: float, clean_fraction: float, seed: int) -> List[Dict]:
+    """Corrupt sentences and label them with the teacher: [{source, target, clean}]."""
+    rng = random.Random(seed)
+    sources = [s if rng.random() < clean_fraction else corrupt_sentence(s, rng, noise_rate) for s in sentences]
+    targets = []
+    for start in range(0, len(sources), 64):
+        targets.extend(generate_texts(teacher, tokenizer, sources[start:start + 64], max_length))
+        print(f"  Labeled {len(targets)}/{len(sources)} sentences...", end="\r")
+    print()
+    return [{"source": s, "target": t, "clean": c} for s, t, c in zip(sources, targets, sentences)]
+
+
+def load_or_build_data(path: Path, sentences: List[str], relabel: bool, build) -> List[Dict]:
+    """Read cached teacher labels from a JSONL file if they match `sentences`, or build and cache them."""
+    if path.exists() and not relabel:
+        with open(path, "r", encoding="utf-8") as f:
+            data = [json.loads(line) for line in f if line.strip()]
+        if [e["clean"] for e in data] == sentences:
+            print(f"  Reusing {len(data)} teacher-labeled sentences from {path}")
+            return data
+    data = build()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for example in data:
+            f.write(json.dumps(example, ensure_ascii=False) + "\n")
+    return data
+
+
+def student_config(teacher_config, d_model: int, d_ff: int, num_heads: int,
+                   encoder_layers: int, decoder_layers: int):
+    """Teacher config with a narrower/shallower architecture (same vocabulary)."""
+    config = copy.deepcopy(teacher_config)
+    config.d_model = d_model
+    config.d_ff = d_ff
+    config.num_heads = num_heads
+    config.d_kv = d_model // num_heads
+    config.num_layers = encoder_layers
+    config.num_decoder_layers = decoder_layers
+    return config
+
+
+def layer_map(student_layers: int, teacher_layers: int) -> List[int]:
+    """Evenly spaced teacher layers for each student layer (first maps to first)."""
+    if student_layers == 1:
+        return [0]
+    return [round(i * (teacher_layers - 1) / (student_layers - 1)) for i in range(student_layers)]
+
+
+def init_student_from_teacher(student, teacher):
+    """
+    Initialize the student from the teacher.
+
+    Same width: embeddings are copied, and evenly spaced layers too when
+    d_ff and the head count also match. Narrower: the
+    embedding is projected onto the teacher embedding's top principal
+    directions (rescaled to the teacher's spread), layers start fresh.
+    """
+    import torch
+
+    teacher_embedding = teacher.get_input_embeddings().weight.data
+    d_model = student.config.d_model
+
+    if d_model == teacher_embedding.shape[1]:
+        student.get_input_embeddings().weight.data.copy_(teacher_embedding)
+        same_layers = (student.config.d_ff == teacher.config.d_ff
+                       and student.config.num_heads == teacher.config.num_heads)
+        for stack in ("encoder", "decoder") if same_layers else ():
+            student_blocks = getattr(student, stack).block
+            teacher_blocks = getattr(teacher, stack).block
+            for i, j in enumerate(layer_map(len(student_blocks), len(teacher_blocks))):
+                student_blocks[i].load_state_dict(teacher_blocks[j].state_dict())
+            getattr(student, stack).final_layer_norm.load_state_dict(
+                getattr(teacher, stack).final_layer_norm.state_dict()
+            )
+        if not student.config.tie_word_embeddings:
+            student.get_output_embeddings().weight.data.copy_(teacher.get_output_embeddings().weight.data)
+        return student
+
+    centered = teacher_embedding - teacher_embedding.mean(dim=0)
+    _, _, vh = torch.linalg.svd(centered, full_matrices=False)
+    projected = teacher_embedding @ vh[:d_model].T
+    projected *= teacher_embedding.std() / projected.std()
+    student.get_input_embeddings().weight.data.copy_(projected)
+    if not student.config.tie_word_embeddings:
+        head = teacher.get_output_embeddings().weight.data
+        student.get_output_embeddings().weight.data.copy_((head @ vh[:d_model].T) * (head.std() / projected.std()))
+    return student
+
+
+def train_student(student, teacher, tokenizer, data: List[Dict], epochs: int, batch_size: int,
+                  learning_rate: float, kd_alpha: float, temperature: float, max_length: int, seed: int):
+    """
+    Train on teacher outputs (cross-entropy), mixed with KL divergence to the
+    teacher's temperature-softened token distributions when kd_alpha > 0.
+    """
+    import torch
+    import torch.nn.functional as F
+
+    torch.manual_seed(seed)
+    rng = random.Random(seed)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate)
+    teacher.eval()
+    order = list(range(len(data)))
+
+    for epoch in range(epochs):
+        student.train()
+        rng.shuffle(order)
+        losses = []
+        start_time = time.perf_counter()
+        for start in range(0, len(order), batch_size):
+            batch = [data[i] for i in order[start:start + batch_size]]
+            input_ids, attention_mask = encode_batch(
+                tokenizer, [TASK_PREFIX + e["source"] for e in batch], max_length, tokenizer.pad_token_id
+            )
+            labels, _ = encode_batch(tokenizer, [e["target"] for e in batch], max_length, -100)
+
+            outputs = student(input_ids=input_ids, attention_mask=attention_mask, labels=labels)
+            loss = outputs.loss
+            if kd_alpha > 0:
+                with torch.no_grad():
+                    teacher_logits = teacher(input_ids=input_ids, attention_mask=attention_mask,
+                                             labels=labels).logits
+                mask = labels != -100
+                kd_loss = F.kl_div(
+                    F.log_softmax(outputs.logits[mask] / temperature, dim=-1),
+                    F.softmax(teacher_logits[mask] / temperature, dim=-1),
+                    reduction="batchmean",
+                ) * temperature ** 2
+                loss = (1 - kd_alpha) * loss + kd_alpha * kd_loss
+
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            optimizer.zero_grad()
+            losses.append(float(loss))
+            print(f"  Epoch {epoch + 1}/{epochs}: batch {start // batch_size + 1}, "
+                  f"loss {statistics.mean(losses[-50:]):.4f}", end="\r")
+        print(f"  Epoch {epoch + 1}/{epochs}: mean loss {statistics.mean(losses):.4f} "
+              f"({time.perf_counter() - start_time:.0f}s)")
+    return student
+
+
+def evaluate(model, tokenizer, data: List[Dict], max_length: int) -> Tuple[List[str], Dict]:
+    """Per-sentence greedy outputs and latency stats (batch size 1, like the keyboard)."""
+    import torch
+
+    outputs = []
+    timings = []
+    model.eval()
+    with torch.no_grad():
+        for example in data:
+            input_ids, attention_mask = encode_batch(
+                tokenizer, [TASK_PREFIX + example["source"]], max_length, tokenizer.pad_token_id
+            )
+            start = time.perf_counter()
+            generated = model.generate(input_ids=input_ids, attention_mask=attention_mask,
+                                       max_length=max_length, num_beams=1)
+            timings.append((time.perf_counter() - start) * 1000)
+            outputs.append(tokenizer.decode(generated[0], skip_special_tokens=True))
+
+    timings.sort()
+    parameters = sum(p.numel() for p in model.parameters())
+    return outputs, {
+        "parameters": parameters,
+        "estimatedInt8SizeMB": round(parameters / 1024 / 1024, 1),
+        "p50Ms": round(statistics.median(timings), 1),
+        "p95Ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        "meanMs": round(statistics.mean(timings), 1),
+        "cleanExactMatch": round(sum(o == e["clean"] for o, e in zip(outputs, data)) / len(data), 4),
+    }
+
+
+def run_script(script: str, arguments: List[str]) -> bool:
+    """Run one of the sibling conversion scripts; True on success."""
+    cmd = [sys.executable, str(SCRIPTS_DIR / script)] + arguments
+    print(f"\n$ {' '.join(cmd)}")
+    return subprocess.run(cmd).returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the T5 GEC teacher into a smaller student on CPU")
+    parser.add_argument("--language", "-l", required=True, help="Language code (e.g., en, de, es)")
+    parser.add_argument("--input-dir", "-i", type=Path, default=Path(__file__).parent / "downloaded",
+                        help="Directory containing downloaded models")
+    parser.add_argument("--output-dir", "-o", type=Path, default=Path(__file__).parent / "output",
+                        help="Output directory (student artifacts go to OUTPUT/student_{lang}/)")
+    parser.add_argument("--text", type=Path, action="append", default=[],
+                        help="Sentence file (one per line); can be repeated. The dictionary fills up missing samples")
+    parser.add_argument("--samples", type=int, default=2000, help="Training sentences (default: 2000)")
+    parser.add_argument("--held-out", type=int, default=100, help="Evaluation sentences (default: 100)")
+    parser.add_argument("--noise-rate", type=float, default=0.15, help="Per-word error probability (default: 0.15)")
+    parser.add_argument("--clean-fraction", type=float, default=0.3,
+                        help="Share of sentences left uncorrupted (default: 0.3)")
+    parser.add_argument("--d-model", type=int, default=256, help="Student hidden size (default: 256)")
+    parser.add_argument("--d-ff", type=int, default=1024, help="Student feed-forward size (default: 1024)")
+    parser.add_argument("--num-heads", type=int, default=4, help="Student attention heads (default: 4)")
+    parser.add_argument("--encoder-layers", type=int, default=4, help="Student encoder layers (default: 4)")
+    parser.add_argument("--decoder-layers", type=int, default=2, help="Student decoder layers (default: 2)")
+    parser.add_argument("--epochs", type=int, default=3, help="Training epochs (default: 3)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Batch size (default: 16)")
+    parser.add_argument("--learning-rate", type=float, default=5e-4, help="AdamW learning rate (default: 5e-4)")
+    parser.add_argument("--kd-alpha", type=float, default=0.5,
+                        help="Weight of the soft-label KL loss; 0 trains on teacher outputs only (default: 0.5)")
+    parser.add_argument("--temperature", type=float, default=2.0, help="Soft-label temperature (default: 2.0)")
+    parser.add_argument("--max-length", type=int, default=64, help="Maximum tokens per sentence (default: 64)")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling/corruption/training seed (default: 0)")
+    parser.add_argument("--relabel", action="store_true", help="Ignore cached teacher labels")
+    parser.add_argument("--seq2seq", action="store_true", help="Also export the KV-cached seq2seq TFLite model")
+    parser.add_argument("--skip-export", action="store_true", help="Do not run the TFLite/ONNX exports")
+
+    args = parser.parse_args()
+
+    if args.d_model % args.num_heads:
+        parser.error("--d-model must be divisible by --num-heads")
+
+    teacher_path = args.input_dir / f"t5_gec_{args.language}"
+    if not teacher_path.exists():
+        print(f"Error: Teacher model not found at {teacher_path}")
+        print(f"\nFirst download the model using:")
+        print(f"  python download_grammar_model.py --language {args.language}")
+        return 1
+
+    train_sentences, held_out_sentences = build_calibration_sets(
+        args.language, args.text, args.samples, args.held_out, args.seed
+    )
+    if not train_sentences or not held_out_sentences:
+        print(f"Error: No training data for '{args.language}' (no text files, no dictionary)")
+        return 1
+
+    import torch
+    from transformers import T5ForConditionalGeneration
+    from prune_vocabulary import load_tokenizer
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    student_dir = args.output_dir / f"student_{args.language}"
+    student_dir.mkdir(parents=True, exist_ok=True)
+
+    print("=" * 50)
+    print("TitanKeys Grammar Model Distillation")
+    print("=" * 50)
+    print(f"\nLanguage: {args.language}")
+    print(f"Teacher: {teacher_path}")
+    print(f"Sentences: {len(train_sentences)} training, {len(held_out_sentences)} held-out")
+
+    tokenizer = load_tokenizer(teacher_path / "tokenizer")
+    teacher = T5ForConditionalGeneration.from_pretrained(str(teacher_path / "model"))
+
+    print("\n[1/4] Labeling sentences with the teacher...")
+    sentences = train_sentences + held_out_sentences
+    data = load_or_build_data(
+        student_dir / "distill_data.jsonl", sentences, args.relabel,
+        lambda: build_distillation_data(teacher, tokenizer, sentences, args.max_length,
+                                        args.noise_rate, args.clean_fraction, args.seed)
+    )
+    train_data, eval_data = data[:len(train_sentences)], data[len(train_sentences):]
+
+    print("\n[2/4] Training student...")
+    config = student_config(teacher.config, args.d_model, args.d_ff, args.num_heads,
+                            args.encoder_layers, args.decoder_layers)
+    student = init_student_from_teacher(T5ForConditionalGeneration(config), teacher)
+    print(f"  Student: d_model {args.d_model}, d_ff {args.d_ff}, {args.num_heads} heads, "
+          f"{args.encoder_layers}+{args.decoder_layers} layers")
+    train_student(student, teacher, tokenizer, train_data, args.epochs, args.batch_size,
+                  args.learning_rate, args.kd_alpha, args.temperature, args.max_length, args.seed)
+
+    model_path = args.input_dir / f"t5_gec_{args.language}_student"
+    student.save_pretrained(model_path / "model")
+    tokenizer.save_pretrained(model_path / "tokenizer")
+    print(f"  Student saved to: {model_path}")
+
+    print("\n[3/4] Evaluating against the teacher...")
+    student_outputs, student_stats = evaluate(student, tokenizer, eval_data, args.max_length)
+    _, teacher_stats = evaluate(teacher, tokenizer, eval_data, args.max_length)
+    agreement = sum(o == e["target"] for o, e in zip(student_outputs, eval_data)) / len(eval_data)
+    similarity = statistics.mean(difflib.SequenceMatcher(None, o, e["target"]).ratio()
+                                 for o, e in zip(student_outputs, eval_data))
+
+    report = {
+        "language": args.language,
+        "trainingSentences": len(train_data),
+        "heldOutSentences": len(eval_data),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("input_dir", "output_dir", "text")},
+        "teacher": teacher_stats,
+        "student": student_stats,
+        "teacherExactAgreement": round(agreement, 4),
+        "teacherMeanSimilarity": round(similarity, 4),
+        "latencyBudgetMs": LATENCY_BUDGET_MS,
+        "studentWithinBudget": student_stats["p95Ms"] < LATENCY_BUDGET_MS,
+        "exports": {},
+    }
+
+    print(f"  {'model':<8} {'params':>12} {'~INT8 MB':>9} {'p50 ms':>8} {'p95 ms':>8} {'clean EM':>9}")
+    for name, stats in (("teacher", teacher_stats), ("student", student_stats)):
+        print(f"  {name:<8} {stats['parameters']:>12,} {stats['estimatedInt8SizeMB']:>9} "
+              f"{stats['p50Ms']:>8} {stats['p95Ms']:>8} {stats['cleanExactMatch']:>9}")
+    print(f"  Student agrees with teacher on {agreement:.1%} of sentences (mean similarity {similarity:.3f})")
+
+    if not args.skip_export:
+        print("\n[4/4] Exporting student...")
+        common = ["--language", args.language, "--variant", "student",
+                  "--input-dir", str(args.input_dir), "--output-dir", str(student_dir)]
+        tflite_args = common + (["--seq2seq"] if args.seq2seq else [])
+        if run_script("convert_to_tflite.py", tflite_args):
+            for path in sorted(student_dir.glob("grammar_*.tflite")):
+                report["exports"][path.name] = round(path.stat().st_size / 1024 / 1024, 2)
+        if run_script("export_onnx.py", common):
+            latency_file = student_dir / f"grammar_{args.language}_onnx_latency.json"
+            if latency_file.exists():
+                with open(latency_file, "r", encoding="utf-8") as f:
+                    report["onnxLatency"] = json.load(f)
+    else:
+        print("\n[4/4] Skipping export")
+
+    report_path = student_dir / "distill_report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 50)
+    print("Distillation Complete!")
+    print("=" * 50)
+    print(f"\nReport saved to: {report_path}")
+    print(f"Benchmark the exports with:")
+    print(f"  python benchmark_models.py {student_dir}/grammar_{args.language}.tflite --output {student_dir}/benchmark.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,24 +6,27 @@ This script downloads the Unbabel/gec-t5_small model which is a
 pre-trained T5 model fine-tuned for grammatical error correction.
 
 Usage:
-    python download_grammar_model.py [--language LANG]
+    python download_grammar_model.py [--language LANG] [--offline] [--force]
 
 Arguments:
     --language  Language code (default: en). Currently only English is
                 available from HuggingFace. Other languages require fine-tuning.
+    --offline   Never touch the network; use the local HuggingFace cache only
+    --force     Re-download even if the model directory is up to date
+
+The model directory gets a .artifact.json stamp (model ID, revision and
+content hash). When the stamp matches and the files are unchanged, the
+download is skipped; convert_to_tflite.py keys its cache on the same hash.
 """
 
 import argparse
+import importlib.util
+import json
 import os
 import sys
 from pathlib import Path
 
-try:
-    from transformers import T5ForConditionalGeneration, T5Tokenizer
-except ImportError:
-    print("Error: transformers library not found.")
-    print("Install with: pip install transformers torch")
-    sys.exit(1)
+from artifact_cache import STAMP_FILE, enable_offline, hash_tree, is_offline, stage_key
 
 # HuggingFace model identifiers
 MODELS = {
@@ -40,7 +43,17 @@ MODELS = {
     "lt": None,  # Would need custom dataset
 }
 
-def download_model(language: str, output_dir: Path):
+def is_up_to_date(output_path: Path, key: str) -> bool:
+    """True if the stamp was written for this download key and the files still match it."""
+    stamp_path = output_path / STAMP_FILE
+    if not stamp_path.exists():
+        return False
+    with open(stamp_path, "r", encoding="utf-8") as f:
+        stamp = json.load(f)
+    return stamp.get("key") == key and stamp.get("contentHash") == hash_tree(output_path)
+
+
+def download_model(language: str, output_dir: Path, revision: str = "main", force: bool = False):
     """Download the T5 model for the specified language."""
     model_id = MODELS.get(language)
 
@@ -52,23 +65,36 @@ def download_model(language: str, output_dir: Path):
         return False
 
     output_path = output_dir / f"t5_gec_{language}"
+    key = stage_key("download", model=model_id, revision=revision)
+
+    if not force and is_up_to_date(output_path, key):
+        print(f"[OK] {output_path} is up to date ({model_id}@{revision}); nothing to download")
+        return True
+
+    from transformers import T5ForConditionalGeneration, T5Tokenizer
 
-    print(f"Downloading model: {model_id}")
+    offline = is_offline()
+    print(f"Downloading model: {model_id}@{revision}" + (" (offline: local cache only)" if offline else ""))
     print(f"Output directory: {output_path}")
 
     try:
         # Download tokenizer
         print("\n[1/2] Downloading tokenizer...")
-        tokenizer = T5Tokenizer.from_pretrained(model_id)
+        tokenizer = T5Tokenizer.from_pretrained(model_id, revision=revision, local_files_only=offline)
         tokenizer.save_pretrained(output_path / "tokenizer")
         print(f"Tokenizer saved to: {output_path / 'tokenizer'}")
 
         # Download model
         print("\n[2/2] Downloading model (this may take a while)...")
-        model = T5ForConditionalGeneration.from_pretrained(model_id)
+        model = T5ForConditionalGeneration.from_pretrained(model_id, revision=revision,
+                                                           local_files_only=offline)
         model.save_pretrained(output_path / "model")
         print(f"Model saved to: {output_path / 'model'}")
 
+        stamp = {"model": model_id, "revision": revision, "key": key, "contentHash": hash_tree(output_path)}
+        with open(output_path / STAMP_FILE, "w", encoding="utf-8") as f:
+            json.dump(stamp, f, indent=2)
+
         # Report sizes
         tokenizer_size = sum(f.stat().st_size for f in (output_path / "tokenizer").rglob("*") if f.is_file())
         model_size = sum(f.stat().st_size for f in (output_path / "model").rglob("*") if f.is_file())
@@ -85,6 +111,8 @@ def download_model(language: str, output_dir: Path):
 
     except Exception as e:
         print(f"Error downloading model: {e}")
+        if offline:
+            print("Offline mode: the model must already be in the local HuggingFace cache.")
         return False
 
 
@@ -104,9 +132,33 @@ def main():
         default=Path(__file__).parent / "downloaded",
         help="Output directory for downloaded models"
     )
+    parser.add_argument(
+        "--revision",
+        default="main",
+        help="HuggingFace revision (branch, tag or commit; default: main)"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Never touch the network (also enabled by TITANKEYS_OFFLINE=1)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-download even if the model directory is up to date"
+    )
 
     args = parser.parse_args()
 
+    if args.offline:
+        enable_offline()
+
+    # Heavy dependencies are imported only once there is work to do
+    if importlib.util.find_spec("transformers") is None:
+        print("Error: transformers library not found.")
+        print("Install with: pip install transformers torch")
+        sys.exit(1)
+
     # Create output directory
     args.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -117,7 +169,7 @@ def main():
     print(f"Output: {args.output_dir}")
     print()
 
-    success = download_model(args.language, args.output_dir)
+    success = download_model(args.language, args.output_dir, args.revision, args.force)
     sys.exit(0 if success else 1)
 
 
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Single-pass edit-tagging grammar model (encoder only).
+
+Autoregressive decoding runs the decoder once per output token although
+most keyboard text is copied unchanged. An edit tagger instead predicts one
+tag per input word in a single encoder pass:
+
+    KEEP        keep the word
+    DELETE      drop the word
+    REPLACE_x   replace the word with x (x may be several words)
+    APPEND_x    keep the word and insert x after it
+
+Position 0 is a virtual $START slot (the last token of the "gec:" prefix),
+so APPEND_x there inserts at the beginning of the sentence. Tags are derived
+from the teacher's corrections by aligning source and target words.
+
+The script:
+    1. Labels local sentences with the teacher (shared with distill_student.py)
+       and derives word tags; the tag vocabulary is capped at --max-tags
+    2. Trains a T5 encoder (the distilled student's if available) plus a
+       linear tag head on CPU
+    3. Exports it as grammar_{lang}_tagger.tflite with one encode_{n}
+       signature per length bucket (output: tag_logits) and writes the tag
+       list to grammar_{lang}_tagger_tags.txt
+    4. Benchmarks TFLiteTagger (the reference implementation of tokenization,
+       tag decoding and apply_edits) against the seq2seq model
+
+Usage:
+    python edit_tagger.py --language en --text ../corpora/en_sentences.txt \
+        [--seq2seq-model output/grammar_en_seq2seq.tflite]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from calibration import TASK_PREFIX, build_calibration_sets
+
+KEEP = "KEEP"
+DELETE = "DELETE"
+REPLACE = "REPLACE_"
+APPEND = "APPEND_"
+
+
+def derive_tags(source_words: List[str], target_words: List[str]) -> List[str]:
+    """
+    Word tags that turn source into target; tags[0] is the $START slot and
+    tags[i + 1] belongs to source_words[i]. apply_edits(source, tags) == target.
+    """
+    tags = [KEEP] * (len(source_words) + 1)
+
+    def insert_after(index: int, words: List[str]):
+        text = " ".join(words)
+        tag = tags[index]
+        if tag == KEEP:
+            tags[index] = APPEND + text
+        elif tag == DELETE:
+            tags[index] = REPLACE + text
+        else:
+            tags[index] = f"{tag} {text}"
+
+    matcher = SequenceMatcher(None, source_words, target_words, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            continue
+        if op == "delete":
+            for i in range(i1, i2):
+                tags[i + 1] = DELETE
+        elif op == "insert":
+            insert_after(i1, target_words[j1:j2])
+        else:
+            n, m = i2 - i1, j2 - j1
+            for k in range(min(n, m)):
+                tags[i1 + k + 1] = REPLACE + target_words[j1 + k]
+            for k in range(m, n):
+                tags[i1 + k + 1] = DELETE
+            if m > n:
+                insert_after(i1 + n, target_words[j1 + n:j2])
+    return tags
+
+
+def apply_edits(words: List[str], tags: List[str]) -> List[str]:
+    """Apply tags (with the $START slot first) to words; missing tags mean KEEP."""
+    tags = list(tags) + [KEEP] * (len(words) + 1 - len(tags))
+    output = []
+    if tags[0].startswith(APPEND):
+        output.extend(tags[0][len(APPEND):].split())
+    for word, tag in zip(words, tags[1:]):
+        if tag == DELETE:
+            continue
+        if tag.startswith(REPLACE):
+            output.extend(tag[len(REPLACE):].split())
+            continue
+        output.append(word)
+        if tag.startswith(APPEND):
+            output.extend(tag[len(APPEND):].split())
+    return output
+
+
+def build_tag_vocabulary(tag_lists: List[List[str]], max_tags: int, min_count: int = 2) -> List[str]:
+    """KEEP, DELETE and the most frequent REPLACE_/APPEND_ tags."""
+    counts = Counter(tag for tags in tag_lists for tag in tags if tag not in (KEEP, DELETE))
+    frequent = [tag for tag, count in counts.most_common(max(0, max_tags - 2)) if count >= min_count]
+    return [KEEP, DELETE] + frequent
+
+
+def encode_words(tokenizer, words: List[str], max_length: int) -> Tuple[List[int], List[int]]:
+    """
+    Token IDs for "gec: " + words and the tag positions: the last prefix token
+    ($START) followed by the first subword of every word that fits.
+    """
+    ids = tokenizer.encode(TASK_PREFIX, add_special_tokens=False)
+    positions = [len(ids) - 1]
+    for word in words:
+        pieces = tokenizer.encode(word, add_special_tokens=False)
+        if len(ids) + len(pieces) + 1 > max_length:
+            break
+        positions.append(len(ids))
+        ids.extend(pieces)
+    ids.append(tokenizer.eos_token_id)
+    return ids, positions
+
+
+def decode_tags(logits, positions: List[int], tags: List[str], min_confidence: float = 0.0) -> List[str]:
+    """Tag per position from [length, num_tags] logits; low-confidence edits fall back to KEEP."""
+    import numpy as np
+
+    selected = np.asarray(logits, dtype=np.float32)[positions]
+    selected = selected - selected.max(axis=-1, keepdims=True)
+    probabilities = np.exp(selected) / np.exp(selected).sum(axis=-1, keepdims=True)
+    best = probabilities.argmax(axis=-1)
+    return [tags[b] if probabilities[i, b] >= min_confidence else KEEP for i, b in enumerate(best)]
+
+
+def build_features(tokenizer, data: List[Dict], tag_index: Dict[str, int], max_length: int) -> List[Tuple]:
+    """(ids, positions, labels) per example; tags outside the vocabulary are ignored (-100)."""
+    features = []
+    for example in data:
+        source = example["source"].split()
+        tags = derive_tags(source, example["target"].split())
+        ids, positions = encode_words(tokenizer, source, max_length)
+        labels = [tag_index.get(tag, -100) for tag in tags[:len(positions)]]
+        features.append((ids, positions, labels))
+    return features
+
+
+def collate(features: List[Tuple], pad_id: int):
+    """Pad a batch of features into (input_ids, attention_mask, labels) tensors."""
+    import torch
+
+    width = max(len(ids) for ids, _, _ in features)
+    input_ids = torch.full((len(features), width), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(features), width), dtype=torch.long)
+    labels = torch.full((len(features), width), -100, dtype=torch.long)
+    for row, (ids, positions, tag_ids) in enumerate(features):
+        input_ids[row, :len(ids)] = torch.tensor(ids)
+        attention_mask[row, :len(ids)] = 1
+        labels[row, positions] = torch.tensor(tag_ids)
+    return input_ids, attention_mask, labels
+
+
+def load_encoder(model_path: Path, layers: Optional[int] = None):
+    """T5 encoder from a seq2seq checkpoint, optionally keeping only the first layers."""
+    import torch
+    from transformers import T5EncoderModel
+
+    encoder = T5EncoderModel.from_pretrained(str(model_path / "model"))
+    if layers is not None and layers < len(encoder.encoder.block):
+        encoder.encoder.block = torch.nn.ModuleList(list(encoder.encoder.block)[:layers])
+        encoder.config.num_layers = layers
+    return encoder
+
+
+def train_tagger(encoder, head, features: List[Tuple], pad_id: int, epochs: int, batch_size: int,
+                 learning_rate: float, seed: int):
+    """Cross-entropy training of encoder + tag head on word-start positions."""
+    import random
+    import torch
+    import torch.nn.functional as F
+
+    torch.manual_seed(seed)
+    rng = random.Random(seed)
+    optimizer = torch.optim.AdamW(list(encoder.parameters()) + list(head.parameters()), lr=learning_rate)
+    order = list(range(len(features)))
+
+    for epoch in range(epochs):
+        encoder.train()
+        head.train()
+        rng.shuffle(order)
+        losses = []
+        start_time = time.perf_counter()
+        for start in range(0, len(order), batch_size):
+            input_ids, attention_mask, labels = collate([features[i] for i in order[start:start + batch_size]], pad_id)
+            hidden = encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+            logits = head(hidden)
+            loss = F.cross_entropy(logits.reshape(-1, logits.shape[-1]), labels.reshape(-1), ignore_index=-100)
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(list(encoder.parameters()) + list(head.parameters()), 1.0)
+            optimizer.step()
+            optimizer.zero_grad()
+            losses.append(float(loss))
+            print(f"  Epoch {epoch + 1}/{epochs}: batch {start // batch_size + 1}, "
+                  f"loss {statistics.mean(losses[-50:]):.4f}", end="\r")
+        print(f"  Epoch {epoch + 1}/{epochs}: mean loss {statistics.mean(losses):.4f} "
+              f"({time.perf_counter() - start_time:.0f}s)")
+
+
+def evaluate_tagger(encoder, head, tokenizer, data: List[Dict], features: List[Tuple],
+                    tags: List[str], min_confidence: float) -> Dict:
+    """Tag accuracy on known tags and sentence agreement with the teacher (one pass)."""
+    import torch
+
+    encoder.eval()
+    head.eval()
+    correct = total = agreement = 0
+    with torch.no_grad():
+        for example, (ids, positions, labels) in zip(data, features):
+            input_ids = torch.tensor([ids])
+            hidden = encoder(input_ids=input_ids, attention_mask=torch.ones_like(input_ids)).last_hidden_state
+            predicted = decode_tags(head(hidden)[0].numpy(), positions, tags, min_confidence)
+            for tag, label in zip(predicted, labels):
+                if label != -100:
+                    total += 1
+                    correct += tag == tags[label]
+            source = example["source"].split()
+            agreement += apply_edits(source, predicted) == example["target"].split()
+    return {
+        "tagAccuracy": round(correct / max(1, total), 4),
+        "teacherExactAgreement": round(agreement / max(1, len(data)), 4),
+    }
+
+
+def save_tagger(encoder, head, tags: List[str], output_dir: Path):
+    import torch
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    encoder.save_pretrained(output_dir / "encoder")
+    torch.save(head.state_dict(), output_dir / "head.pt")
+    (output_dir / "tags.txt").write_text("".join(f"{tag}\n" for tag in tags), encoding="utf-8")
+
+
+def export_tagger_tflite(tagger_dir: Path, output_path: Path, buckets: List[int], quantize: bool) -> Path:
+    """Export encoder + tag head with one encode_{n} signature per bucket (output: tag_logits)."""
+    import tensorflow as tf
+    import torch
+    from transformers import TFT5EncoderModel
+    from convert_to_tflite import convert_saved_model, save_signatures
+
+    encoder = TFT5EncoderModel.from_pretrained(str(tagger_dir / "encoder"), from_pt=True)
+    head = torch.load(tagger_dir / "head.pt")
+    kernel = tf.constant(head["weight"].numpy().T)
+    bias = tf.constant(head["bias"].numpy())
+
+    def make_signature(bucket: int):
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=[1, bucket], dtype=tf.int32, name="input_ids"),
+            tf.TensorSpec(shape=[1, bucket], dtype=tf.int32, name="attention_mask"),
+        ])
+        def tag_fn(input_ids, attention_mask):
+            hidden = encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+            return {"tag_logits": tf.einsum("bld,dt->blt", hidden, kernel) + bias}
+        return tag_fn.get_concrete_function()
+
+    signatures = {f"encode_{bucket}": make_signature(bucket) for bucket in sorted(buckets, reverse=True)}
+    saved_model_dir = tagger_dir / "saved_model"
+    save_signatures(encoder, signatures, saved_model_dir)
+    output_path.write_bytes(convert_saved_model(saved_model_dir, list(signatures),
+                                                "dynamic" if quantize else "fp32"))
+    return output_path
+
+
+class TFLiteTagger:
+    """Reference on-device pipeline: tokenize words, pick a bucket, tag once, apply edits."""
+
+    def __init__(self, model_path: Path, tags_path: Path, tokenizer, num_threads: Optional[int] = None):
+        from seq2seq_runner import encoder_buckets, load_interpreter
+
+        self.tokenizer = tokenizer
+        self.tags = tags_path.read_text(encoding="utf-8").splitlines()
+        self.interpreter = load_interpreter(model_path, num_threads)
+        self._runners = {bucket: self.interpreter.get_signature_runner(name)
+                         for name, bucket in encoder_buckets(self.interpreter.get_signature_list()).items()}
+        self.buckets = sorted(self._runners)
+
+    def predict_tags(self, words: List[str], min_confidence: float = 0.5) -> List[str]:
+        import numpy as np
+        from seq2seq_runner import select_bucket
+
+        ids, positions = encode_words(self.tokenizer, words, self.buckets[-1])
+        bucket = select_bucket(self.buckets, len(ids))
+        input_ids = np.zeros((1, bucket), dtype=np.int32)
+        attention_mask = np.zeros((1, bucket), dtype=np.int32)
+        input_ids[0, :len(ids)] = ids
+        attention_mask[0, :len(ids)] = 1
+        logits = self._runners[bucket](input_ids=input_ids, attention_mask=attention_mask)["tag_logits"][0]
+        return decode_tags(logits, positions, self.tags, min_confidence)
+
+    def correct(self, text: str, iterations: int = 2, min_confidence: float = 0.5) -> str:
+        """Tag and apply edits until nothing changes (at most `iterations` passes)."""
+        words = text.split()
+        for _ in range(iterations):
+            edited = apply_edits(words, self.predict_tags(words, min_confidence))
+            if edited == words:
+                break
+            words = edited
+        return " ".join(words)
+
+
+def latency_stats(timings: List[float]) -> Dict:
+    timings = sorted(timings)
+    return {
+        "p50Ms": round(statistics.median(timings), 2),
+        "p95Ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "meanMs": round(statistics.mean(timings), 2),
+    }
+
+
+def benchmark_against_seq2seq(tagger: TFLiteTagger, tokenizer, data: List[Dict],
+                              seq2seq_model: Optional[Path], iterations: int,
+                              min_confidence: float) -> Dict:
+    """Latency and teacher agreement of the TFLite tagger vs. the seq2seq TFLite model."""
+    results = {}
+    runners = {"tagger": lambda text: tagger.correct(text, iterations, min_confidence)}
+    if seq2seq_model is not None:
+        from seq2seq_runner import TFLiteSeq2SeqRunner
+
+        seq2seq = TFLiteSeq2SeqRunner(seq2seq_model)
+        runners["seq2seq"] = lambda text: seq2seq.correct(tokenizer, text)
+
+    for name, run in runners.items():
+        run(data[0]["source"])  # warm-up
+        timings = []
+        agreement = 0
+        for example in data:
+            start = time.perf_counter()
+            output = run(example["source"])
+            timings.append((time.perf_counter() - start) * 1000)
+            agreement += output.split() == example["target"].split()
+        results[name] = {**latency_stats(timings), "teacherExactAgreement": round(agreement / len(data), 4)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and export a single-pass edit-tagging grammar model")
+    parser.add_argument("--language", "-l", required=True, help="Language code (e.g., en, de, es)")
+    parser.add_argument("--input-dir", "-i", type=Path, default=Path(__file__).parent / "downloaded",
+                        help="Directory containing downloaded models")
+    parser.add_argument("--output-dir", "-o", type=Path, default=Path(__file__).parent / "output",
+                        help="Output directory for the TFLite model and report")
+    parser.add_argument("--text", type=Path, action="append", default=[],
+                        help="Sentence file (one per line); can be repeated. The dictionary fills up missing samples")
+    parser.add_argument("--samples", type=int, default=2000, help="Training sentences (default: 2000)")
+    parser.add_argument("--held-out", type=int, default=100, help="Evaluation sentences (default: 100)")
+    parser.add_argument("--noise-rate", type=float, default=0.15, help="Per-word error probability (default: 0.15)")
+    parser.add_argument("--clean-fraction", type=float, default=0.3,
+                        help="Share of sentences left uncorrupted (default: 0.3)")
+    parser.add_argument("--encoder", choices=["auto", "student", "teacher"], default="auto",
+                        help="Encoder to start from (default: the distilled student if present)")
+    parser.add_argument("--encoder-layers", type=int, default=None, help="Keep only the first N encoder layers")
+    parser.add_argument("--max-tags", type=int, default=5000, help="Tag vocabulary size (default: 5000)")
+    parser.add_argument("--epochs", type=int, default=3, help="Training epochs (default: 3)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Batch size (default: 16)")
+    parser.add_argument("--learning-rate", type=float, default=1e-4, help="AdamW learning rate (default: 1e-4)")
+    parser.add_argument("--max-length", type=int, default=64, help="Maximum tokens per sentence (default: 64)")
+    parser.add_argument("--min-confidence", type=float, default=0.5,
+                        help="Edits below this probability are treated as KEEP (default: 0.5)")
+    parser.add_argument("--iterations", type=int, default=2, help="Tag/apply passes at inference (default: 2)")
+    parser.add_argument("--length-buckets", type=int, nargs="+", default=[16, 32, 64],
+                        help="Input lengths to export signatures for (default: 16 32 64)")
+    parser.add_argument("--no-quantize", action="store_true", help="Export FP32 instead of INT8 dynamic range")
+    parser.add_argument("--seq2seq-model", type=Path, default=None,
+                        help="grammar_{lang}_seq2seq.tflite to benchmark against")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling/corruption/training seed (default: 0)")
+    parser.add_argument("--relabel", action="store_true", help="Ignore cached teacher labels")
+    parser.add_argument("--skip-export", action="store_true", help="Train and evaluate only")
+
+    args = parser.parse_args()
+
+    teacher_path = args.input_dir / f"t5_gec_{args.language}"
+    student_path = args.input_dir / f"t5_gec_{args.language}_student"
+    if not teacher_path.exists():
+        print(f"Error: Teacher model not found at {teacher_path}")
+        print(f"\nFirst download the model using:")
+        print(f"  python download_grammar_model.py --language {args.language}")
+        return 1
+    if args.encoder == "student" and not student_path.exists():
+        print(f"Error: Student model not found at {student_path}")
+        print(f"\nFirst distill the model using:")
+        print(f"  python distill_student.py --language {args.language}")
+        return 1
+    encoder_path = student_path if args.encoder != "teacher" and student_path.exists() else teacher_path
+
+    train_sentences, held_out_sentences = build_calibration_sets(
+        args.language, args.text, args.samples, args.held_out, args.seed
+    )
+    if not train_sentences or not held_out_sentences:
+        print(f"Error: No training data for '{args.language}' (no text files, no dictionary)")
+        return 1
+
+    import torch
+    from transformers import T5ForConditionalGeneration
+    from distill_student import build_distillation_data, load_or_build_data
+    from prune_vocabulary import load_tokenizer
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    tagger_dir = args.output_dir / f"tagger_{args.language}"
+
+    print("=" * 50)
+    print("TitanKeys Edit-Tagging Model")
+    print("=" * 50)
+    print(f"\nLanguage: {args.language}")
+    print(f"Encoder: {encoder_path}")
+
+    tokenizer = load_tokenizer(teacher_path / "tokenizer")
+
+    print("\n[1/4] Labeling sentences with the teacher and deriving tags...")
+    sentences = train_sentences + held_out_sentences
+
+    def label():
+        teacher = T5ForConditionalGeneration.from_pretrained(str(teacher_path / "model"))
+        return build_distillation_data(teacher, tokenizer, sentences, args.max_length,
+                                       args.noise_rate, args.clean_fraction, args.seed)
+
+    data = load_or_build_data(tagger_dir / "tagger_data.jsonl", sentences, args.relabel, label)
+    train_data, eval_data = data[:len(train_sentences)], data[len(train_sentences):]
+
+    tags = build_tag_vocabulary(
+        [derive_tags(e["source"].split(), e["target"].split()) for e in train_data], args.max_tags
+    )
+    tag_index = {tag: i for i, tag in enumerate(tags)}
+    train_features = build_features(tokenizer, train_data, tag_index, args.max_length)
+    eval_features = build_features(tokenizer, eval_data, tag_index, args.max_length)
+    unchanged = sum(e["source"].split() == e["target"].split() for e in train_data)
+    print(f"  Tag vocabulary: {len(tags)} tags; {unchanged}/{len(train_data)} sentences need no edit")
+
+    print("\n[2/4] Training tagger...")
+    encoder = load_encoder(encoder_path, args.encoder_layers)
+    head = torch.nn.Linear(encoder.config.d_model, len(tags))
+    train_tagger(encoder, head, train_features, tokenizer.pad_token_id, args.epochs,
+                 args.batch_size, args.learning_rate, args.seed)
+    save_tagger(encoder, head, tags, tagger_dir)
+    metrics = evaluate_tagger(encoder, head, tokenizer, eval_data, eval_features, tags, args.min_confidence)
+    print(f"  Tag accuracy: {metrics['tagAccuracy']:.2%}, "
+          f"teacher agreement (one pass): {metrics['teacherExactAgreement']:.2%}")
+
+    report = {
+        "language": args.language,
+        "encoder": str(encoder_path),
+        "encoderLayers": len(encoder.encoder.block),
+        "tags": len(tags),
+        "trainingSentences": len(train_data),
+        "heldOutSentences": len(eval_data),
+        "pytorch": metrics,
+    }
+
+    if not args.skip_export:
+        print("\n[3/4] Exporting to TFLite...")
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        tflite_path = args.output_dir / f"grammar_{args.language}_tagger.tflite"
+        tags_path = args.output_dir / f"grammar_{args.language}_tagger_tags.txt"
+        export_tagger_tflite(tagger_dir, tflite_path, sorted(set(args.length_buckets)), not args.no_quantize)
+        tags_path.write_text("".join(f"{tag}\n" for tag in tags), encoding="utf-8")
+        report["tfliteSizeMB"] = round(tflite_path.stat().st_size / 1024 / 1024, 2)
+        print(f"  Tagger saved to: {tflite_path} ({report['tfliteSizeMB']} MB)")
+        print(f"  Tags saved to: {tags_path}")
+
+        print("\n[4/4] Benchmarking against seq2seq...")
+        tagger = TFLiteTagger(tflite_path, tags_path, tokenizer)
+        report["benchmark"] = benchmark_against_seq2seq(
+            tagger, tokenizer, eval_data, args.seq2seq_model, args.iterations, args.min_confidence
+        )
+        print(f"  {'model':<8} {'p50 ms':>8} {'p95 ms':>8} {'teacher EM':>11}")
+        for name, result in report["benchmark"].items():
+            print(f"  {name:<8} {result['p50Ms']:>8} {result['p95Ms']:>8} {result['teacherExactAgreement']:>11.2%}")
+    else:
+        print("\n[3/4] Skipping export")
+
+    report_path = args.output_dir / f"grammar_{args.language}_tagger_report.json"
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to: {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,18 +5,128 @@ Export T5 GEC model to ONNX format.
 ONNX is a more portable format that can be used on various platforms.
 For Android, the ONNX model can be converted to TFLite using ai.onnxruntime.
 
+Besides the plain export (with a merged decoder-with-past, so one decoder
+graph serves both the first step and the cached steps), the exporter writes:
+    - grammar_{lang}_onnx_optimized/ - ORT graph optimizations (fused attention,
+      layer norm, GELU), applied to a non-merged export whose two decoders
+      are merged afterwards (ORTOptimizer cannot load a merged model)
+    - grammar_{lang}_onnx_int8/      - dynamically quantized INT8 weights
+and prints a CPU latency comparison of all variants (also saved as
+grammar_{lang}_onnx_latency.json).
+
 Usage:
-    python export_onnx.py --language en
+    python export_onnx.py --language en [--quantization-target arm64] [--skip-benchmark] [--variant NAME]
 
 Note: Requires Python 3.11 or 3.12 (ONNX Runtime not yet available for 3.14)
       pip install onnx onnxruntime optimum[exporters]
 """
 
 import argparse
+import json
 import os
+import statistics
 import sys
+import tempfile
+import time
 from pathlib import Path
 
+BENCHMARK_SENTENCES = [
+    "I goed to the store yesterday.",
+    "She don't like apples.",
+    "Their going to the park tomorrow with there friends.",
+    "He have been working here since five years and he like it very much.",
+]
+
+
+def directory_size_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1024 / 1024
+
+
+def optimize_onnx(model_path: Path, output_path: Path) -> Path:
+    """
+    Apply ORT transformer graph optimizations (attention/layer-norm/GELU fusion).
+
+    ORTOptimizer needs the separate encoder / decoder / decoder_with_past
+    graphs (for a merged model it gets no decoder_with_past path), so the
+    model is exported non-merged, optimized, and the two optimized decoders
+    are merged again like the plain export.
+    """
+    from optimum.onnx import merge_decoders
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTOptimizer
+    from optimum.onnxruntime.configuration import OptimizationConfig
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        model = ORTModelForSeq2SeqLM.from_pretrained(str(model_path), export=True, use_cache=True, use_merged=False)
+        model.save_pretrained(export_dir)
+        optimizer = ORTOptimizer.from_pretrained(ORTModelForSeq2SeqLM.from_pretrained(
+            export_dir, use_cache=True, use_merged=False
+        ))
+        config = OptimizationConfig(
+            optimization_level=2,
+            optimize_for_gpu=False,
+            enable_transformers_specific_optimizations=True,
+        )
+        optimizer.optimize(save_dir=str(output_path), optimization_config=config)
+
+    decoders = sorted(output_path.glob("decoder_model*.onnx"))
+    decoder = next(path for path in decoders if "with_past" not in path.name)
+    decoder_with_past = next(path for path in decoders if "with_past" in path.name)
+    merge_decoders(decoder, decoder_with_past, save_path=output_path / "decoder_model_merged_optimized.onnx")
+    # The directory then loads like the plain export: encoder + merged decoder
+    for path in (decoder, decoder_with_past):
+        path.unlink()
+        data_file = path.with_name(path.name + "_data")
+        if data_file.exists():
+            data_file.unlink()
+    return output_path
+
+
+def quantize_onnx(onnx_path: Path, output_path: Path, target: str) -> Path:
+    """Dynamic INT8 quantization of every ONNX graph in onnx_path."""
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    qconfig = getattr(AutoQuantizationConfig, target)(is_static=False, per_channel=False)
+    for onnx_file in sorted(onnx_path.glob("*.onnx")):
+        quantizer = ORTQuantizer.from_pretrained(str(onnx_path), file_name=onnx_file.name)
+        quantizer.quantize(save_dir=str(output_path), quantization_config=qconfig)
+
+    # Graphs are written as *_quantized.onnx (optimum matches them by pattern);
+    # copy the configs so the directory loads like the other variants
+    for config_file in onnx_path.glob("*.json"):
+        target_file = output_path / config_file.name
+        if not target_file.exists():
+            target_file.write_bytes(config_file.read_bytes())
+    return output_path
+
+
+def benchmark_variant(model_dir: Path, tokenizer, runs: int = 5) -> dict:
+    """Measure greedy generate() latency on CPU for one exported variant."""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        str(model_dir), use_cache=True, provider="CPUExecutionProvider"
+    )
+    encoded = [tokenizer(f"gec: {s}", return_tensors="pt") for s in BENCHMARK_SENTENCES]
+
+    # Warm-up
+    model.generate(**encoded[0], max_length=64, num_beams=1)
+
+    timings = []
+    for _ in range(runs):
+        for inputs in encoded:
+            start = time.perf_counter()
+            model.generate(**inputs, max_length=64, num_beams=1)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "sizeMB": round(directory_size_mb(model_dir), 1),
+        "p50ms": round(statistics.median(timings), 1),
+        "p95ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        "meanMs": round(statistics.mean(timings), 1),
+    }
+
 
 def main():
     parser = argparse.ArgumentParser(description="Export T5 model to ONNX format")
@@ -35,10 +145,23 @@ def main():
         default=Path(__file__).parent / "output",
         help="Output directory for ONNX model",
     )
+    parser.add_argument(
+        "--quantization-target",
+        choices=["arm64", "avx2", "avx512", "avx512_vnni"],
+        default="arm64",
+        help="Instruction set the INT8 variant is tuned for (default: arm64, i.e. phones)",
+    )
+    parser.add_argument("--skip-optimize", action="store_true", help="Do not write the ORT-optimized variant")
+    parser.add_argument("--skip-quantize", action="store_true", help="Do not write the INT8 variant")
+    parser.add_argument("--skip-benchmark", action="store_true", help="Do not run the CPU latency comparison")
+    parser.add_argument("--runs", type=int, default=5, help="Benchmark runs per sentence (default: 5)")
+    parser.add_argument("--variant", default=None,
+                        help="Export the model in t5_gec_{lang}_{VARIANT} (e.g. pruned, student)")
 
     args = parser.parse_args()
 
-    model_path = args.input_dir / f"t5_gec_{args.language}" / "model"
+    model_dir = f"t5_gec_{args.language}{f'_{args.variant}' if args.variant else ''}"
+    model_path = args.input_dir / model_dir / "model"
 
     if not model_path.exists():
         print(f"Error: Model not found at {model_path}")
@@ -53,7 +176,7 @@ def main():
 
     try:
         from optimum.onnxruntime import ORTModelForSeq2SeqLM
-        from transformers import T5Tokenizer
+        from prune_vocabulary import load_tokenizer
     except ImportError:
         print("\nError: Required libraries not installed.")
         print("Install with: pip install onnx onnxruntime optimum[exporters]")
@@ -62,11 +185,13 @@ def main():
 
     print(f"\nLoading model from: {model_path}")
 
-    # Export to ONNX using optimum
+    # Export to ONNX using optimum (merged decoder: one graph with and without past)
     print("\nExporting to ONNX format...")
     onnx_model = ORTModelForSeq2SeqLM.from_pretrained(
         str(model_path),
         export=True,
+        use_cache=True,
+        use_merged=True,
     )
 
     # Save ONNX model
@@ -75,13 +200,58 @@ def main():
     print(f"ONNX model saved to: {onnx_path}")
 
     # Also save tokenizer
-    tokenizer = T5Tokenizer.from_pretrained(str(model_path.parent / "tokenizer"))
+    tokenizer = load_tokenizer(model_path.parent / "tokenizer")
     tokenizer.save_pretrained(onnx_path)
     print(f"Tokenizer saved to: {onnx_path}")
 
     # Get model size
-    total_size = sum(f.stat().st_size for f in onnx_path.rglob("*") if f.is_file())
-    print(f"\nTotal size: {total_size / 1024 / 1024:.1f} MB")
+    print(f"\nTotal size: {directory_size_mb(onnx_path):.1f} MB")
+
+    variants = {"onnx": onnx_path}
+
+    if not args.skip_optimize:
+        print("\nOptimizing graph (fused attention / layer norm)...")
+        optimized_path = args.output_dir / f"grammar_{args.language}_onnx_optimized"
+        try:
+            optimize_onnx(model_path, optimized_path)
+            tokenizer.save_pretrained(optimized_path)
+            variants["optimized"] = optimized_path
+            print(f"Optimized model saved to: {optimized_path} ({directory_size_mb(optimized_path):.1f} MB)")
+        except Exception as e:
+            # The INT8 variant and the latency table depend on it; do not carry on without it
+            print(f"Error: Graph optimization failed: {e}")
+            print("Rerun with --skip-optimize to export without the optimized variant.")
+            sys.exit(1)
+
+    if not args.skip_quantize:
+        print(f"\nQuantizing to INT8 (dynamic, {args.quantization_target})...")
+        source_path = variants.get("optimized", onnx_path)
+        int8_path = args.output_dir / f"grammar_{args.language}_onnx_int8"
+        try:
+            quantize_onnx(source_path, int8_path, args.quantization_target)
+            tokenizer.save_pretrained(int8_path)
+            variants["int8"] = int8_path
+            print(f"INT8 model saved to: {int8_path} ({directory_size_mb(int8_path):.1f} MB)")
+        except Exception as e:
+            print(f"Warning: Quantization failed: {e}")
+
+    if not args.skip_benchmark:
+        print(f"\nCPU latency (greedy generate, {len(BENCHMARK_SENTENCES)} sentences x {args.runs} runs):")
+        print(f"  {'variant':<12} {'size MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+        results = {}
+        for name, path in variants.items():
+            try:
+                results[name] = benchmark_variant(path, tokenizer, args.runs)
+            except Exception as e:
+                print(f"  {name:<12} [FAIL] {e}")
+                continue
+            r = results[name]
+            print(f"  {name:<12} {r['sizeMB']:>8} {r['p50ms']:>8} {r['p95ms']:>8} {r['meanMs']:>8}")
+
+        report_path = args.output_dir / f"grammar_{args.language}_onnx_latency.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Latency report saved to: {report_path}")
 
     print("\n" + "=" * 50)
     print("Export Complete!")
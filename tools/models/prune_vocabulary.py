@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Language-specific vocabulary pruning for the T5 GEC model.
+
+The T5 SentencePiece vocabulary has ~32k pieces for many languages, and the
+shared embedding plus the LM head (vocab x d_model each) dominate the model
+size and the cost of every decoder softmax. This tool:
+
+    1. Counts token usage over local data: sentence files and the language's
+       *_base.json dictionary (the top words, also capitalized)
+    2. Keeps the used tokens plus a fallback set: special tokens, the task
+       prefix and every single-character piece, so any text still tokenizes
+    3. Slices the embedding and LM-head rows to the kept tokens
+    4. Saves the pruned model, the tokenizer with its ID map (vocab_map.json)
+       and the pruned vocab_{lang}.txt
+
+Kept tokens retain their relative order, so <pad>=0, </s>=1 and <unk>=2 keep
+their IDs. Pieces that were pruned are re-split into the longest kept pieces
+(what a longest-match tokenizer over the pruned vocab_{lang}.txt does on the
+device); PrunedTokenizer implements that mapping on top of the original
+tokenizer.
+
+Usage:
+    python prune_vocabulary.py --language en [--text corpus.txt ...] [--top-words 50000] [--max-vocab 12000]
+    python convert_to_tflite.py --language en --pruned
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from calibration import DICTIONARIES_DIR, TASK_PREFIX, load_text_sentences
+
+VOCAB_MAP_FILE = "vocab_map.json"
+
+
+class PrunedTokenizer:
+    """
+    Wraps the original T5 tokenizer and maps its IDs onto the pruned vocabulary.
+
+    Supports the subset of the Hugging Face tokenizer API the conversion and
+    runner scripts use: __call__, encode, decode, get_vocab and save_pretrained.
+    """
+
+    def __init__(self, tokenizer, kept_ids: List[int]):
+        self.tokenizer = tokenizer
+        self.kept_ids = list(kept_ids)
+        self.old_to_new = {old: new for new, old in enumerate(self.kept_ids)}
+        self.pieces = {tokenizer.convert_ids_to_tokens(old): new for new, old in enumerate(self.kept_ids)}
+        self.max_piece_length = max(len(piece) for piece in self.pieces)
+        self.pad_token_id = self.old_to_new[tokenizer.pad_token_id]
+        self.eos_token_id = self.old_to_new[tokenizer.eos_token_id]
+        self.unk_token_id = self.old_to_new[tokenizer.unk_token_id]
+
+    @classmethod
+    def from_pretrained(cls, path: Path):
+        from transformers import T5Tokenizer
+
+        with open(Path(path) / VOCAB_MAP_FILE, "r", encoding="utf-8") as f:
+            kept_ids = json.load(f)["keptIds"]
+        return cls(T5Tokenizer.from_pretrained(str(path)), kept_ids)
+
+    def save_pretrained(self, path: Path):
+        path = Path(path)
+        self.tokenizer.save_pretrained(str(path))
+        with open(path / VOCAB_MAP_FILE, "w", encoding="utf-8") as f:
+            json.dump({"originalVocabSize": len(self.tokenizer), "keptIds": self.kept_ids}, f)
+
+    def __len__(self) -> int:
+        return len(self.kept_ids)
+
+    def split_piece(self, piece: str) -> List[int]:
+        """Greedy longest-match of a pruned piece over the kept pieces."""
+        ids = []
+        position = 0
+        while position < len(piece):
+            for end in range(min(len(piece), position + self.max_piece_length), position, -1):
+                new_id = self.pieces.get(piece[position:end])
+                if new_id is not None:
+                    ids.append(new_id)
+                    position = end
+                    break
+            else:
+                ids.append(self.unk_token_id)
+                position += 1
+        return ids
+
+    def remap(self, old_ids: Iterable[int]) -> List[int]:
+        """Original token IDs -> pruned IDs, re-splitting pruned pieces."""
+        ids = []
+        for old in old_ids:
+            new = self.old_to_new.get(old)
+            if new is not None:
+                ids.append(new)
+            else:
+                ids.extend(self.split_piece(self.tokenizer.convert_ids_to_tokens(old)))
+        return ids
+
+    def encode(self, text: str, add_special_tokens: bool = True) -> List[int]:
+        return self.remap(self.tokenizer.encode(text, add_special_tokens=add_special_tokens))
+
+    def __call__(self, text: str, max_length: Optional[int] = None, padding=False,
+                 truncation: bool = False, return_tensors: Optional[str] = None, **kwargs) -> Dict:
+        ids = self.encode(text)
+        if truncation and max_length is not None and len(ids) > max_length:
+            ids = ids[:max_length - 1] + [self.eos_token_id]
+        mask = [1] * len(ids)
+        if padding == "max_length" and max_length is not None:
+            mask += [0] * (max_length - len(ids))
+            ids += [self.pad_token_id] * (max_length - len(ids))
+        if return_tensors == "np":
+            import numpy as np
+
+            return {"input_ids": np.array([ids], dtype=np.int64),
+                    "attention_mask": np.array([mask], dtype=np.int64)}
+        if return_tensors == "pt":
+            import torch
+
+            return {"input_ids": torch.tensor([ids]), "attention_mask": torch.tensor([mask])}
+        return {"input_ids": ids, "attention_mask": mask}
+
+    def decode(self, ids: Iterable[int], skip_special_tokens: bool = False) -> str:
+        return self.tokenizer.decode([self.kept_ids[int(i)] for i in ids], skip_special_tokens=skip_special_tokens)
+
+    def get_vocab(self) -> Dict[str, int]:
+        return dict(self.pieces)
+
+
+def load_tokenizer(path: Path):
+    """T5 tokenizer from a directory, wrapped in PrunedTokenizer if it has a vocab map."""
+    if (Path(path) / VOCAB_MAP_FILE).exists():
+        return PrunedTokenizer.from_pretrained(path)
+    from transformers import T5Tokenizer
+
+    return T5Tokenizer.from_pretrained(str(path))
+
+
+def dictionary_words(language: str, top_words: int, dictionaries_dir: Path = DICTIONARIES_DIR) -> List[str]:
+    """Top words of the language dictionary by frequency."""
+    dictionary_file = dictionaries_dir / f"{language}_base.json"
+    if not dictionary_file.exists():
+        return []
+    with open(dictionary_file, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    entries = sorted(entries, key=lambda e: int(e.get("f", 0)), reverse=True)[:top_words]
+    return [e["w"] for e in entries if e.get("w")]
+
+
+def count_token_usage(tokenizer, sentences: List[str], words: List[str]) -> Counter:
+    """
+    Token usage counts: occurrences in the sentences plus one per dictionary
+    word (lowercase and capitalized) whose tokenization contains the token.
+    """
+    counts = Counter()
+    for sentence in sentences:
+        counts.update(tokenizer.encode(TASK_PREFIX + sentence))
+    for word in words:
+        for variant in {word, word[:1].upper() + word[1:]}:
+            counts.update(set(tokenizer.encode(variant, add_special_tokens=False)))
+    return counts
+
+
+def fallback_ids(tokenizer) -> List[int]:
+    """Tokens kept regardless of usage: specials, the task prefix and single characters."""
+    keep = {tokenizer.pad_token_id, tokenizer.eos_token_id, tokenizer.unk_token_id}
+    keep.update(tokenizer.encode(TASK_PREFIX, add_special_tokens=False))
+    for piece, token_id in tokenizer.get_vocab().items():
+        if len(piece.lstrip("▁")) <= 1 and not piece.startswith("<extra_id_"):
+            keep.add(token_id)
+    return sorted(keep)
+
+
+def select_kept_ids(tokenizer, counts: Counter, min_count: int = 1,
+                    max_vocab: Optional[int] = None) -> List[int]:
+    """Fallback set plus used tokens (count >= min_count), capped at max_vocab, in original order."""
+    fallback = set(fallback_ids(tokenizer))
+    used = [token_id for token_id, count in counts.most_common()
+            if count >= min_count and token_id not in fallback]
+    if max_vocab is not None:
+        used = used[:max(0, max_vocab - len(fallback))]
+    return sorted(fallback.union(used))
+
+
+def prune_model(model, kept_ids: List[int]):
+    """Slice the shared embedding and LM head of a T5ForConditionalGeneration in place."""
+    import torch
+
+    index = torch.tensor(kept_ids, dtype=torch.long)
+    old_embedding = model.get_input_embeddings().weight.data
+    embedding = torch.nn.Embedding(len(kept_ids), old_embedding.shape[1])
+    embedding.weight.data = old_embedding[index].clone()
+
+    old_head = model.get_output_embeddings().weight.data
+    head = torch.nn.Linear(old_head.shape[1], len(kept_ids), bias=False)
+    head.weight.data = old_head[index].clone()
+
+    model.set_input_embeddings(embedding)
+    model.set_output_embeddings(head)
+    model.config.vocab_size = len(kept_ids)
+    if getattr(model.config, "tie_word_embeddings", False):
+        model.tie_weights()
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune the T5 vocabulary, embedding and LM head for one language")
+    parser.add_argument("--language", "-l", required=True, help="Language code (e.g., en, de, es)")
+    parser.add_argument("--input-dir", "-i", type=Path, default=Path(__file__).parent / "downloaded",
+                        help="Directory containing downloaded models")
+    parser.add_argument("--output-dir", "-o", type=Path, default=Path(__file__).parent / "output",
+                        help="Output directory for vocab_{lang}.txt and the report")
+    parser.add_argument("--text", type=Path, action="append", default=[],
+                        help="Sentence file (one per line) to count tokens on; can be repeated")
+    parser.add_argument("--top-words", type=int, default=50000,
+                        help="Dictionary words to count tokens on (default: 50000)")
+    parser.add_argument("--min-count", type=int, default=1, help="Minimum usage count to keep a token (default: 1)")
+    parser.add_argument("--max-vocab", type=int, default=None, help="Upper bound on the pruned vocabulary size")
+
+    args = parser.parse_args()
+
+    model_path = args.input_dir / f"t5_gec_{args.language}"
+    if not model_path.exists():
+        print(f"Error: Model not found at {model_path}")
+        print(f"\nFirst download the model using:")
+        print(f"  python download_grammar_model.py --language {args.language}")
+        return 1
+
+    sentences = load_text_sentences(args.text)
+    words = dictionary_words(args.language, args.top_words)
+    if not sentences and not words:
+        print(f"Error: No text files and no dictionary for '{args.language}'")
+        return 1
+
+    from transformers import T5ForConditionalGeneration, T5Tokenizer
+
+    print("=" * 50)
+    print("TitanKeys Vocabulary Pruning")
+    print("=" * 50)
+    print(f"\nLanguage: {args.language}")
+    print(f"Counting tokens over {len(sentences)} sentences and {len(words)} dictionary words...")
+
+    tokenizer = T5Tokenizer.from_pretrained(str(model_path / "tokenizer"))
+    counts = count_token_usage(tokenizer, sentences, words)
+    kept_ids = select_kept_ids(tokenizer, counts, args.min_count, args.max_vocab)
+    pruned_tokenizer = PrunedTokenizer(tokenizer, kept_ids)
+
+    total = sum(counts[token_id] for token_id in counts)
+    covered = sum(counts[token_id] for token_id in kept_ids)
+    print(f"Vocabulary: {len(tokenizer)} -> {len(kept_ids)} tokens "
+          f"({len(fallback_ids(tokenizer))} fallback), usage coverage {covered / max(1, total):.2%}")
+
+    model = T5ForConditionalGeneration.from_pretrained(str(model_path / "model"))
+    params_before = sum(p.numel() for p in model.parameters())
+    embedding_before = model.get_input_embeddings().weight.numel()
+    prune_model(model, kept_ids)
+    params_after = sum(p.numel() for p in model.parameters())
+    embedding_after = model.get_input_embeddings().weight.numel()
+
+    pruned_path = args.input_dir / f"t5_gec_{args.language}_pruned"
+    model.save_pretrained(pruned_path / "model")
+    pruned_tokenizer.save_pretrained(pruned_path / "tokenizer")
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    vocab_path = args.output_dir / f"vocab_{args.language}.txt"
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        for piece, _ in sorted(pruned_tokenizer.get_vocab().items(), key=lambda x: x[1]):
+            f.write(f"{piece}\n")
+
+    # Retokenization cost on the counted sentences: tokens per sentence before/after
+    tokens_before = sum(len(tokenizer.encode(TASK_PREFIX + s)) for s in sentences)
+    tokens_after = sum(len(pruned_tokenizer.encode(TASK_PREFIX + s)) for s in sentences)
+
+    report = {
+        "language": args.language,
+        "originalVocabSize": len(tokenizer),
+        "prunedVocabSize": len(kept_ids),
+        "fallbackTokens": len(fallback_ids(tokenizer)),
+        "sentences": len(sentences),
+        "dictionaryWords": len(words),
+        "usageCoverage": round(covered / max(1, total), 5),
+        "sentenceTokensBefore": tokens_before,
+        "sentenceTokensAfter": tokens_after,
+        "parametersBefore": params_before,
+        "parametersAfter": params_after,
+        "embeddingParametersBefore": embedding_before,
+        "embeddingParametersAfter": embedding_after,
+        "estimatedInt8SizeMBBefore": round(params_before / 1024 / 1024, 1),
+        "estimatedInt8SizeMBAfter": round(params_after / 1024 / 1024, 1),
+    }
+    report_path = args.output_dir / f"prune_report_{args.language}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Parameters: {params_before:,} -> {params_after:,} "
+          f"(~{report['estimatedInt8SizeMBBefore']} MB -> ~{report['estimatedInt8SizeMBAfter']} MB at INT8)")
+    if sentences:
+        print(f"Sentence tokens: {tokens_before} -> {tokens_after} after re-splitting pruned pieces")
+    print(f"\nPruned model saved to: {pruned_path}")
+    print(f"Vocabulary saved to: {vocab_path}")
+    print(f"Report saved to: {report_path}")
+    print(f"\nConvert it with:")
+    print(f"  python convert_to_tflite.py --language {args.language} --pruned")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
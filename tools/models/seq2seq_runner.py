@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Reference greedy decoder for the encoder/decoder-split TFLite grammar model.
+
+The seq2seq model written by `convert_to_tflite.py --seq2seq` has these
+signatures:
+
+    encode_{n}   input_ids, attention_mask -> encoder_hidden_states
+                 (one signature per length bucket n, e.g. 16/32/64/128)
+    decode_init  decoder_input_ids, encoder_hidden_states, encoder_attention_mask
+                 -> logits, present_self_{key,value}_{i}, cross_{key,value}_{i}
+    decode_step  decoder_input_ids, encoder_hidden_states, encoder_attention_mask,
+                 past_self_{key,value}_{i}, cross_{key,value}_{i}
+                 -> logits, present_self_{key,value}_{i}
+
+Inputs are padded only up to the smallest length bucket that fits the
+sentence, so a five-word phrase pays for 16 positions instead of 128. The
+decoder signatures accept any encoder length.
+
+decode_init runs the first decoder position and returns the self-attention
+cache plus the cross-attention keys/values (constant for the sentence).
+Every later token runs decode_step once with the cache, so each output token
+costs one single-position decoder pass instead of a full recompute. This
+module mirrors what the Kotlin side has to do.
+
+Usage:
+    python seq2seq_runner.py --model output/grammar_en_seq2seq.tflite \
+        --tokenizer downloaded/t5_gec_en/tokenizer --text "I goed to the store yesterday."
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# T5 conventions: decoding starts from <pad>, stops at </s>
+DECODER_START_ID = 0
+EOS_ID = 1
+TASK_PREFIX = "gec: "
+
+
+def encoder_buckets(signatures) -> Dict[str, int]:
+    """Map encoder signature names to their length bucket (None for a legacy single `encode`)."""
+    buckets = {name: int(match.group(1)) for name in signatures
+               if (match := re.fullmatch(r"encode_(\d+)", name))}
+    if not buckets and "encode" in signatures:
+        buckets = {"encode": None}
+    return buckets
+
+
+def select_bucket(buckets: List[int], length: int) -> int:
+    """Smallest bucket that holds `length` tokens, or the largest one (input is then truncated)."""
+    fitting = [bucket for bucket in sorted(buckets) if bucket >= length]
+    return fitting[0] if fitting else max(buckets)
+
+
+def load_interpreter(model_path: Path, num_threads: Optional[int] = None):
+    """Create a TFLite interpreter, preferring the lightweight tflite_runtime package."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=str(model_path), num_threads=num_threads)
+
+
+class TFLiteSeq2SeqRunner:
+    """Greedy decoding over the encode / decode_init / decode_step signatures."""
+
+    def __init__(self, model_path: Path, num_threads: Optional[int] = None):
+        self.interpreter = load_interpreter(model_path, num_threads)
+        signatures = self.interpreter.get_signature_list()
+        encoders = encoder_buckets(signatures)
+        missing = {"decode_init", "decode_step"} - set(signatures)
+        if not encoders:
+            missing.add("encode_{n}")
+        if missing:
+            raise ValueError(f"{model_path} has no {', '.join(sorted(missing))} signature(s); "
+                             f"export it with convert_to_tflite.py --seq2seq")
+        # bucket length -> encoder signature runner
+        self._encoders = {}
+        for name, bucket in encoders.items():
+            runner = self.interpreter.get_signature_runner(name)
+            if bucket is None:
+                bucket = int(runner.get_input_details()["input_ids"]["shape"][1])
+            self._encoders[bucket] = runner
+        self.buckets = sorted(self._encoders)
+        self.max_length = self.buckets[-1]
+        self._decode_init = self.interpreter.get_signature_runner("decode_init")
+        self._decode_step = self.interpreter.get_signature_runner("decode_step")
+
+    def generate(self, input_ids, attention_mask, max_new_tokens: int = 64,
+                 stop_at_eos: bool = True) -> List[int]:
+        """
+        Greedy-decode output token IDs for one [1, length] input.
+
+        The input may be padded to any length: it is re-padded (or truncated)
+        to the smallest bucket that holds its non-padding tokens. With
+        stop_at_eos=False exactly max_new_tokens steps are run, which is
+        what benchmarks need for comparable timings.
+        """
+        import numpy as np
+
+        used = int(np.asarray(attention_mask).sum())
+        bucket = select_bucket(self.buckets, used)
+        used = min(used, bucket)
+        bucket_ids = np.zeros((1, bucket), dtype=np.int32)
+        bucket_mask = np.zeros((1, bucket), dtype=np.int32)
+        bucket_ids[0, :used] = np.asarray(input_ids)[0, :used]
+        bucket_mask[0, :used] = 1
+        input_ids, attention_mask = bucket_ids, bucket_mask
+
+        encoder_hidden_states = self._encoders[bucket](
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+        )["encoder_hidden_states"]
+        encoder_inputs = {
+            "encoder_hidden_states": encoder_hidden_states,
+            "encoder_attention_mask": attention_mask,
+        }
+
+        outputs = self._decode_init(
+            decoder_input_ids=np.array([[DECODER_START_ID]], dtype=np.int32),
+            **encoder_inputs,
+        )
+        cross_cache = {name: value for name, value in outputs.items() if name.startswith("cross_")}
+
+        tokens: List[int] = []
+        while len(tokens) < max_new_tokens:
+            next_token = int(np.argmax(outputs["logits"][0]))
+            if next_token == EOS_ID and stop_at_eos:
+                break
+            tokens.append(next_token)
+
+            self_cache = {name.replace("present_", "past_"): value
+                          for name, value in outputs.items() if name.startswith("present_")}
+            outputs = self._decode_step(
+                decoder_input_ids=np.array([[next_token]], dtype=np.int32),
+                **encoder_inputs,
+                **self_cache,
+                **cross_cache,
+            )
+        return tokens
+
+    def correct(self, tokenizer, text: str, max_new_tokens: int = 64) -> str:
+        """Run the full pipeline on one sentence and return the corrected text."""
+        encoded = tokenizer(
+            TASK_PREFIX + text,
+            max_length=self.max_length,
+            truncation=True,
+            return_tensors="np",
+        )
+        tokens = self.generate(encoded["input_ids"], encoded["attention_mask"], max_new_tokens)
+        return tokenizer.decode(tokens, skip_special_tokens=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Greedy-decode with the seq2seq TFLite grammar model")
+    parser.add_argument("--model", "-m", type=Path, required=True, help="grammar_{lang}_seq2seq.tflite")
+    parser.add_argument("--tokenizer", "-t", type=Path, required=True, help="Tokenizer directory")
+    parser.add_argument("--text", action="append", required=True, help="Sentence to correct; can be repeated")
+    parser.add_argument("--max-new-tokens", type=int, default=64, help="Maximum output tokens (default: 64)")
+    parser.add_argument("--threads", type=int, default=None, help="Interpreter threads")
+
+    args = parser.parse_args()
+
+    if not args.model.exists():
+        print(f"Error: Model not found at {args.model}")
+        return 1
+
+    from prune_vocabulary import load_tokenizer
+
+    tokenizer = load_tokenizer(args.tokenizer)
+    runner = TFLiteSeq2SeqRunner(args.model, args.threads)
+
+    for text in args.text:
+        start = time.perf_counter()
+        corrected = runner.correct(tokenizer, text, args.max_new_tokens)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Original:  {text}")
+        print(f"Corrected: {corrected}  ({elapsed:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+titankeys-tools: single entry point for the dictionary and model tools.
+
+Every subcommand maps to one of the scripts in tools/dictionaries/ or
+tools/models/. The script module is imported only when its subcommand runs,
+and the scripts themselves import heavy dependencies (cbor2, numpy,
+TensorFlow, transformers) only where they are used, so `--help` and light
+commands such as `truncate` start in milliseconds.
+
+Usage:
+    python tools/titankeys_tools.py --help
+    python tools/titankeys_tools.py truncate --input it_base.json --output it_base.json --max_words 20000
+    python tools/titankeys_tools.py build-symspell --input it_base.json --output it_base.dict
+    python tools/titankeys_tools.py bench-startup [--runs N] [COMMAND ...]
+
+Arguments after the subcommand are passed through to the script unchanged.
+"""
+
+import argparse
+import importlib
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# subcommand -> (directory under tools/, module name, one-line help)
+COMMANDS = {
+    "download-corpora": ("dictionaries", "download_corpora", "Download word frequency lists"),
+    "merge": ("dictionaries", "merge_dictionaries", "Merge several word lists into one"),
+    "extract-ngrams": ("dictionaries", "extract_ngrams", "Extract bigrams/trigrams from text"),
+    "tokenize-corpus": ("dictionaries", "tokenize_corpus", "Tokenize a corpus into a uint32 token cache"),
+    "truncate": ("dictionaries", "truncate_dict", "Keep the top N words of a word list"),
+    "build-symspell": ("dictionaries", "build_symspell_dict", "Build a .dict with SymSpell deletes (CBOR)"),
+    "symspell-lookup": ("dictionaries", "symspell", "Look up words with the reference SymSpell engine"),
+    "benchmark-symspell": ("dictionaries", "benchmark_symspell",
+                           "SymSpell recall@k and lookups/sec on synthetic typos"),
+    "correction-cache": ("dictionaries", "build_correction_cache",
+                         "Add precomputed corrections for common typos to a .dict"),
+    "known-words": ("dictionaries", "build_known_words",
+                    "Build a Bloom filter + perfect hash known-word index (.words)"),
+    "shard-dict": ("dictionaries", "build_sharded_dict", "Split a dictionary into lazily loadable shards"),
+    "update-dict": ("dictionaries", "update_symspell_dict", "Apply a word-list diff to a .dict without a full rebuild"),
+    "dict-patch": ("dictionaries", "build_dict_patch", "Make or apply delta patches between .dict versions"),
+    "merge-dict": ("dictionaries", "build_merged_dict", "Merge several languages into one multilingual .dict"),
+    "tune-symspell": ("dictionaries", "tune_symspell", "Sweep SymSpell parameters per language (Pareto report)"),
+    "convert-all-symspell": ("dictionaries", "convert_all_to_symspell", "Build .dict files for all languages"),
+    "convert-cbor": ("dictionaries", "convert_dict_to_cbor", "Convert JSON .dict files to CBOR"),
+    "backup-truncate-convert": ("dictionaries", "backup_truncate_and_convert",
+                                "Backup, truncate and convert all dictionaries"),
+    "preprocess": ("dictionaries", "preprocess_dictionaries", "Serialize *_base.json into .dict files"),
+    "build-complete": ("dictionaries", "build_complete_dictionary", "Run the full dictionary pipeline"),
+    "download-grammar-model": ("models", "download_grammar_model", "Download the T5 GEC model"),
+    "convert-tflite": ("models", "convert_to_tflite", "Convert the grammar model to TFLite"),
+    "seq2seq-run": ("models", "seq2seq_runner", "Greedy-decode with the seq2seq TFLite model"),
+    "calibration-data": ("models", "calibration", "Show INT8 calibration sentences for a language"),
+    "artifact-cache": ("models", "artifact_cache", "List or clear cached model conversion stages"),
+    "export-onnx": ("models", "export_onnx", "Export the grammar model to ONNX"),
+    "prune-vocabulary": ("models", "prune_vocabulary", "Prune the T5 vocabulary/embeddings for one language"),
+    "distill-student": ("models", "distill_student", "Distill the grammar model into a smaller student"),
+    "edit-tagger": ("models", "edit_tagger", "Train/export the single-pass edit-tagging grammar model"),
+    "contextual-predictor": ("models", "build_contextual_predictor",
+                             "Train/export the contextual_predictor.tflite next-word model"),
+    "benchmark-models": ("models", "benchmark_models", "Benchmark TFLite/ONNX models on the local CPU"),
+}
+
+
+def run_command(name: str, argv: list) -> int:
+    """Import the subcommand's script and run its main() with argv."""
+    directory, module_name, _ = COMMANDS[name]
+    sys.path.insert(0, os.path.join(TOOLS_DIR, directory))
+    sys.argv = [f"titankeys-tools {name}"] + argv
+    module = importlib.import_module(module_name)
+    result = module.main()
+    return result if isinstance(result, int) else 0
+
+
+def bench_startup(commands: list, runs: int) -> int:
+    """Measure wall-clock startup time of `COMMAND --help` in fresh interpreters."""
+    targets = [None] + (commands or list(COMMANDS))
+    print(f"Startup time over {runs} runs (fresh interpreter, `--help`):")
+    print(f"  {'command':<26} {'min ms':>8} {'median ms':>10}")
+
+    failed = []
+    for name in targets:
+        if name is None:
+            cmd = [sys.executable, "-c", "pass"]
+            label = "(python baseline)"
+        else:
+            cmd = [sys.executable, os.path.abspath(__file__), name, "--help"]
+            label = name
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1000)
+            if result.returncode != 0:
+                failed.append(label)
+                break
+
+        status = "" if result.returncode == 0 else "  [FAIL]"
+        print(f"  {label:<26} {min(timings):>8.1f} {statistics.median(timings):>10.1f}{status}")
+
+    if failed:
+        print(f"\nFailed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="titankeys-tools",
+        description="TitanKeys dictionary and model tools",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    for name, (_, _, help_text) in COMMANDS.items():
+        # add_help=False: --help is forwarded to the script's own parser
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    bench = subparsers.add_parser("bench-startup", help="Measure startup time of every subcommand")
+    bench.add_argument("commands", nargs="*", metavar="COMMAND",
+                       help="Subcommands to measure (default: all)")
+    bench.add_argument("--runs", type=int, default=5, help="Runs per command (default: 5)")
+
+    args, rest = parser.parse_known_args()
+
+    if args.command is None:
+        parser.print_help()
+        return 1
+    if args.command == "bench-startup":
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        unknown = [name for name in args.commands if name not in COMMANDS]
+        if unknown:
+            parser.error(f"unknown command(s): {', '.join(unknown)}")
+        return bench_startup(args.commands, max(1, args.runs))
+    return run_command(args.command, rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())